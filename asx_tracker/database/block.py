@@ -0,0 +1,140 @@
+import argparse
+import struct
+import zlib
+import numpy as np
+
+class Block():
+
+    # Static variables
+
+    _VERSION        = 2
+    _LEVEL          = 6 # zlib compression level
+    _HEADER         = struct.Struct('<BI') # Version, number of rows
+    _COLUMN         = struct.Struct('<Bq') # Width of the deltas, first value
+    _WIDTHS         = [np.int8, np.int16, np.int32, np.int64]
+
+
+    # Codec
+
+    @staticmethod
+    def encode(data):
+        """
+        Compresses rows into a block. Each column's first value is stored in its header and the rest are delta encoded,
+        narrowed to the smallest integer type that holds the deltas, then the block is zlib compressed
+
+        Parameters
+        ----------
+        data : numpy.ndarray
+            Structured array of integer columns, ordered by date
+
+        Returns
+        -------
+        bytes
+            Encoded block
+        """
+
+        parts = [Block._HEADER.pack(Block._VERSION, len(data))]
+        for name in data.dtype.names:
+            col = data[name].astype(np.int64)
+            deltas = np.diff(col)
+            width = Block._width(deltas)
+            parts.append(Block._COLUMN.pack(width, int(col[0]) if len(col) else 0))
+            parts.append(deltas.astype(Block._WIDTHS[width]).tobytes())
+        return zlib.compress(b''.join(parts), Block._LEVEL)
+
+
+    @staticmethod
+    def decode(blob, dtype):
+        """
+        Decompresses a block created by Block.encode
+
+        Parameters
+        ----------
+        blob : bytes
+            Encoded block
+        dtype : numpy.dtype
+            Structured type of the encoded rows
+
+        Returns
+        -------
+        numpy.ndarray
+            Structured array of dtype, ordered by date
+
+        Raises
+        ------
+        ValueError
+            If the block was encoded by an unknown version
+        """
+
+        raw = zlib.decompress(blob)
+        version, rows = Block._HEADER.unpack_from(raw)
+        if version not in (1, Block._VERSION):
+            raise ValueError(f'Unknown block version {version}')
+        data = np.empty(rows, dtype=dtype)
+        offset = Block._HEADER.size
+        for name in dtype.names:
+
+            # Version 1 delta encodes the first value from 0
+            if version == 1:
+                width = Block._WIDTHS[raw[offset]]
+                deltas = np.frombuffer(raw, dtype=width, count=rows, offset=offset + 1)
+                data[name] = np.cumsum(deltas, dtype=np.int64)
+                offset += 1 + rows * np.dtype(width).itemsize
+                continue
+
+            index, first = Block._COLUMN.unpack_from(raw, offset)
+            width = Block._WIDTHS[index]
+            offset += Block._COLUMN.size
+            if rows:
+                deltas = np.frombuffer(raw, dtype=width, count=rows - 1, offset=offset)
+                data[name][0] = first
+                data[name][1:] = first + np.cumsum(deltas, dtype=np.int64)
+                offset += (rows - 1) * np.dtype(width).itemsize
+        return data
+
+
+    # Internal
+
+    @staticmethod
+    def _width(deltas):
+        """
+        Returns the index in Block._WIDTHS of the smallest integer type holding every value
+
+        Parameters
+        ----------
+        deltas : numpy.ndarray
+            Values to hold
+
+        Returns
+        -------
+        int
+            Index of the integer type
+        """
+
+        if len(deltas) == 0:
+            return 0
+        lo, hi = int(deltas.min()), int(deltas.max())
+        for i, width in enumerate(Block._WIDTHS):
+            info = np.iinfo(width)
+            if info.min <= lo and hi <= info.max:
+                return i
+        return len(Block._WIDTHS) - 1
+
+
+if __name__ == "__main__":
+    from asx_tracker.date import Date
+    from asx_tracker.database.database import Database
+
+    parser = argparse.ArgumentParser(description='Compact intraday data into compressed per-ticker-day blocks')
+    parser.add_argument('--path', default='asx_tracker/database/database.db')
+    parser.add_argument('--before', help="Compact days before this date, e.g. '1 JAN 2022', by default all days before today")
+    args = parser.parse_args()
+
+    Database._PATH_DB = args.path
+    Database.create_tables()
+    before = None if args.before is None else Date.date_str_to_timestamp(args.before)
+    if args.before is not None and before is None:
+        parser.error(f'invalid date: {args.before}')
+    print('Compacting intraday data ...')
+    count = Database.compact_intraday(before)
+    print(f'  complete ({count} rows compacted)')
\ No newline at end of file
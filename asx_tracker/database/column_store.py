@@ -0,0 +1,286 @@
+import argparse
+import atexit
+import json
+import os
+import shutil
+import numpy as np
+
+class ColumnStore():
+
+    # Static variables
+
+    ENABLED         = False # Whether or not series reads use memory-mapped column files instead of SQLite
+
+    _DIR_COLUMNS    = 'columns'
+    _FILE_INDEX     = 'index.json'
+
+    _indexes        = {}
+    _mtimes         = {}
+    _maps           = {}
+    _dirty          = set()
+
+
+    # Read
+
+    @staticmethod
+    def read(path, table, key, dtype, start=None, end=None):
+        """
+        Returns zero-copy slices of a ticker's column files between two dates
+
+        Parameters
+        ----------
+        path : str
+            Path to the main database
+        table : str
+            Table the series is stored for
+        key : int
+            Listing id of the ticker
+        dtype : numpy.dtype
+            Structured type whose fields name the columns, starting with the date column
+        start : int, optional
+            Timestamp of the start date, by default None (i.e. no lower bound)
+        end : int, optional
+            Timestamp of the end date, by default None (i.e. no upper bound)
+
+        Returns
+        -------
+        dict
+            key : str
+                Column name
+            value : numpy.ndarray
+                Read-only column values, ordered by date
+        """
+
+        columns = ColumnStore._columns(path, table, key, dtype)
+        dates = columns[dtype.names[0]]
+        lo = 0 if start is None else np.searchsorted(dates, start, side='left')
+        hi = len(dates) if end is None else np.searchsorted(dates, end, side='right')
+        return {name: col[lo:hi] for name, col in columns.items()}
+
+
+    @staticmethod
+    def extent(path, table, key):
+        """
+        Returns the number of rows and date range stored for a ticker
+
+        Parameters
+        ----------
+        path : str
+            Path to the main database
+        table : str
+            Table the series is stored for
+        key : int
+            Listing id of the ticker
+
+        Returns
+        -------
+        tuple
+            (rows, first date, last date), with dates of None if no rows are stored
+        """
+
+        return tuple(ColumnStore._index(path, table).get(str(key), (0, None, None)))
+
+
+    @staticmethod
+    def stored(path, table, key):
+        """
+        Returns whether a ticker's rows have been written to the column store (i.e. by ColumnStore.append since the store was built)
+
+        Parameters
+        ----------
+        path : str
+            Path to the main database
+        table : str
+            Table the series is stored for
+        key : int
+            Listing id of the ticker
+
+        Returns
+        -------
+        bool
+            Whether or not the ticker is stored
+        """
+
+        return str(key) in ColumnStore._index(path, table)
+
+
+    # Write
+
+    @staticmethod
+    def append(path, table, key, data):
+        """
+        Appends rows that are newer than all stored rows to a ticker's column files
+
+        Parameters
+        ----------
+        path : str
+            Path to the main database
+        table : str
+            Table the series is stored for
+        key : int
+            Listing id of the ticker
+        data : numpy.ndarray
+            Structured array of new rows ordered by date, starting with the date column
+        """
+
+        if len(data) == 0:
+            return
+        rows, first, last = ColumnStore.extent(path, table, key)
+        dates = data[data.dtype.names[0]]
+        if last is not None and dates[0] <= last:
+            raise ValueError(f'Rows for {table} {key} must be newer than {last} to append')
+        directory = ColumnStore._dir(path, table, key)
+        os.makedirs(directory, exist_ok=True)
+        for name in data.dtype.names:
+            with open(os.path.join(directory, name), 'ab') as f:
+                f.write(np.ascontiguousarray(data[name]).tobytes())
+        first = int(dates[0]) if first is None else first
+        ColumnStore._set_extent(path, table, key, rows + len(data), first, int(dates[-1]))
+
+
+    @staticmethod
+    def replace(path, table, key, data):
+        """
+        Replaces all of a ticker's column files.
+        See ColumnStore.append
+        """
+
+        directory = ColumnStore._dir(path, table, key)
+        ColumnStore._maps.pop((path, table, key), None)
+        shutil.rmtree(directory, ignore_errors=True)
+        ColumnStore._set_extent(path, table, key, 0, None, None)
+        ColumnStore.append(path, table, key, data)
+
+
+    @staticmethod
+    def clear(path, table):
+        """
+        Removes all column files stored for a table
+
+        Parameters
+        ----------
+        path : str
+            Path to the main database
+        table : str
+            Table to remove the column files of
+        """
+
+        for map_key in [k for k in ColumnStore._maps if k[:2] == (path, table)]:
+            ColumnStore._maps.pop(map_key)
+        shutil.rmtree(os.path.join(ColumnStore._root(path), table), ignore_errors=True)
+        ColumnStore._indexes[(path, table)] = {}
+        ColumnStore._dirty.add((path, table))
+
+
+    @staticmethod
+    def flush():
+        """
+        Writes any modified date range indexes to disk
+        """
+
+        for path, table in list(ColumnStore._dirty):
+            file = os.path.join(ColumnStore._root(path), table, ColumnStore._FILE_INDEX)
+            os.makedirs(os.path.dirname(file), exist_ok=True)
+            with open(file + '.tmp', 'w') as f:
+                json.dump(ColumnStore._indexes[(path, table)], f)
+            os.replace(file + '.tmp', file)
+            ColumnStore._mtimes[(path, table)] = os.stat(file).st_mtime_ns
+            ColumnStore._dirty.discard((path, table))
+
+
+    # Internal
+
+    @staticmethod
+    def _columns(path, table, key, dtype):
+        """
+        Returns memory maps of a ticker's column files, opening them if required
+
+        Returns
+        -------
+        dict
+            key : str
+                Column name
+            value : numpy.memmap or numpy.ndarray
+                Read-only column values (empty array if no rows are stored)
+        """
+
+        extent = ColumnStore.extent(path, table, key)
+        rows = extent[0]
+        cached = ColumnStore._maps.get((path, table, key))
+        if cached is not None and cached[0] == extent:
+            return cached[1]
+        directory = ColumnStore._dir(path, table, key)
+        columns = {}
+        for name in dtype.names:
+            col_dtype = dtype.fields[name][0]
+            columns[name] = np.memmap(os.path.join(directory, name), dtype=col_dtype, mode='r', shape=(rows,)) if rows else np.empty(0, dtype=col_dtype)
+        ColumnStore._maps[(path, table, key)] = (extent, columns)
+        return columns
+
+
+    @staticmethod
+    def _index(path, table):
+        """
+        Returns the date range index of a table, loading it from disk if required.
+        Reloaded whenever the file has been rewritten since (e.g. by the scraper in another process), unless this process has unsaved changes
+
+        Returns
+        -------
+        dict
+            key : str
+                Listing id of the ticker
+            value : list
+                [rows, first date, last date]
+        """
+
+        index = ColumnStore._indexes.get((path, table))
+        if (path, table) in ColumnStore._dirty:
+            return index
+        file = os.path.join(ColumnStore._root(path), table, ColumnStore._FILE_INDEX)
+        try:
+            mtime = os.stat(file).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if index is None or ColumnStore._mtimes.get((path, table)) != mtime:
+            index = {}
+            if mtime is not None:
+                with open(file) as f:
+                    index = json.load(f)
+            ColumnStore._indexes[(path, table)] = index
+            ColumnStore._mtimes[(path, table)] = mtime
+        return index
+
+
+    @staticmethod
+    def _set_extent(path, table, key, rows, first, last):
+        ColumnStore._index(path, table)[str(key)] = [rows, first, last]
+        ColumnStore._dirty.add((path, table))
+
+
+    @staticmethod
+    def _root(path):
+        return os.path.join(os.path.dirname(path), ColumnStore._DIR_COLUMNS)
+
+
+    @staticmethod
+    def _dir(path, table, key):
+        return os.path.join(ColumnStore._root(path), table, str(key))
+
+
+atexit.register(ColumnStore.flush)
+
+
+if __name__ == "__main__":
+    from asx_tracker.database.database import Database
+
+    parser = argparse.ArgumentParser(description='Manage the memory-mapped column store')
+    parser.add_argument('command', choices=['rebuild', 'sync'])
+    parser.add_argument('--path', default='asx_tracker/database/database.db')
+    args = parser.parse_args()
+
+    Database._PATH_DB = args.path
+    Database.create_tables()
+    for table in [Database.TAB_INTRADAY, Database.TAB_DAILY]:
+        print(f'{args.command.capitalize()} {table} ...')
+        count = Database.sync_column_store(table, rebuild=args.command == 'rebuild')
+        print(f'  complete ({count} rows written)')
\ No newline at end of file
@@ -0,0 +1,334 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+class Connection():
+
+    # Static variables
+
+    _CACHED_STATEMENTS  = 256
+    _PRAGMA_NEW         = 'PRAGMA auto_vacuum = INCREMENTAL' # Only set on new databases, as it takes the write lock even when unchanged (existing ones are converted by Database.vacuum)
+    _PRAGMAS            = [
+        'PRAGMA journal_mode = WAL',
+        'PRAGMA busy_timeout = 5000',       # Milliseconds to wait for another process's lock before raising
+        'PRAGMA synchronous = NORMAL',
+        'PRAGMA cache_size = -65536',       # KiB (i.e. 64 MiB page cache)
+        'PRAGMA mmap_size = 1073741824',    # Bytes (i.e. 1 GiB memory map)
+        'PRAGMA temp_store = MEMORY']
+
+    _local = threading.local()
+    _writers = {}
+    _locks = {}
+
+
+    # Connections
+
+    @staticmethod
+    def get(path):
+        """
+        Returns the long-lived connection to a database for the current thread, opening it if required.
+        Threads holding the writer (see Connection.writer) are given the writer connection, so they read their own uncommitted changes
+
+        Parameters
+        ----------
+        path : str
+            Path to the database
+
+        Returns
+        -------
+        sqlite3.Connection
+            Connection to the database
+        """
+
+        if Connection._held().get(path):
+            return Connection._writers[path]
+        conns = Connection._connections()
+        conn = conns.get(path)
+        if conn is None:
+            conn = Connection._open(path)
+            conns[path] = conn
+        return conn
+
+
+    @staticmethod
+    def close(path=None):
+        """
+        Closes the current thread's connections and the process's writer connections
+
+        Parameters
+        ----------
+        path : str, optional
+            Path to the database to close, by default None (i.e. close all databases)
+        """
+
+        conns = Connection._connections()
+        paths = list(conns.keys()) if path is None else [path]
+        for p in paths:
+            conn = conns.pop(p, None)
+            if conn is not None:
+                conn.close()
+        paths = list(Connection._writers.keys()) if path is None else [path]
+        for p in paths:
+            with Connection._lock(p):
+                conn = Connection._writers.pop(p, None)
+                if conn is not None:
+                    conn.close()
+
+
+    # Writer
+
+    @staticmethod
+    @contextmanager
+    def writer(path):
+        """
+        Holds the process's single writer connection to a database, blocking other threads that want to write until released.
+        Used directly for statements that cannot run inside a transaction (e.g. ATTACH), else see Connection.transaction
+
+        Parameters
+        ----------
+        path : str
+            Path to the database
+
+        Yields
+        ------
+        sqlite3.Connection
+            Writer connection to the database
+        """
+
+        with Connection._lock(path):
+            conn = Connection._writers.get(path)
+            if conn is None:
+                conn = Connection._open(path, check_same_thread=False)
+                Connection._writers[path] = conn
+            held = Connection._held()
+            held[path] = held.get(path, 0) + 1
+            try:
+                yield conn
+            finally:
+                held[path] -= 1
+
+
+    # Transactions
+
+    @staticmethod
+    @contextmanager
+    def transaction(path):
+        """
+        Runs the enclosed statements inside a single write transaction on the writer connection, committing on success and rolling back on error.
+        The write lock is taken up front (BEGIN IMMEDIATE), so other processes wait on the busy timeout instead of failing part way.
+        Nested calls on the same thread join the outermost transaction, and functions queued by Connection.on_commit run once it commits
+
+        Parameters
+        ----------
+        path : str
+            Path to the database
+
+        Yields
+        ------
+        sqlite3.Connection
+            Writer connection to the database
+        """
+
+        committed = []
+        with Connection.writer(path) as conn:
+            depths = Connection._depths()
+            depth = depths.get(path, 0)
+            if depth == 0:
+                conn.execute('BEGIN IMMEDIATE')
+            depths[path] = depth + 1
+            try:
+                yield conn
+            except BaseException:
+                depths[path] = depth
+                if depth == 0:
+                    Connection._hooks().pop(path, None)
+                    conn.execute('ROLLBACK')
+                raise
+            depths[path] = depth
+            if depth == 0:
+                try:
+                    conn.execute('COMMIT')
+                except BaseException:
+                    Connection._hooks().pop(path, None)
+                    if conn.in_transaction: # e.g. SQLITE_BUSY, which leaves the transaction open
+                        conn.execute('ROLLBACK')
+                    raise
+                committed = Connection._hooks().pop(path, [])
+        for fn in committed: # After releasing the writer, so other threads can write meanwhile
+            fn()
+
+
+    @staticmethod
+    def on_commit(path, fn):
+        """
+        Runs a function once the current thread's transaction on a database commits, or straight away if none is open.
+        The function is dropped if the transaction rolls back
+
+        Parameters
+        ----------
+        path : str
+            Path to the database
+        fn : callable
+            Function taking no arguments
+        """
+
+        if Connection.depth(path) == 0:
+            fn()
+        else:
+            Connection._hooks().setdefault(path, []).append(fn)
+
+
+    @staticmethod
+    def depth(path):
+        """
+        Returns how many transactions the current thread has open on a database
+
+        Parameters
+        ----------
+        path : str
+            Path to the database
+
+        Returns
+        -------
+        int
+            Number of nested transactions (0 if none are open)
+        """
+
+        return Connection._depths().get(path, 0)
+
+
+    # Snapshots
+
+    @staticmethod
+    @contextmanager
+    def snapshot(path):
+        """
+        Runs the enclosed reads against a single consistent snapshot of a database and its attached partitions, unaffected by commits made while it is held.
+        Partitions read inside a snapshot must already be attached, as databases cannot be attached inside a transaction
+
+        Parameters
+        ----------
+        path : str
+            Path to the database
+
+        Yields
+        ------
+        sqlite3.Connection
+            Connection to the database
+        """
+
+        conn = Connection.get(path)
+        if conn.in_transaction:
+            yield conn # Already reading a snapshot (or writing)
+            return
+        conn.execute('BEGIN')
+        for schema in [row[1] for row in conn.execute('PRAGMA database_list') if row[1] != 'temp']:
+            conn.execute(f'SELECT 1 FROM {schema}.sqlite_master LIMIT 1') # Starts the read transaction of each attached database, fixing the snapshot
+        try:
+            yield conn
+        finally:
+            conn.execute('COMMIT')
+
+
+    # Versions
+
+    @staticmethod
+    def data_versions(path):
+        """
+        Returns the data_version of a database and each partition attached to the current thread's connection, which changes when another process commits to it.
+        Read through this process's writer connection wherever it has the same file attached, as a connection's own commits leave its data_version unchanged,
+        so commits made by this process are not counted
+
+        Parameters
+        ----------
+        path : str
+            Path to the database
+
+        Returns
+        -------
+        dict or None
+            key : str
+                Schema name
+            value : tuple
+                (whether read through the writer, data_version), or None if another thread is writing, as the writer cannot be read meanwhile
+        """
+
+        conn = Connection.get(path)
+        files = {row[1]: row[2] for row in conn.execute('PRAGMA database_list') if row[1] != 'temp'}
+        lock = Connection._lock(path)
+        if not lock.acquire(blocking=False):
+            return None
+        try:
+            writer = Connection._writers.get(path)
+            written = {} if writer is None else {row[1]: row[2] for row in writer.execute('PRAGMA database_list')}
+            versions = {}
+            for schema, file in files.items():
+                source = writer if written.get(schema) == file else conn
+                versions[schema] = (source is writer, source.execute(f'PRAGMA {schema}.data_version').fetchone()[0])
+            return versions
+        finally:
+            lock.release()
+
+
+    # Internal
+
+    @staticmethod
+    def _open(path, check_same_thread=True):
+        """
+        Opens and tunes a new connection to a database
+
+        Parameters
+        ----------
+        path : str
+            Path to the database
+        check_same_thread : bool, optional
+            Whether or not only the opening thread may use the connection, by default True
+
+        Returns
+        -------
+        sqlite3.Connection
+            Connection to the database
+        """
+
+        conn = sqlite3.connect(path, isolation_level=None, cached_statements=Connection._CACHED_STATEMENTS, check_same_thread=check_same_thread)
+        if not conn.execute('PRAGMA page_count').fetchone()[0]:
+            conn.execute(Connection._PRAGMA_NEW)
+        for pragma in Connection._PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+
+    @staticmethod
+    def _connections():
+        if not hasattr(Connection._local, 'connections'):
+            Connection._local.connections = {}
+        return Connection._local.connections
+
+
+    @staticmethod
+    def _depths():
+        if not hasattr(Connection._local, 'depths'):
+            Connection._local.depths = {}
+        return Connection._local.depths
+
+
+    @staticmethod
+    def _hooks():
+        if not hasattr(Connection._local, 'hooks'):
+            Connection._local.hooks = {}
+        return Connection._local.hooks
+
+
+    @staticmethod
+    def _held():
+        if not hasattr(Connection._local, 'held'):
+            Connection._local.held = {}
+        return Connection._local.held
+
+
+    @staticmethod
+    def _lock(path):
+        lock = Connection._locks.get(path)
+        if lock is None:
+            lock = Connection._locks.setdefault(path, threading.RLock())
+        return lock
\ No newline at end of file
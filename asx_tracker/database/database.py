@@ -1,6 +1,17 @@
 import sqlite3
+import numpy as np
+import pandas as pd
+from contextlib import contextmanager
+from time import sleep, monotonic, perf_counter
 from asx_tracker.date import Date
 from asx_tracker.database.sql import Sql
+from asx_tracker.database.connection import Connection
+from asx_tracker.database.migration import Migration
+from asx_tracker.database.partition import Partition
+from asx_tracker.database.column_store import ColumnStore
+from asx_tracker.database.price_index import PriceIndex
+from asx_tracker.database.block import Block
+from asx_tracker.database.instrument import Instrument
 
 class Database():
 
@@ -9,7 +20,9 @@ class Database():
     TAB_LISTING = 'listing'
     TAB_INTRADAY = 'intraday'
     TAB_DAILY = 'daily'
+    COL_ID = 'id'
     COL_TICKER = 'ticker'
+    COL_TICKER_ID = 'ticker_id'
     COL_NAME = 'name'
     COL_MGMT_PCT = 'mgmt_pct'
     COL_DATE = 'date'
@@ -20,8 +33,35 @@ class Database():
     COL_VOL= 'volume'
     COL_LAST_INTRADAY = 'last_intraday'
     COL_LAST_DAILY = 'last_daily'
+    ROLLUP_5M = '5m'
+    ROLLUP_15M = '15m'
+    ROLLUP_1H = '1h'
+    ROLLUP_1D = '1d'
+    ROLLUPS = {ROLLUP_5M: 5 * Date.MINUTE, ROLLUP_15M: 15 * Date.MINUTE, ROLLUP_1H: Date.HOUR, ROLLUP_1D: Date.DAY}
+    JOB_PENDING = 'pending'
+    JOB_RUNNING = 'running'
+    JOB_SCRAPED = 'scraped'
+    JOB_DONE = 'done'
+    JOB_FAILED = 'failed'
+    WATCH_USER = 'user'
+    WATCH_SIMULATOR = 'simulator'
+    BAR_DTYPE = np.dtype([(COL_DATE, np.int64), (COL_OPEN, np.int32), (COL_HIGH, np.int32), (COL_LOW, np.int32), (COL_CLOSE, np.int32), (COL_VOL, np.int64)])
 
     _PATH_DB = 'asx_tracker/database/database.db'
+    _LIVE_CHUNK = 500
+    _LIVE_DTYPE = np.dtype([(COL_DATE, np.int64), (COL_CLOSE, np.int64)])
+    _INSERT_CHUNK = 50000
+    _TAB_ROLLUP_PENDING = 'rollup_pending'
+    _TAB_BLOCK = 'intraday_block'
+    _TAB_RETENTION = 'retention'
+    _TAB_SCRAPE_JOB = 'scrape_job'
+    _TAB_SCRAPE_BACKOFF = 'scrape_backoff'
+    _TAB_WATCHLIST = 'watchlist'
+    _VACUUM_PAGES = 1024 # Pages freed per incremental vacuum slice, bounding how long other writers wait
+    _BAR_EPOCH = Date.MIN - 3 * Date.DAY # Monday 29 December 1969 in Sydney standard time, so weekly bars start on Mondays
+    _BUSY_ATTEMPTS = 5
+    _BUSY_BACKOFF = 0.1 # Seconds before the first retry, doubling after each
+    _ticker_ids = {}
 
 
     # Create tables
@@ -29,13 +69,82 @@ class Database():
     @staticmethod
     def create_tables():
         """
-        Creates the required tables for the program
+        Creates the required tables for the program and migrates them to the latest schema version
         """
 
         Database._execute(Sql.FOREIGN_KEYS, fetch=False)
         Database._execute(Sql.CREATE_TAB_LISTING, fetch=False)
         Database._execute(Sql.CREATE_TAB_INTRADAY, fetch=False)
         Database._execute(Sql.CREATE_TAB_DAILY, fetch=False)
+        Migration.migrate(Database._PATH_DB)
+
+
+    # Snapshots
+
+    @staticmethod
+    @contextmanager
+    def snapshot(tickers=None):
+        """
+        Runs the enclosed reads against one consistent snapshot of the database, unaffected by writes committed meanwhile (e.g. by a running scraper).
+        Rollup refreshes commit on the writer connection, which a snapshot would not see, so the rollups of the tickers are refreshed first.
+        Partitions cannot be attached inside a transaction, so all active partitions are attached first,
+        or if there are more than can be attached at once, the reads run without a snapshot (each query still reads a consistent state).
+        See Connection.snapshot
+
+        Parameters
+        ----------
+        tickers : list, optional
+            Tickers whose bars are read, by default None (i.e. no bars)
+        """
+
+        path = Database._PATH_DB
+        conn = Connection.get(path)
+        if conn.in_transaction: # Already reading a snapshot
+            yield
+            return
+        if tickers:
+            Database.refresh_rollups(tickers)
+        names = [p[0] for p in Partition.overlapping(path)]
+        if len(names) > Partition._MAX_ATTACHED:
+            yield
+            return
+        Partition.attach(conn, names, path)
+        with Connection.snapshot(path):
+            yield
+
+
+    # Transactions
+
+    @staticmethod
+    @contextmanager
+    def transaction(start=None, end=None):
+        """
+        Runs the enclosed writes in one transaction, so they are committed together (with one sync to disk) or rolled back together on error.
+        Inserts and listing updates inside the block join the transaction instead of committing on their own, as do nested transactions.
+        Partitions cannot be attached inside a transaction, so the intraday partitions covering start to end are created and attached first
+
+        Parameters
+        ----------
+        start : int, optional
+            Timestamp of the first intraday date to be inserted, by default None (i.e. no intraday inserts)
+        end : int, optional
+            Timestamp of the last intraday date to be inserted, by default None
+
+        Raises
+        ------
+        ValueError
+            If the dates span more partitions than can be attached at once (see Database._fits_transaction)
+        """
+
+        path = Database._PATH_DB
+        names = Database._partitions(start, end)
+        if len(names) > Partition._MAX_ATTACHED:
+            raise ValueError(f'Dates span {len(names)} partitions, but only {Partition._MAX_ATTACHED} can be attached in one transaction')
+        if names:
+            with Connection.writer(path) as conn:
+                Partition.attach(conn, names, path)
+        with Connection.transaction(path):
+            yield
 
 
     # Listings
@@ -43,7 +152,8 @@ class Database():
     @staticmethod
     def insert_listings(df):
         """
-        Inserts ASX listings into the database
+        Inserts ASX listings into the database.
+        If the DataFrame has last intraday and daily save columns, stored save dates are moved forward to them
 
         Parameters
         ----------
@@ -56,17 +166,29 @@ class Database():
             Number of rows inserted
         """
 
-        data = []
-        for i in range(len(df)):
-            row = df.iloc[i]
-            data.append((row[Database.COL_TICKER], row[Database.COL_NAME], int(row[Database.COL_MGMT_PCT])))
+        columns = [
+            Database._column(df, Database.COL_TICKER),
+            Database._column(df, Database.COL_NAME),
+            Database._column(df, Database.COL_MGMT_PCT, np.int64)]
         query = f"""
         INSERT OR IGNORE INTO {Database.TAB_LISTING}
         ({Database.COL_TICKER}, {Database.COL_NAME}, {Database.COL_MGMT_PCT})
         VALUES
         (?,?,?)
         """
-        return Database._execute(query, values=data, fetch=False)
+        count = Database._insert_columns(query, columns)
+        Database._ticker_ids.pop(Database._PATH_DB, None)
+        if Database.COL_LAST_INTRADAY in df and Database.COL_LAST_DAILY in df:
+            query = f"""
+            UPDATE {Database.TAB_LISTING}
+            SET {Database.COL_LAST_INTRADAY} = MAX({Database.COL_LAST_INTRADAY}, ?), {Database.COL_LAST_DAILY} = MAX({Database.COL_LAST_DAILY}, ?)
+            WHERE {Database.COL_TICKER} = ?
+            """
+            Database._insert_columns(query, [
+                Database._column(df, Database.COL_LAST_INTRADAY, np.int64),
+                Database._column(df, Database.COL_LAST_DAILY, np.int64),
+                columns[0]])
+        return count
 
 
     @staticmethod
@@ -106,9 +228,9 @@ class Database():
 
         sel_cols = Database._set_cols(cols)
         query = f"""
-        SELECT {sel_cols} FROM {Database.TAB_LISTING} WHERE {Database.COL_TICKER} = '{ticker}' LIMIT 1
+        SELECT {sel_cols} FROM {Database.TAB_LISTING} WHERE {Database.COL_TICKER} = ? LIMIT 1
         """
-        return Database._execute(query)
+        return Database._execute(query, params=(ticker,))
 
 
     @staticmethod
@@ -150,8 +272,8 @@ class Database():
 
         Parameters
         ----------
-        df : pandas.DataFrame
-            Intraday data to insert
+        df : pandas.DataFrame or dict
+            Intraday data to insert (a DataFrame or dict of equal length numpy arrays)
 
         Returns
         -------
@@ -199,6 +321,71 @@ class Database():
         return Database._fetch_single_intraday_or_daily(ticker, Database.TAB_INTRADAY, *cols, start=start, end=end)
 
 
+    @staticmethod
+    def fetch_single_intraday_array(ticker, start=None, end=None):
+        """
+        Retrieve ASX intraday data for a single ticker as typed columns, without building a list of rows
+
+        Parameters
+        ----------
+        ticker : str
+            Ticker to fetch
+        start : int
+            Timestamp of start date to fetch from
+        end : int
+            Timestamp of end date to fetch from
+
+        Returns
+        -------
+        numpy.ndarray
+            Structured array of Database.BAR_DTYPE, ordered by date
+        """
+
+        return Database._fetch_single_intraday_or_daily_array(ticker, Database.TAB_INTRADAY, start=start, end=end)
+
+
+    @staticmethod
+    def fetch_single_intraday_frame(ticker, start=None, end=None):
+        """
+        Retrieve ASX intraday data for a single ticker as a DataFrame indexed by Sydney time.
+        See Database.fetch_single_intraday_array
+
+        Returns
+        -------
+        pandas.DataFrame
+            Open, high, low, close and volume columns indexed by date
+        """
+
+        return Database._array_to_frame(Database.fetch_single_intraday_series(ticker, start=start, end=end))
+
+
+    @staticmethod
+    def fetch_single_intraday_series(ticker, start=None, end=None):
+        """
+        Retrieve ASX intraday data for a single ticker as separate columns.
+        Columns are zero-copy slices of memory-mapped files when ColumnStore.ENABLED, else views of Database.fetch_single_intraday_array
+
+        Parameters
+        ----------
+        ticker : str
+            Ticker to fetch
+        start : int
+            Timestamp of start date to fetch from
+        end : int
+            Timestamp of end date to fetch from
+
+        Returns
+        -------
+        dict
+            key : str
+                Column name of Database.BAR_DTYPE
+            value : numpy.ndarray
+                Column values, ordered by date
+        """
+
+        return Database._fetch_single_intraday_or_daily_series(ticker, Database.TAB_INTRADAY, start=start, end=end)
+
+
     # Daily
 
     @staticmethod
@@ -231,204 +418,2064 @@ class Database():
         return Database._fetch_single_intraday_or_daily(ticker, Database.TAB_DAILY, *cols, start=start, end=end)
 
 
-    # Live
+    @staticmethod
+    def fetch_single_daily_array(ticker, start=None, end=None):
+        """
+        Retrieve ASX daily data for a single ticker as typed columns.
+        See Database.fetch_single_intraday_array
+        """
+
+        return Database._fetch_single_intraday_or_daily_array(ticker, Database.TAB_DAILY, start=start, end=end)
+
 
     @staticmethod
-    def fetch_multiple_live_prices(date, *tickers):
+    def fetch_single_daily_frame(ticker, start=None, end=None):
+        """
+        Retrieve ASX daily data for a single ticker as a DataFrame indexed by Sydney time.
+        See Database.fetch_single_intraday_frame
         """
-        Fetches multiple live prices
+
+        return Database._array_to_frame(Database.fetch_single_daily_series(ticker, start=start, end=end))
+
+
+    @staticmethod
+    def fetch_single_daily_series(ticker, start=None, end=None):
+        """
+        Retrieve ASX daily data for a single ticker as separate columns.
+        See Database.fetch_single_intraday_series
+        """
+
+        return Database._fetch_single_intraday_or_daily_series(ticker, Database.TAB_DAILY, start=start, end=end)
+
+
+    # Rollups
+
+    @staticmethod
+    def fetch_single_rollup_array(ticker, resolution, start=None, end=None):
+        """
+        Retrieve intraday data for a single ticker rolled up into bars of a coarser resolution.
+        Pending rollups for the ticker are refreshed first
 
         Parameters
         ----------
-        date : int
-            Live timestamp
+        ticker : str
+            Ticker to fetch
+        resolution : str
+            Key of Database.ROLLUPS (e.g. Database.ROLLUP_5M)
+        start : int
+            Timestamp of start date to fetch from
+        end : int
+            Timestamp of end date to fetch from
 
         Returns
         -------
-        dict
-            key : str
-                Ticker name
-            value : int or None
-                Live price if exists, else None
+        numpy.ndarray
+            Structured array of Database.BAR_DTYPE dated by the start of each bar, ordered by date
         """
 
-        return {ticker: Database.fetch_single_live_price(ticker, date) for ticker in tickers}
+        Database.refresh_rollups([ticker])
+        return Database._fetch_single_intraday_or_daily_array(ticker, Database._rollup_table(resolution), start=start, end=end)
 
 
     @staticmethod
-    def fetch_single_live_price(ticker, date):
+    def fetch_single_rollup_frame(ticker, resolution, start=None, end=None):
         """
-        Fetches a live price for a single ticker
+        Retrieve rolled up intraday data for a single ticker as a DataFrame indexed by Sydney time.
+        See Database.fetch_single_rollup_array
+        """
+
+        return Database._array_to_frame(Database.fetch_single_rollup_array(ticker, resolution, start=start, end=end))
+
+
+    @staticmethod
+    def insert_rollup(df, resolution):
+        """
+        Inserts bars straight into a rollup, and into every coarser rollup by aggregating them.
+        Used for scraped bars older than intraday data is kept for by Yahoo! Finance, so days with intraday data should not be inserted (Database.refresh_rollups rebuilds those from intraday data)
 
         Parameters
         ----------
-        ticker : str
-            Ticker name
-        date : int
-            Live timestamp
+        df : pandas.DataFrame or dict
+            Rows to insert, with the same columns as Database.insert_intraday
+        resolution : str
+            Key of Database.ROLLUPS the rows are bars of (e.g. Database.ROLLUP_5M)
 
         Returns
         -------
-        int or None
-            int if a live price is found, else None
+        int
+            Number of rows inserted into the rollup of the given resolution
         """
 
-        intraday_date, intraday_close = Database.fetch_single_live_intraday(ticker, date)
+        ticker_ids = Database._ticker_id_column(df)
+        order = np.lexsort((Database._column(df, Database.COL_DATE), ticker_ids))
+        ticker_ids = ticker_ids[order]
+        data = np.empty(len(order), dtype=Database.BAR_DTYPE)
+        for col in Database.BAR_DTYPE.names:
+            data[col] = Database._column(df, col)[order]
+        bounds = np.flatnonzero(np.diff(ticker_ids)) + 1
+        columns = f"{', '.join(Database.BAR_DTYPE.names)}, {Database.COL_TICKER_ID}"
+        count = 0
+        with Connection.transaction(Database._PATH_DB) as conn:
+            for ticker_id, bars in zip(np.split(ticker_ids, bounds), np.split(data, bounds)):
+                for rollup, size in Database.ROLLUPS.items():
+                    if size < Database.ROLLUPS[resolution]:
+                        continue
+                    rows = Database._aggregate_array(bars, size)
+                    values = zip(*[rows[col].tolist() for col in Database.BAR_DTYPE.names], [int(ticker_id[0])] * len(rows))
+                    query = f"INSERT OR REPLACE INTO {Database._rollup_table(rollup)} ({columns}) VALUES ({','.join('?' * (len(Database.BAR_DTYPE) + 1))})"
+                    inserted = Database._run(conn, query, values).rowcount
+                    if rollup == resolution:
+                        count += inserted
+        return count
 
-        # No intraday
-        if intraday_date is None:
-            daily_date, daily_close = Database.fetch_single_live_daily(ticker, date)
-            return daily_close
 
-        min_date = Date.timestamp_to_datetime(Date.MIN)
-        days_since = lambda t: (Date.timestamp_to_datetime(t) - min_date).days
+    @staticmethod
+    def refresh_rollups(tickers=None):
+        """
+        Recomputes the rollup bars covering intraday data inserted since the last refresh.
+        Only the buckets between the earliest and latest inserted dates of each ticker are recomputed
 
-        # Intraday on current day
-        live_day, intraday_day = days_since(date), days_since(intraday_date)
-        if live_day == intraday_day:
-            return intraday_close
+        Parameters
+        ----------
+        tickers : list, optional
+            Tickers to refresh, by default None (i.e. all pending tickers)
 
-        # No daily
-        daily_date, daily_close = Database.fetch_single_live_daily(ticker, date)
-        if not daily_date is None:
-            return intraday_close
+        Returns
+        -------
+        int
+            Number of tickers refreshed
+        """
 
-        # Return intraday if newer, else daily
-        daily_day = days_since(daily_date)
-        return intraday_close if intraday_day > daily_day else daily_close
+        query = f'SELECT {Database.COL_TICKER_ID}, start, end FROM {Database._TAB_ROLLUP_PENDING}'
+        if tickers is None:
+            pending = Database._execute(query)
+        else:
+            pending = [row for t in tickers for row in Database._execute(f'{query} WHERE {Database.COL_TICKER_ID} = ?', params=(Database._ticker_id(t),))]
+        for ticker_id, start, end in pending:
+            Database._refresh_rollup(ticker_id, start, end)
+        return len(pending)
 
 
+    # Bars
+
     @staticmethod
-    def fetch_single_live_intraday(ticker, date):
+    def fetch_bars(ticker, start, end, bucket_seconds, table=None):
         """
-        Fetches the last intraday date and price for a single ticker
+        Retrieve the bars of an arbitrary size that cover two dates for a single ticker, aggregated inside the database.
+        Bars are built from the coarsest rollup that divides the bar size, else from the table itself
 
         Parameters
         ----------
         ticker : str
-            Ticker name
-        date : int
-            Live timestamp
+            Ticker to fetch
+        start : int
+            Timestamp of start date to fetch from
+        end : int
+            Timestamp of end date to fetch from
+        bucket_seconds : int
+            Bar size in seconds (bars are aligned to Sydney standard time midnight, with weeks starting on Monday)
+        table : str, optional
+            Database.TAB_INTRADAY : intraday data
+            Database.TAB_DAILY : daily data
+            By default None (i.e. intraday data)
 
         Returns
         -------
-        tuple
-            (date, price) if a record exists, else (None, None)
+        numpy.ndarray
+            Structured array of Database.BAR_DTYPE dated by the start of each bar, ordered by date
         """
 
-        data = Database._fetch_live_intraday_or_daily(ticker, Database.TAB_INTRADAY, date, Database.COL_DATE, Database.COL_CLOSE)
-        return data[0] if data else (None, None)
+        table = Database.TAB_INTRADAY if table is None else table
+        start = Date.MIN if start is None else start
+        end = Date.MAX if end is None else end
+        if bucket_seconds <= (Date.DAY if table == Database.TAB_DAILY else Date.MINUTE):
+            return Database._fetch_single_intraday_or_daily_array(ticker, table, start=start, end=end)
+
+        # Coarsest rollup that bars can be built from
+        source = table
+        if table == Database.TAB_INTRADAY:
+            fits = [r for r, size in Database.ROLLUPS.items() if bucket_seconds % size == 0]
+            if fits:
+                Database.refresh_rollups([ticker])
+                source = Database._rollup_table(max(fits, key=Database.ROLLUPS.get))
+
+        # Whole bars covering the dates
+        start = Database._bucket(start, bucket_seconds)
+        end = Database._bucket(end, bucket_seconds) + bucket_seconds - 1
+
+        ticker_id = Database._ticker_id(ticker)
+        if source == Database.TAB_INTRADAY and Database._has_blocks(ticker_id, start, end):
+            data = Database._fetch_single_intraday_or_daily_array(ticker, table, start=start, end=end)
+            return Database._aggregate_array(data, bucket_seconds)
+        chunks = []
+        conn = Connection.get(Database._PATH_DB)
+        for w_start, w_end, sources in Database._windows(source, start, end, bucket_seconds):
+            params = {'id': ticker_id, 'start': w_start, 'end': w_end - 1, 'size': bucket_seconds}
+            chunks.append(np.fromiter(Database._run(conn, Database._aggregate_query(sources), params=params), dtype=Database.BAR_DTYPE))
+        return chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
 
 
     @staticmethod
-    def fetch_single_live_daily(ticker, date):
+    def fetch_bars_frame(ticker, start, end, bucket_seconds, table=None):
         """
-        Fetches the last daily date and price for a single ticker.
-        See Database.fetch_single_live_intraday
+        Retrieve bars of an arbitrary size for a single ticker as a DataFrame indexed by Sydney time.
+        See Database.fetch_bars
         """
 
-        data = Database._fetch_live_intraday_or_daily(ticker, Database.TAB_DAILY, date, Database.COL_DATE, Database.COL_CLOSE)
-        return data[0] if data else (None, None)
-
+        return Database._array_to_frame(Database.fetch_bars(ticker, start, end, bucket_seconds, table=table))
 
-    # Internal
 
     @staticmethod
-    def _execute(query, values=None, path=_PATH_DB, fetch=True):
+    def fetch_single_date_range(ticker, table, start=None, end=None):
         """
-        Execute an SQLite query
+        Retrieve the first and last dates of intraday or daily data for a single ticker
 
         Parameters
         ----------
-        query : str
-            Query to execute
-        values : list, optional
-            List of tuples with values to insert, by default None
-        path : str, optional
-            Path to the database, by default _PATH_DB
-        fetch : bool, optional
-            Whether executing a fetch or modification (changes whether fetch data or number of rows modified is returned), by default True
+        ticker : str
+            Ticker to fetch
+        table : str
+            Database.TAB_INTRADAY : intraday data
+            Database.TAB_DAILY : daily data
+        start : int, optional
+            Timestamp of start date to search from, by default None (i.e. no lower bound)
+        end : int, optional
+            Timestamp of end date to search to, by default None (i.e. no upper bound)
 
         Returns
         -------
-        list or int
-            List of values fetched (if fetch=True), else number of rows modified
+        tuple
+            (first date, last date), or (None, None) if no data exists
+        """
+
+        first, last = None, None
+        params = (Database._ticker_id(ticker), Date.MIN if start is None else start, Date.MAX if end is None else end)
+        for source in Database._sources(table, start, end):
+            query = f"""
+            SELECT MIN({Database.COL_DATE}), MAX({Database.COL_DATE}) FROM {source}
+            WHERE {Database.COL_TICKER_ID} = ? AND {Database.COL_DATE} BETWEEN ? AND ?
+            """
+            s_first, s_last = Database._execute(query, params=params)[0]
+            if s_first is not None:
+                first = s_first if first is None else min(first, s_first)
+                last = s_last if last is None else max(last, s_last)
+        if table == Database.TAB_INTRADAY:
+            for s_first, s_last in Database._block_date_ranges(*params):
+                first = s_first if first is None else min(first, s_first)
+                last = s_last if last is None else max(last, s_last)
+        return first, last
+
+
+    # Column store
+
+    @staticmethod
+    def sync_column_store(table, tickers=None, rebuild=False):
         """
+        Brings the memory-mapped column files of a table up to date with the database.
+        Newer rows are appended, and a ticker's files are rewritten if older rows were added or removed since they were written
+
+        Parameters
+        ----------
+        table : str
+            Database.TAB_INTRADAY : intraday data
+            Database.TAB_DAILY : daily data
+        tickers : list, optional
+            Tickers to sync, by default None (i.e. all listings)
+        rebuild : bool, optional
+            Whether or not to rewrite every ticker's files from scratch, by default False
 
-        conn = sqlite3.connect(path)
-        cursor = conn.cursor()
-        if not values: cursor.execute(query)
-        else: cursor.executemany(query, values)
-        response = cursor.fetchall() if fetch else cursor.rowcount
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return response
+        Returns
+        -------
+        int
+            Number of rows written
+        """
 
+        path = Database._PATH_DB
+        if tickers is None:
+            tickers = list(Database._ticker_id_map())
+            if rebuild:
+                ColumnStore.clear(path, table)
+        count = 0
+        for ticker in tickers:
+            key = Database._ticker_id(ticker)
+            rows, _, last = ColumnStore.extent(path, table, key)
+            if rebuild or (rows and Database._count_single(ticker, table, last) != rows):
+                data = Database._fetch_single_intraday_or_daily_array(ticker, table)
+                ColumnStore.replace(path, table, key, data)
+            else:
+                start = Date.MIN if last is None else last + 1
+                data = Database._fetch_single_intraday_or_daily_array(ticker, table, start=start, end=Date.MAX)
+                ColumnStore.append(path, table, key, data)
+            count += len(data)
+        ColumnStore.flush()
+        return count
+
+
+    # Blocks
 
     @staticmethod
-    def _insert_intraday_or_daily(df, table):
-        data = []
-        for i in range(len(df)):
-            row = df.iloc[i]
-            data.append((row[Database.COL_TICKER], int(row[Database.COL_DATE]), int(row[Database.COL_OPEN]), int(row[Database.COL_CLOSE]), int(row[Database.COL_LOW]), int(row[Database.COL_HIGH]), int(row[Database.COL_VOL])))
-        query = f"""
-        INSERT OR IGNORE INTO {table}
-        ({Database.COL_TICKER}, {Database.COL_DATE}, {Database.COL_OPEN}, {Database.COL_CLOSE}, {Database.COL_LOW}, {Database.COL_HIGH}, {Database.COL_VOL})
-        VALUES
-        (?,?,?,?,?,?,?)
+    def compact_intraday(before=None, tickers=None):
+        """
+        Moves the intraday rows of completed days into compressed per-ticker-day blocks, which the read APIs decode transparently.
+        Pending rollups are refreshed first. Rows inserted later for compacted days are ignored, like rows that are already stored
+
+        Parameters
+        ----------
+        before : int, optional
+            Timestamp to compact the days before (rounded down to the start of its day), by default None (i.e. today)
+        tickers : list, optional
+            Tickers to compact, by default None (i.e. all listings)
+
+        Returns
+        -------
+        int
+            Number of rows compacted
         """
-        return Database._execute(query, values=data, fetch=False)
 
+        before = Database._bucket(Date.timestamp_now() if before is None else before, Date.DAY)
+        Database.refresh_rollups(tickers)
+        ids = list(Database._ticker_id_map().values()) if tickers is None else [Database._ticker_id(t) for t in tickers]
+        names = ', '.join(Database.BAR_DTYPE.names)
+        query = f"""
+        INSERT OR REPLACE INTO {Database._TAB_BLOCK} ({Database.COL_TICKER_ID}, day, first, last, rows, data)
+        VALUES (?,?,?,?,?,?)
+        """
+        count = 0
+        for w_start, w_end, sources in Database._windows(Database.TAB_INTRADAY, Date.MIN, before - 1, Date.DAY, write=True):
+            for ticker_id in ids:
+                with Connection.transaction(Database._PATH_DB) as conn:
+                    data = Database._fetch_raw(conn, ticker_id, sources, w_start, w_end - 1)
+                    if len(data) == 0:
+                        continue
+                    days = Database._bucket(data[Database.COL_DATE], Date.DAY)
+                    blocks = []
+                    for part in np.split(data, np.flatnonzero(np.diff(days)) + 1):
+                        day = Database._bucket(int(part[Database.COL_DATE][0]), Date.DAY)
+                        existing = Database._fetch_blocks(ticker_id, day, day + Date.DAY - 1)
+                        if len(existing):
+                            part = Database._merge_dates([existing, part])
+                        first, last = int(part[Database.COL_DATE][0]), int(part[Database.COL_DATE][-1])
+                        blocks.append((ticker_id, day, first, last, len(part), Block.encode(part)))
+                    Database._run(conn, query, blocks)
+                    for source in sources:
+                        Database._run(
+                            conn, f'DELETE FROM {source} WHERE {Database.COL_TICKER_ID} = ? AND {Database.COL_DATE} BETWEEN ? AND ?',
+                            params=(ticker_id, w_start, w_end - 1))
+                    count += len(data)
+        PriceIndex.invalidate(Database._PATH_DB, Database.TAB_INTRADAY)
+        return count
+
+
+    # Maintenance
 
     @staticmethod
-    def _fetch_all_intraday_or_daily(table, *cols):
-        sel_cols = Database._set_cols(cols)
+    def apply_retention(before):
+        """
+        Removes intraday rows (including compacted blocks) before a date, keeping the rollups built from them.
+        Pending rollups are refreshed first, partitions ending before the date are deleted whole, and intraday rows inserted later before the date are ignored
+
+        Parameters
+        ----------
+        before : int
+            Timestamp to remove the intraday rows before (rounded down to the start of its day)
+
+        Returns
+        -------
+        tuple
+            (number of rows removed from tables, names of partitions deleted)
+        """
+
+        path = Database._PATH_DB
+        before = Database._bucket(before, Date.DAY)
+        Database.refresh_rollups()
         query = f"""
-        SELECT {sel_cols} FROM {table}
-        ORDER BY {Database.COL_TICKER}, {Database.COL_DATE}
+        INSERT INTO {Database._TAB_RETENTION} (name, before) VALUES (?,?)
+        ON CONFLICT (name) DO UPDATE SET before = MAX(before, excluded.before)
         """
-        return Database._execute(query)
+        Database._execute(query, params=(Database.TAB_INTRADAY, before), fetch=False)
+
+        # Whole partitions, then rows one ticker at a time so other writers are only briefly blocked
+        count = 0
+        names, _ = Partition.drop(path, before)
+        ids = list(Database._ticker_id_map().values())
+        for _, _, sources in Database._windows(Database.TAB_INTRADAY, Date.MIN, before - 1, Date.DAY, write=True):
+            for ticker_id in ids:
+                with Connection.transaction(path) as conn:
+                    for source in sources:
+                        count += Database._run(conn, f'DELETE FROM {source} WHERE {Database.COL_TICKER_ID} = ? AND {Database.COL_DATE} < ?', params=(ticker_id, before)).rowcount
+                    count += Database._run(conn, f'SELECT COALESCE(SUM(rows), 0) FROM {Database._TAB_BLOCK} WHERE {Database.COL_TICKER_ID} = ? AND day < ?', params=(ticker_id, before)).fetchone()[0]
+                    Database._run(conn, f'DELETE FROM {Database._TAB_BLOCK} WHERE {Database.COL_TICKER_ID} = ? AND day < ?', params=(ticker_id, before))
+        if names or count:
+            PriceIndex.invalidate(path, Database.TAB_INTRADAY)
+            if ColumnStore.ENABLED:
+                Connection.on_commit(path, lambda: Database.sync_column_store(Database.TAB_INTRADAY))
+        return count, names
 
 
     @staticmethod
-    def _fetch_single_intraday_or_daily(ticker, table, *cols, start=None, end=None):
-        sel_cols = Database._set_cols(cols)
-        query = [
-            f"SELECT {sel_cols} FROM {table} WHERE {Database.COL_TICKER} = '{ticker}'",
-            '',
-            f'ORDER BY {Database.COL_DATE}']
-        if start is not None and end is not None:
-            query[1] = f'AND {Database.COL_DATE} BETWEEN {start} AND {end}'
-        query = ' '.join(query)
-        return Database._execute(query)
+    def vacuum(seconds=None):
+        """
+        Returns the free pages of the main database and active partitions to the file system with incremental vacuum.
+        Pages are freed in slices of Database._VACUUM_PAGES, each its own write, so other writers are only briefly blocked.
+        Files not yet in incremental auto-vacuum mode are first converted by a one-off full VACUUM
+
+        Parameters
+        ----------
+        seconds : float, optional
+            Time to stop starting new slices after, by default None (i.e. until no free pages remain)
+
+        Returns
+        -------
+        tuple
+            (bytes reclaimed, bytes still free)
+        """
 
+        path = Database._PATH_DB
+        deadline = None if seconds is None else monotonic() + seconds
+        reclaimed, remaining = 0, 0
+        for schema in ['main'] + [p[0] for p in Partition.overlapping(path)]:
+            with Connection.writer(path) as conn:
+                if schema != 'main':
+                    Partition.attach(conn, [schema], path)
+                pragma = lambda name: Database._run(conn, f'PRAGMA {schema}.{name}').fetchone()[0]
+                page_size, pages = pragma('page_size'), pragma('page_count')
+                if pragma('auto_vacuum') != 2:
+                    Database._run(conn, f'PRAGMA {schema}.auto_vacuum = INCREMENTAL')
+                    Database._run(conn, f'VACUUM {schema}')
+            while deadline is None or monotonic() < deadline:
+                with Connection.writer(path) as conn:
+                    if not pragma('freelist_count'):
+                        break
+                    Database._run(conn, f'PRAGMA {schema}.incremental_vacuum({Database._VACUUM_PAGES})').fetchall()
+            with Connection.writer(path) as conn:
+                Database._run(conn, f'PRAGMA {schema}.wal_checkpoint(TRUNCATE)').fetchall()
+                reclaimed += (pages - pragma('page_count')) * page_size
+                remaining += pragma('freelist_count') * page_size
+        return reclaimed, remaining
+
+
+    # Scrape jobs
 
     @staticmethod
-    def _fetch_live_intraday_or_daily(ticker, table, date, *cols):
+    def fetch_scrape_schedule(interval, date_col, now, volume_since):
         """
-        Retrieve the most recent intraday or daily entry for a single ticker
+        Returns the listings to scrape in priority order: watchlisted tickers first, then by volume traded since a date.
+        Tickers backed off by Database.update_scrape_backoff are left out unless they are watchlisted
 
         Parameters
         ----------
-        ticker : str
-            Ticker to fetch
-        table : str
-            Database.COL_INTRADAY : intraday data
-            Database.COL_DAILY : daily data
-        date : int
-            Timestamp of the live date
-        """
+        interval : str
+            Interval of the data to scrape (e.g. '1m')
+        date_col : str
+            Database.COL_LAST_INTRADAY or Database.COL_LAST_DAILY
+        now : int
+            Current timestamp
+        volume_since : int
+            Timestamp of the first daily entry counted towards volume
 
-        sel_cols = Database._set_cols(cols)
+        Returns
+        -------
+        list
+            (ticker, last save date) of each listing to scrape
+        """
 
         query = f"""
-        SELECT {sel_cols} FROM {table}
-        WHERE {Database.COL_TICKER} = '{ticker}' AND {Database.COL_DATE} <= {date}
-        ORDER BY {Database.COL_DATE} DESC LIMIT 1
+        SELECT l.{Database.COL_TICKER}, l.{date_col} FROM {Database.TAB_LISTING} l
+        LEFT JOIN (SELECT DISTINCT {Database.COL_TICKER_ID} FROM {Database._TAB_WATCHLIST}) w ON w.{Database.COL_TICKER_ID} = l.{Database.COL_ID}
+        WHERE w.{Database.COL_TICKER_ID} IS NOT NULL OR NOT EXISTS (
+            SELECT 1 FROM {Database._TAB_SCRAPE_BACKOFF} b
+            WHERE b.{Database.COL_TICKER_ID} = l.{Database.COL_ID} AND b.interval = ? AND b.until > ?)
+        ORDER BY
+            w.{Database.COL_TICKER_ID} IS NULL,
+            (SELECT COALESCE(SUM(d.{Database.COL_VOL}), 0) FROM {Database.TAB_DAILY} d
+            WHERE d.{Database.COL_TICKER_ID} = l.{Database.COL_ID} AND d.{Database.COL_DATE} >= ?) DESC,
+            l.{Database.COL_TICKER}
         """
+        return Database._execute(query, params=(interval, now, volume_since))
 
-        return Database._execute(query)
+
+    @staticmethod
+    def update_scrape_backoff(interval, now, backoff, max_backoff, min_window):
+        """
+        Backs off tickers whose finished scrape jobs of an interval all returned nothing (e.g. delisted tickers), doubling the back off each time it happens in a row,
+        and forgets the back off of tickers that returned data. Called before the jobs are replaced by a new plan, so each plan is only counted once.
+        Tickers whose windows were all shorter than min_window are left alone, since short windows can hold no trading days
+
+        Parameters
+        ----------
+        interval : str
+            Interval of the data to scrape (e.g. '1m')
+        now : int
+            Current timestamp
+        backoff : int
+            Seconds a ticker is left out the first time
+        max_backoff : int
+            Most seconds a ticker is left out
+        min_window : int
+            Seconds the longest window of a ticker must span for it to be backed off
+
+        Returns
+        -------
+        int
+            Number of tickers backed off
+        """
+
+        table = Database._TAB_SCRAPE_BACKOFF
+        jobs = Database._TAB_SCRAPE_JOB
+        with Connection.transaction(Database._PATH_DB):
+            Database._execute(f"""
+            DELETE FROM {table} WHERE interval = ? AND {Database.COL_TICKER_ID} IN (
+                SELECT {Database.COL_TICKER_ID} FROM {jobs} WHERE interval = ? AND state = ? AND rows > 0)
+            """, params=(interval, interval, Database.JOB_DONE), fetch=False)
+            return Database._execute(f"""
+            INSERT INTO {table} ({Database.COL_TICKER_ID}, interval, misses, until)
+            SELECT {Database.COL_TICKER_ID}, interval, 1, ? + MIN(?, ?) FROM {jobs}
+            WHERE interval = ? AND state = ?
+            GROUP BY {Database.COL_TICKER_ID} HAVING MAX(rows) = 0 AND MAX("end" - start) >= ?
+            ON CONFLICT ({Database.COL_TICKER_ID}, interval) DO UPDATE SET
+                misses = misses + 1,
+                until = ? + MIN(?, ? * (1 << MIN(misses, 32)))
+            """, params=(now, backoff, max_backoff, interval, Database.JOB_DONE, min_window, now, max_backoff, backoff), fetch=False)
+
+
+    @staticmethod
+    def plan_scrape_jobs(interval, jobs):
+        """
+        Replaces the scrape jobs of an interval with a new plan
+
+        Parameters
+        ----------
+        interval : str
+            Interval of the data to scrape (e.g. '1m')
+        jobs : list
+            (ticker, start, end, request interval) of each window to scrape, in the order they should be claimed
+
+        Returns
+        -------
+        int
+            Number of jobs planned
+        """
+
+        created = Date.timestamp_now()
+        query = f"""
+        INSERT INTO {Database._TAB_SCRAPE_JOB}
+        ({Database.COL_TICKER_ID}, interval, start, end, request_interval, created)
+        VALUES
+        (?,?,?,?,?,?)
+        """
+        values = [(Database._ticker_id(t), interval, int(start), int(end), request_interval, created) for t, start, end, request_interval in jobs]
+        with Connection.transaction(Database._PATH_DB):
+            Database._execute(f'DELETE FROM {Database._TAB_SCRAPE_JOB} WHERE interval = ?', params=(interval,), fetch=False)
+            return Database._execute(query, values=values, fetch=False) if jobs else 0
+
+
+    @staticmethod
+    def resume_scrape_jobs(interval, attempts, created_after):
+        """
+        Prepares the remaining scrape jobs of an interval to be claimed again after a download stopped.
+        Jobs claimed or scraped but never saved are made pending again, as are failed jobs with attempts left. Plans created too long ago are left to be replaced.
+        A ticker's windows are only claimed after the ones before them (see Database.claim_scrape_job), so once a window is given up on, so are the windows after it
+
+        Parameters
+        ----------
+        interval : str
+            Interval of the data to scrape (e.g. '1m')
+        attempts : int
+            Times a job can be claimed before it is given up on
+        created_after : int
+            Timestamp plans must have been created after to be resumed
+
+        Returns
+        -------
+        int
+            Number of jobs left to claim
+        """
+
+        table = Database._TAB_SCRAPE_JOB
+        with Connection.transaction(Database._PATH_DB):
+            Database._execute(f"""
+            UPDATE {table} SET state = ?
+            WHERE interval = ? AND created > ? AND (state IN (?,?) OR (state = ? AND attempts < ?))
+            """, params=(Database.JOB_PENDING, interval, created_after, Database.JOB_RUNNING, Database.JOB_SCRAPED, Database.JOB_FAILED, attempts), fetch=False)
+            blocked = f"""
+            EXISTS (
+                SELECT 1 FROM {table} k
+                WHERE k.{Database.COL_TICKER_ID} = {table}.{Database.COL_TICKER_ID} AND k.interval = {table}.interval AND k.start < {table}.start AND k.state = ?)
+            """
+            Database._execute(f"""
+            UPDATE {table} SET state = ?, attempts = MAX(attempts, ?)
+            WHERE interval = ? AND created > ? AND state = ? AND {blocked}
+            """, params=(Database.JOB_FAILED, attempts, interval, created_after, Database.JOB_PENDING, Database.JOB_FAILED), fetch=False)
+            query = f'SELECT COUNT(*) FROM {table} WHERE interval = ? AND created > ? AND state = ? AND NOT {blocked}'
+            return Database._execute(query, params=(interval, created_after, Database.JOB_PENDING, Database.JOB_FAILED))[0][0]
+
+
+    @staticmethod
+    def claim_scrape_job(interval):
+        """
+        Atomically claims the next pending scrape job of an interval, so each job is scraped by one worker.
+        A ticker's jobs are claimed in date order, each only once the one before has been scraped, so save dates only move forward
+
+        Parameters
+        ----------
+        interval : str
+            Interval of the data to scrape (e.g. '1m')
+
+        Returns
+        -------
+        tuple or None
+            (job id, ticker, start, end, request interval) of the claimed job, None if no job can be claimed yet
+        """
+
+        table = Database._TAB_SCRAPE_JOB
+        query = f"""
+        UPDATE {table} SET state = ?, attempts = attempts + 1
+        WHERE id = (
+            SELECT j.id FROM {table} j
+            WHERE j.interval = ? AND j.state = ? AND NOT EXISTS (
+                SELECT 1 FROM {table} k
+                WHERE k.{Database.COL_TICKER_ID} = j.{Database.COL_TICKER_ID} AND k.interval = j.interval AND k.start < j.start AND k.state NOT IN (?,?))
+            ORDER BY j.id LIMIT 1)
+        RETURNING id, {Database.COL_TICKER_ID}, start, end, COALESCE(request_interval, interval)
+        """
+        with Connection.transaction(Database._PATH_DB) as conn:
+            row = Database._run(conn, query, params=(Database.JOB_RUNNING, interval, Database.JOB_PENDING, Database.JOB_SCRAPED, Database.JOB_DONE)).fetchone()
+            if row is None:
+                return None
+            ticker = Database._run(conn, f'SELECT {Database.COL_TICKER} FROM {Database.TAB_LISTING} WHERE {Database.COL_ID} = ?', params=(row[1],)).fetchone()[0]
+        return row[0], ticker, row[2], row[3], row[4]
+
+
+    @staticmethod
+    def update_scrape_job(job_id, state, rows=None):
+        """
+        Changes the state of a scrape job
+
+        Parameters
+        ----------
+        job_id : int
+            Id of the job
+        state : str
+            Database.JOB_SCRAPED, Database.JOB_DONE or Database.JOB_FAILED
+        rows : int, optional
+            Number of rows the job's window returned, by default None (i.e. unchanged)
+
+        Returns
+        -------
+        int
+            Number of jobs modified
+        """
+
+        query = f'UPDATE {Database._TAB_SCRAPE_JOB} SET state = ?, rows = COALESCE(?, rows) WHERE id = ?'
+        return Database._execute(query, params=(state, rows, job_id), fetch=False)
+
+
+    @staticmethod
+    def fetch_scrape_progress(interval):
+        """
+        Returns the number of scrape jobs of an interval in each state
+
+        Parameters
+        ----------
+        interval : str
+            Interval of the data to scrape (e.g. '1m')
+
+        Returns
+        -------
+        dict
+            key : str
+                State (e.g. Database.JOB_DONE)
+            value : int
+                Number of jobs
+        """
+
+        query = f'SELECT state, COUNT(*) FROM {Database._TAB_SCRAPE_JOB} WHERE interval = ? GROUP BY state'
+        progress = dict.fromkeys([Database.JOB_PENDING, Database.JOB_RUNNING, Database.JOB_SCRAPED, Database.JOB_DONE, Database.JOB_FAILED], 0)
+        progress.update(Database._execute(query, params=(interval,)))
+        return progress
+
+
+    # Watchlist
+
+    @staticmethod
+    def add_watchlist(ticker, source=None):
+        """
+        Adds a ticker to the watchlist, so it is scraped before other tickers
+
+        Parameters
+        ----------
+        ticker : str
+            Listing ticker
+        source : str, optional
+            Database.WATCH_USER or Database.WATCH_SIMULATOR, by default None (i.e. Database.WATCH_USER)
+
+        Returns
+        -------
+        int
+            Number of tickers added
+        """
+
+        ticker_id = Database._ticker_id(ticker)
+        if ticker_id is None:
+            return 0
+        query = f'INSERT OR IGNORE INTO {Database._TAB_WATCHLIST} ({Database.COL_TICKER_ID}, source, added) VALUES (?,?,?)'
+        return Database._execute(query, params=(ticker_id, source or Database.WATCH_USER, Date.timestamp_now()), fetch=False)
+
+
+    @staticmethod
+    def remove_watchlist(ticker, source=None):
+        """
+        Removes a ticker from the watchlist
+
+        Parameters
+        ----------
+        ticker : str
+            Listing ticker
+        source : str, optional
+            Database.WATCH_USER or Database.WATCH_SIMULATOR, by default None (i.e. Database.WATCH_USER)
+
+        Returns
+        -------
+        int
+            Number of tickers removed
+        """
+
+        query = f'DELETE FROM {Database._TAB_WATCHLIST} WHERE {Database.COL_TICKER_ID} = ? AND source = ?'
+        return Database._execute(query, params=(Database._ticker_id(ticker), source or Database.WATCH_USER), fetch=False)
+
+
+    @staticmethod
+    def replace_watchlist(tickers, source):
+        """
+        Replaces every ticker a source has on the watchlist
+
+        Parameters
+        ----------
+        tickers : list
+            Listing tickers
+        source : str
+            Database.WATCH_USER or Database.WATCH_SIMULATOR
+        """
+
+        with Connection.transaction(Database._PATH_DB):
+            Database._execute(f'DELETE FROM {Database._TAB_WATCHLIST} WHERE source = ?', params=(source,), fetch=False)
+            for ticker in tickers:
+                Database.add_watchlist(ticker, source)
+
+
+    @staticmethod
+    def fetch_watchlist(source=None):
+        """
+        Returns the tickers on the watchlist
+
+        Parameters
+        ----------
+        source : str, optional
+            Database.WATCH_USER or Database.WATCH_SIMULATOR, by default None (i.e. all sources)
+
+        Returns
+        -------
+        list
+            Sorted tickers
+        """
+
+        query = f"""
+        SELECT DISTINCT l.{Database.COL_TICKER} FROM {Database._TAB_WATCHLIST} w
+        JOIN {Database.TAB_LISTING} l ON l.{Database.COL_ID} = w.{Database.COL_TICKER_ID}
+        WHERE ? IS NULL OR w.source = ?
+        ORDER BY l.{Database.COL_TICKER}
+        """
+        return [t for t, in Database._execute(query, params=(source, source))]
+
+
+    # Live
+
+    @staticmethod
+    def fetch_multiple_live_prices(date, *tickers):
+        """
+        Fetches multiple live prices
+
+        Parameters
+        ----------
+        date : int
+            Live timestamp
+
+        Returns
+        -------
+        dict
+            key : str
+                Ticker name
+            value : int or None
+                Live price if exists, else None
+        """
+
+        prices = {ticker: None for ticker in tickers}
+        if PriceIndex.ENABLED:
+            for ticker in prices:
+                intraday = Database._live_index(ticker, Database.TAB_INTRADAY, date)
+                daily = Database._live_index(ticker, Database.TAB_DAILY, date)
+                prices[ticker] = Database._live_price(date, *intraday, *daily)
+            return prices
+        unique = list(prices)
+        for i in range(0, len(unique), Database._LIVE_CHUNK):
+            for ticker, *live in Database._fetch_multiple_live_intraday_and_daily(date, unique[i:i+Database._LIVE_CHUNK]):
+                prices[ticker] = Database._live_price(date, *live)
+        return prices
+
+
+    @staticmethod
+    def fetch_single_live_price(ticker, date):
+        """
+        Fetches a live price for a single ticker
+
+        Parameters
+        ----------
+        ticker : str
+            Ticker name
+        date : int
+            Live timestamp
+
+        Returns
+        -------
+        int or None
+            int if a live price is found, else None
+        """
+
+        return Database.fetch_multiple_live_prices(date, ticker)[ticker]
+
+
+    @staticmethod
+    def fetch_single_live_intraday(ticker, date):
+        """
+        Fetches the last intraday date and price for a single ticker
+
+        Parameters
+        ----------
+        ticker : str
+            Ticker name
+        date : int
+            Live timestamp
+
+        Returns
+        -------
+        tuple
+            (date, price) if a record exists, else (None, None)
+        """
+
+        if PriceIndex.ENABLED:
+            return Database._live_index(ticker, Database.TAB_INTRADAY, date)
+        data = Database._fetch_live_intraday_or_daily(ticker, Database.TAB_INTRADAY, date, Database.COL_DATE, Database.COL_CLOSE)
+        return data[0] if data else (None, None)
+
+
+    @staticmethod
+    def fetch_single_live_daily(ticker, date):
+        """
+        Fetches the last daily date and price for a single ticker.
+        See Database.fetch_single_live_intraday
+        """
+
+        if PriceIndex.ENABLED:
+            return Database._live_index(ticker, Database.TAB_DAILY, date)
+        data = Database._fetch_live_intraday_or_daily(ticker, Database.TAB_DAILY, date, Database.COL_DATE, Database.COL_CLOSE)
+        return data[0] if data else (None, None)
+
+
+    # Internal
+
+    @staticmethod
+    def _execute(query, values=None, params=None, path=None, fetch=True):
+        """
+        Execute an SQLite query on the current thread's long-lived connection (or the writer connection for modifications).
+        Queries failing because another process holds the database are retried with exponential backoff, and each attempt is timed when Instrument.ENABLED
+
+        Parameters
+        ----------
+        query : str
+            Query to execute
+        values : list, optional
+            List of tuples with values to insert, by default None
+        params : tuple, optional
+            Values bound to the placeholders of a single query, by default None
+        path : str, optional
+            Path to the database, by default None (i.e. Database._PATH_DB)
+        fetch : bool, optional
+            Whether executing a fetch or modification (changes whether fetch data or number of rows modified is returned), by default True
+
+        Returns
+        -------
+        list or int
+            List of values fetched (if fetch=True), else number of rows modified
+        """
+
+        if path is None:
+            path = Database._PATH_DB
+        if values is not None and not isinstance(values, list):
+            values = list(values) # Iterators cannot be replayed by a retry
+        for attempt in range(Database._BUSY_ATTEMPTS):
+            try:
+                if fetch:
+                    return Database._run(Connection.get(path), query, values, params, path).fetchall()
+                with Connection.transaction(path) as conn:
+                    return Database._run(conn, query, values, params, path).rowcount
+            except sqlite3.OperationalError as e:
+                busy = 'locked' in str(e) or 'busy' in str(e)
+                if not busy or attempt == Database._BUSY_ATTEMPTS - 1 or Connection.depth(path):
+                    raise
+                sleep(Database._BUSY_BACKOFF * 2 ** attempt)
+
+
+    @staticmethod
+    def _cursor(query, params=None, path=None):
+        """
+        Execute an SQLite fetch query and return the cursor, so rows can be consumed without building a list
+
+        Parameters
+        ----------
+        See Database._execute
+
+        Returns
+        -------
+        iterable
+            Cursor over the fetched rows (wrapped to time it when Instrument.ENABLED)
+        """
+
+        if path is None:
+            path = Database._PATH_DB
+        return Database._run(Connection.get(path), query, params=params, path=path)
+
+
+    @staticmethod
+    def _run(conn, query, values=None, params=None, path=None):
+        """
+        Executes a query on a connection, timing it when Instrument.ENABLED.
+        Every Database query runs through here, so each is counted in the summary, and logged with its query plan if slow
+
+        Parameters
+        ----------
+        conn : sqlite3.Connection
+            Connection to execute on
+        query : str
+            Query to execute
+        values : iterable, optional
+            Rows of values bound to the query in turn (i.e. executemany), by default None
+        params : tuple or dict, optional
+            Values bound to the placeholders of a single query, by default None
+        path : str, optional
+            Path to the database, by default None (i.e. Database._PATH_DB)
+
+        Returns
+        -------
+        sqlite3.Cursor or TimedCursor
+            Cursor of the executed query
+        """
+
+        start = perf_counter() if Instrument.ENABLED else None
+        if values is not None:
+            values = values if isinstance(values, list) or not Instrument.ENABLED else list(values) # To record the first row
+            cursor = conn.executemany(query, values)
+        else:
+            cursor = conn.execute(query, params or ())
+        if start is None:
+            return cursor
+        first = values[0] if values is not None and len(values) else params
+        return Instrument.wrap(Database._PATH_DB if path is None else path, query, cursor, start, first)
+
+
+    @staticmethod
+    def _insert_intraday_or_daily(df, table):
+        int_cols = [Database.COL_DATE, Database.COL_OPEN, Database.COL_CLOSE, Database.COL_LOW, Database.COL_HIGH, Database.COL_VOL]
+        columns = [Database._ticker_id_column(df)] + [Database._column(df, col, np.int64) for col in int_cols]
+        query = f"""
+        INSERT OR IGNORE INTO {table}
+        ({Database.COL_TICKER_ID}, {Database.COL_DATE}, {Database.COL_OPEN}, {Database.COL_CLOSE}, {Database.COL_LOW}, {Database.COL_HIGH}, {Database.COL_VOL})
+        VALUES
+        (?,?,?,?,?,?,?)
+        """
+        if table == Database.TAB_INTRADAY:
+            columns = Database._drop_retired(columns)
+            Database._mark_rollups(columns[0], columns[1])
+        if table != Database.TAB_INTRADAY or Partition.MONTHS is None or len(columns[1]) == 0:
+            count = Database._insert_columns(query, columns)
+        else:
+            count = Database._insert_intraday_partitions(query, columns, table)
+        if count: # Only once committed, as readers would reload the old prices and the column files cannot be rolled back
+            tickers = np.unique(Database._column(df, Database.COL_TICKER)).tolist()
+            Connection.on_commit(Database._PATH_DB, lambda: PriceIndex.invalidate(Database._PATH_DB, table, tickers))
+            if ColumnStore.ENABLED:
+                Connection.on_commit(Database._PATH_DB, lambda: Database.sync_column_store(table, tickers=tickers))
+        return count
+
+
+    @staticmethod
+    def _partitions(start, end):
+        """
+        Returns the names of the intraday partitions covering two dates, creating any that are missing
+
+        Parameters
+        ----------
+        start : int
+            Timestamp of the first date, or None for no dates
+        end : int
+            Timestamp of the last date
+
+        Returns
+        -------
+        list
+            Names of the partitions, ordered by date (empty if intraday data is not partitioned)
+        """
+
+        if start is None or Partition.MONTHS is None:
+            return []
+        return [p[0] for p in Partition.ensure(Database._PATH_DB, start, end)]
+
+
+    @staticmethod
+    def _fits_transaction(start, end):
+        """
+        Returns whether the intraday partitions covering two dates can all be attached for one Database.transaction
+        """
+
+        return len(Database._partitions(start, end)) <= Partition._MAX_ATTACHED
+
+
+    @staticmethod
+    def _insert_intraday_partitions(query, columns, table):
+        """
+        Inserts intraday rows into the partitions covering their dates, creating partitions as required.
+        See Database._insert_columns
+        """
+
+        columns = Database._drop_unpartitioned(columns)
+        dates = columns[1]
+        if len(dates) == 0:
+            return 0
+        partitions = [(name, (dates >= start) & (dates < end)) for name, start, end in Partition.ensure(Database._PATH_DB, int(dates.min()), int(dates.max()))]
+        covered = sum(int(mask.sum()) for _, mask in partitions)
+        if covered != len(dates):
+            raise ValueError(f'{len(dates) - covered} intraday rows are not covered by exactly one partition')
+        count = 0
+        for name, mask in partitions:
+            if mask.any():
+                with Connection.writer(Database._PATH_DB) as conn:
+                    Partition.attach(conn, [name], Database._PATH_DB)
+                p_query = query.replace(f'INTO {table}', f'INTO {name}.{table}')
+                count += Database._insert_columns(p_query, [col[mask] for col in columns])
+        return count
+
+
+    @staticmethod
+    def _drop_unpartitioned(columns):
+        """
+        Removes intraday rows already saved in the main table (i.e. before intraday data was partitioned),
+        as INSERT OR IGNORE would if they were inserted there, so no date is saved in both the main table and a partition
+
+        Parameters
+        ----------
+        columns : list
+            numpy.ndarray for each column, starting with the listing id and date
+
+        Returns
+        -------
+        list
+            Columns without the rows already saved
+        """
+
+        ids, dates = columns[0], columns[1]
+        keep = np.ones(len(dates), dtype=bool)
+        query = f'SELECT {Database.COL_DATE} FROM {Database.TAB_INTRADAY} WHERE {Database.COL_TICKER_ID} = ? AND {Database.COL_DATE} BETWEEN ? AND ?'
+        for ticker_id in np.unique(ids).tolist():
+            mask = ids == ticker_id
+            saved = Database._execute(query, params=(ticker_id, int(dates[mask].min()), int(dates[mask].max())))
+            if saved:
+                keep &= ~(mask & np.isin(dates, [date for date, in saved]))
+        return columns if keep.all() else [col[keep] for col in columns]
+
+
+    @staticmethod
+    def _drop_retired(columns):
+        """
+        Removes intraday rows of days that have already been compacted into blocks or removed by the retention policy
+
+        Parameters
+        ----------
+        columns : list
+            numpy.ndarray for each column, starting with the listing id and date
+
+        Returns
+        -------
+        list
+            Columns without the rows of compacted days
+        """
+
+        ids, dates = columns[0], columns[1]
+        if len(dates) == 0:
+            return columns
+        days = Database._bucket(dates, Date.DAY)
+        keep = dates >= Database._retention(Database.TAB_INTRADAY)
+        query = f'SELECT day FROM {Database._TAB_BLOCK} WHERE {Database.COL_TICKER_ID} = ? AND day BETWEEN ? AND ?'
+        for ticker_id in np.unique(ids).tolist():
+            mask = ids == ticker_id
+            compacted = Database._execute(query, params=(ticker_id, int(days[mask].min()), int(days[mask].max())))
+            if compacted:
+                keep &= ~(mask & np.isin(days, [day for day, in compacted]))
+        return columns if keep.all() else [col[keep] for col in columns]
+
+
+    @staticmethod
+    def _retention(table):
+        """
+        Returns the date before which a table's rows have been removed by the retention policy
+
+        Parameters
+        ----------
+        table : str
+            Table name
+
+        Returns
+        -------
+        int
+            Timestamp of the retention watermark, or Date.MIN if no rows have been removed
+        """
+
+        rows = Database._execute(f'SELECT before FROM {Database._TAB_RETENTION} WHERE name = ?', params=(table,))
+        return rows[0][0] if rows else Date.MIN
+
+
+    @staticmethod
+    def _fetch_blocks(ticker_id, start=None, end=None, dtype=None):
+        """
+        Decodes the compacted intraday rows of a single ticker between two dates
+
+        Parameters
+        ----------
+        ticker_id : int
+            Listing id of the ticker
+        start : int, optional
+            Timestamp of start date to fetch from, by default None (i.e. no bounds)
+        end : int, optional
+            Timestamp of end date to fetch from, by default None (i.e. no bounds)
+        dtype : numpy.dtype, optional
+            Structured type whose fields name the columns to fetch, by default None (i.e. Database.BAR_DTYPE)
+
+        Returns
+        -------
+        numpy.ndarray
+            Structured array of dtype, ordered by date
+        """
+
+        dtype = Database.BAR_DTYPE if dtype is None else dtype
+        if start is None or end is None: # Like Database._single_query, dates only apply as a pair
+            start, end = Date.MIN, Date.MAX
+        query = f'SELECT data FROM {Database._TAB_BLOCK} WHERE {Database.COL_TICKER_ID} = ? AND day BETWEEN ? AND ? ORDER BY day'
+        blobs = Database._execute(query, params=(ticker_id, Database._bucket(start, Date.DAY), end))
+        if not blobs:
+            return np.empty(0, dtype=dtype)
+        data = np.concatenate([Block.decode(blob, Database.BAR_DTYPE) for blob, in blobs])
+        data = data[(data[Database.COL_DATE] >= start) & (data[Database.COL_DATE] <= end)]
+        if dtype == Database.BAR_DTYPE:
+            return data
+        out = np.empty(len(data), dtype=dtype)
+        for col in dtype.names:
+            out[col] = data[col]
+        return out
+
+
+    @staticmethod
+    def _has_blocks(ticker_id, start, end):
+        query = f'SELECT 1 FROM {Database._TAB_BLOCK} WHERE {Database.COL_TICKER_ID} = ? AND day BETWEEN ? AND ? AND last >= ? LIMIT 1'
+        return bool(Database._execute(query, params=(ticker_id, Database._bucket(start, Date.DAY), end, start)))
+
+
+    @staticmethod
+    def _block_rows(data, cols, ticker, ticker_id):
+        """
+        Converts decoded block rows into tuples of the requested columns, as fetched from the intraday table
+
+        Parameters
+        ----------
+        data : numpy.ndarray
+            Structured array of Database.BAR_DTYPE
+        cols : tuple
+            Columns to return
+        ticker : str
+            Ticker of the rows
+        ticker_id : int
+            Listing id of the rows
+
+        Returns
+        -------
+        list
+            Tuple of column values for each row
+        """
+
+        constants = {Database.COL_TICKER: ticker, Database.COL_TICKER_ID: ticker_id}
+        columns = [[constants[col]] * len(data) if col in constants else data[col].tolist() for col in cols]
+        return list(zip(*columns))
+
+
+    @staticmethod
+    def _block_date_ranges(ticker_id, start, end):
+        """
+        Yields the first and last compacted dates of a single ticker between two dates.
+        Blocks inside the dates are answered from their stored bounds, and only the blocks straddling either date are decoded
+
+        Parameters
+        ----------
+        ticker_id : int
+            Listing id of the ticker
+        start : int
+            Timestamp of the start date
+        end : int
+            Timestamp of the end date
+
+        Yields
+        ------
+        tuple
+            (first date, last date)
+        """
+
+        params = (ticker_id, Database._bucket(start, Date.DAY), end, start, end)
+        where = f'{Database.COL_TICKER_ID} = ? AND day BETWEEN ? AND ?'
+        first, last = Database._execute(f'SELECT MIN(first), MAX(last) FROM {Database._TAB_BLOCK} WHERE {where} AND first >= ? AND last <= ?', params=params)[0]
+        if first is not None:
+            yield first, last
+        for blob, in Database._execute(f'SELECT data FROM {Database._TAB_BLOCK} WHERE {where} AND (first < ? OR last > ?)', params=params):
+            dates = Block.decode(blob, Database.BAR_DTYPE)[Database.COL_DATE]
+            dates = dates[(dates >= start) & (dates <= end)]
+            if len(dates):
+                yield int(dates[0]), int(dates[-1])
+
+
+    @staticmethod
+    def _fetch_raw(conn, ticker_id, sources, start, end):
+        """
+        Retrieve the uncompacted intraday rows of a single ticker from several tables on a given connection
+
+        Parameters
+        ----------
+        conn : sqlite3.Connection
+            Connection the tables are attached to
+        ticker_id : int
+            Listing id of the ticker
+        sources : list
+            Tables holding the rows
+        start : int
+            Timestamp of the start date
+        end : int
+            Timestamp of the end date
+
+        Returns
+        -------
+        numpy.ndarray
+            Structured array of Database.BAR_DTYPE, ordered by date
+        """
+
+        query = f"""
+        SELECT {', '.join(Database.BAR_DTYPE.names)} FROM {{source}}
+        WHERE {Database.COL_TICKER_ID} = ? AND {Database.COL_DATE} BETWEEN ? AND ? ORDER BY {Database.COL_DATE}
+        """
+        chunks = [np.fromiter(Database._run(conn, query.format(source=source), params=(ticker_id, start, end)), dtype=Database.BAR_DTYPE) for source in sources]
+        return Database._merge_dates(chunks)
+
+
+    @staticmethod
+    def _merge_dates(chunks):
+        """
+        Concatenates structured arrays into one ordered by date. Where chunks share a date, the row from the earliest chunk is kept
+
+        Parameters
+        ----------
+        chunks : list
+            Structured arrays with a Database.COL_DATE field
+
+        Returns
+        -------
+        numpy.ndarray
+            Rows ordered by date
+        """
+
+        data = np.concatenate(chunks)
+        data = data[np.argsort(data[Database.COL_DATE], kind='stable')]
+        dates = data[Database.COL_DATE]
+        if len(dates) > 1 and not (dates[1:] != dates[:-1]).all():
+            data = data[np.concatenate(([True], dates[1:] != dates[:-1]))]
+        return data
+
+
+    @staticmethod
+    def _aggregate_array(data, size):
+        """
+        Aggregates rows into bars of a fixed size, like Database._aggregate_query does inside the database
+
+        Parameters
+        ----------
+        data : numpy.ndarray
+            Structured array of Database.BAR_DTYPE, ordered by date
+        size : int
+            Bar size in seconds
+
+        Returns
+        -------
+        numpy.ndarray
+            Structured array of Database.BAR_DTYPE dated by the start of each bar, ordered by date
+        """
+
+        bars = np.empty(0, dtype=Database.BAR_DTYPE)
+        if len(data) == 0:
+            return bars
+        buckets = Database._bucket(data[Database.COL_DATE], size)
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+        ends = np.append(starts[1:], len(data)) - 1
+        bars = np.empty(len(starts), dtype=Database.BAR_DTYPE)
+        bars[Database.COL_DATE] = buckets[starts]
+        bars[Database.COL_OPEN] = data[Database.COL_OPEN][starts]
+        bars[Database.COL_HIGH] = np.maximum.reduceat(data[Database.COL_HIGH], starts)
+        bars[Database.COL_LOW] = np.minimum.reduceat(data[Database.COL_LOW], starts)
+        bars[Database.COL_CLOSE] = data[Database.COL_CLOSE][ends]
+        bars[Database.COL_VOL] = np.add.reduceat(data[Database.COL_VOL], starts)
+        return bars
+
+
+    @staticmethod
+    def _live_blocks(date, tickers):
+        """
+        Retrieve the most recent compacted intraday entry at or before a live date for multiple tickers
+
+        Parameters
+        ----------
+        date : int
+            Timestamp of the live date
+        tickers : list
+            Tickers to fetch
+
+        Returns
+        -------
+        dict
+            key : str
+                Ticker with a compacted entry
+            value : tuple
+                (date, numpy.void row of Database.BAR_DTYPE)
+        """
+
+        live = {}
+        rows = ','.join(['(?,?)'] * len(tickers))
+        params = [v for ticker in tickers for v in (ticker, Database._ticker_id(ticker))]
+        query = f"""
+        WITH req ({Database.COL_TICKER}, {Database.COL_TICKER_ID}) AS (VALUES {rows})
+        SELECT req.{Database.COL_TICKER}, b.data FROM req
+        JOIN {Database._TAB_BLOCK} AS b ON b.{Database.COL_TICKER_ID} = req.{Database.COL_TICKER_ID} AND b.day = (
+            SELECT MAX(day) FROM {Database._TAB_BLOCK}
+            WHERE {Database.COL_TICKER_ID} = req.{Database.COL_TICKER_ID} AND day <= ? AND first <= ?)
+        """
+        for ticker, blob in Database._execute(query, params=(*params, date, date)):
+            data = Block.decode(blob, Database.BAR_DTYPE)
+            row = data[np.searchsorted(data[Database.COL_DATE], date, side='right') - 1]
+            live[ticker] = (int(row[Database.COL_DATE]), row)
+        return live
+
+
+    @staticmethod
+    def _mark_rollups(ticker_ids, dates):
+        """
+        Widens the pending rollup range of each ticker to cover newly inserted intraday dates
+
+        Parameters
+        ----------
+        ticker_ids : numpy.ndarray
+            Listing id of each inserted row
+        dates : numpy.ndarray
+            Timestamp of each inserted row
+        """
+
+        if len(dates) == 0:
+            return
+        ids, inverse = np.unique(ticker_ids, return_inverse=True)
+        starts = np.full(len(ids), Date.MAX, dtype=np.int64)
+        ends = np.full(len(ids), Date.MIN, dtype=np.int64)
+        np.minimum.at(starts, inverse, dates)
+        np.maximum.at(ends, inverse, dates)
+        query = f"""
+        INSERT INTO {Database._TAB_ROLLUP_PENDING} ({Database.COL_TICKER_ID}, start, end) VALUES (?,?,?)
+        ON CONFLICT ({Database.COL_TICKER_ID}) DO UPDATE SET start = MIN(start, excluded.start), end = MAX(end, excluded.end)
+        """
+        Database._insert_columns(query, [ids, starts, ends])
+
+
+    @staticmethod
+    def _refresh_rollup(ticker_id, start, end):
+        """
+        Recomputes every rollup of a ticker between two dates, widened to whole days, then clears its pending range.
+        Only days with intraday rows are recomputed, so rollups saved without intraday rows (see Database.insert_rollup) are kept
+
+        Parameters
+        ----------
+        ticker_id : int
+            Listing id of the ticker
+        start : int
+            Timestamp of the earliest changed intraday date
+        end : int
+            Timestamp of the latest changed intraday date
+        """
+
+        start = Database._bucket(start, Date.DAY)
+        end = Database._bucket(end, Date.DAY) + Date.DAY - 1
+        retained = max(start, Database._retention(Database.TAB_INTRADAY)) # Rollups of removed days cannot be rebuilt
+        for w_start, w_end, sources in Database._windows(Database.TAB_INTRADAY, retained, end, Date.DAY, write=True):
+            params = {'id': ticker_id, 'start': w_start, 'end': w_end - 1}
+            with Connection.transaction(Database._PATH_DB) as conn:
+                # Compacted days are aggregated after decoding, since blocks cannot be read by SQL
+                blocks = Database._fetch_blocks(ticker_id, w_start, w_end - 1)
+                if len(blocks):
+                    data = Database._merge_dates([blocks, Database._fetch_raw(conn, ticker_id, sources, w_start, w_end - 1)])
+                    days = Database._aggregate_array(data, Date.DAY)
+                else:
+                    days = np.fromiter(Database._run(conn, Database._aggregate_query(sources), params={**params, 'size': Date.DAY}), dtype=Database.BAR_DTYPE)
+                days = [(ticker_id, day, day + Date.DAY - 1) for day in days[Database.COL_DATE].tolist()]
+                for resolution, size in Database.ROLLUPS.items():
+                    rollup = Database._rollup_table(resolution)
+                    Database._run(conn, f'DELETE FROM {rollup} WHERE {Database.COL_TICKER_ID} = ? AND {Database.COL_DATE} BETWEEN ? AND ?', days)
+                    columns = f"{', '.join(Database.BAR_DTYPE.names)}, {Database.COL_TICKER_ID}"
+                    if len(blocks):
+                        bars = Database._aggregate_array(data, size)
+                        rows = zip(*[bars[col].tolist() for col in Database.BAR_DTYPE.names], [ticker_id] * len(bars))
+                        Database._run(conn, f"INSERT INTO {rollup} ({columns}) VALUES ({','.join('?' * (len(Database.BAR_DTYPE) + 1))})", rows)
+                    else:
+                        Database._run(conn, f"""
+                        INSERT INTO {rollup} ({columns})
+                        SELECT *, :id FROM ({Database._aggregate_query(sources)})
+                        """, params={**params, 'size': size})
+        query = f'DELETE FROM {Database._TAB_ROLLUP_PENDING} WHERE {Database.COL_TICKER_ID} = ? AND start >= ? AND end <= ?'
+        Database._execute(query, params=(ticker_id, start, end), fetch=False)
+
+
+    @staticmethod
+    def _aggregate_query(sources):
+        """
+        Returns a query aggregating a ticker's intraday rows into bars of a fixed size, in Database.BAR_DTYPE column order.
+        Binds :id (listing id), :start and :end (inclusive date range) and :size (bar size in seconds)
+
+        Parameters
+        ----------
+        sources : list
+            Tables holding the intraday rows
+
+        Returns
+        -------
+        str
+            Aggregation query, ordered by date
+        """
+
+        rows = ' UNION ALL '.join(
+            f'SELECT {Database.COL_DATE}, {Database.COL_OPEN}, {Database.COL_CLOSE}, {Database.COL_LOW}, {Database.COL_HIGH}, {Database.COL_VOL} FROM {source} '
+            f'WHERE {Database.COL_TICKER_ID} = :id AND {Database.COL_DATE} BETWEEN :start AND :end'
+            for source in sources)
+        bucket = f'{Database.COL_DATE} - (({Database.COL_DATE} - {Database._BAR_EPOCH}) % :size)'
+        return f"""
+        SELECT bucket, {Database.COL_OPEN}, MAX({Database.COL_HIGH}), MIN({Database.COL_LOW}), {Database.COL_CLOSE}, SUM({Database.COL_VOL}) FROM (
+            SELECT {bucket} AS bucket, {Database.COL_LOW}, {Database.COL_HIGH}, {Database.COL_VOL},
+                FIRST_VALUE({Database.COL_OPEN}) OVER w AS {Database.COL_OPEN},
+                LAST_VALUE({Database.COL_CLOSE}) OVER w AS {Database.COL_CLOSE}
+            FROM ({rows})
+            WINDOW w AS (PARTITION BY {bucket} ORDER BY {Database.COL_DATE} ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING))
+        GROUP BY bucket ORDER BY bucket
+        """
+
+
+    @staticmethod
+    def _windows(table, start, end, size, write=False):
+        """
+        Splits a date range into windows that each hold whole bars of a given size.
+        Intraday windows are split where partitions start, and the partitions overlapping each window are attached just before it is yielded
+
+        Parameters
+        ----------
+        table : str
+            Table holding the rows
+        start : int
+            Timestamp of the start date
+        end : int
+            Timestamp of the end date
+        size : int
+            Bar size in seconds
+        write : bool, optional
+            Whether or not partitions are attached to the writer connection instead of the current thread's connection, by default False
+
+        Yields
+        ------
+        tuple
+            (start, exclusive end, tables holding the window's rows)
+        """
+
+        if table != Database.TAB_INTRADAY:
+            yield start, end + 1, [table]
+            return
+        bounds = {Database._bucket(p[1], size) for p in Partition.overlapping(Database._PATH_DB, start, end)}
+        bounds = [start] + sorted(b for b in bounds if start < b <= end) + [end + 1]
+        for w_start, w_end in zip(bounds[:-1], bounds[1:]):
+            names = [p[0] for p in Partition.overlapping(Database._PATH_DB, w_start, w_end - 1)]
+            if write:
+                with Connection.writer(Database._PATH_DB) as conn:
+                    Partition.attach(conn, names, Database._PATH_DB)
+            else:
+                names = Partition.attach_readable(Connection.get(Database._PATH_DB), names, Database._PATH_DB)
+            yield w_start, w_end, [table] + [f'{name}.{table}' for name in names]
+
+
+    @staticmethod
+    def _bucket(date, size):
+        """
+        Returns the start of the bar of a given size (aligned to Sydney standard time midnight, with weeks starting on Monday) that a date falls in
+        """
+
+        return date - ((date - Database._BAR_EPOCH) % size)
+
+
+    @staticmethod
+    def _rollup_table(resolution):
+        if resolution not in Database.ROLLUPS:
+            raise ValueError(f'{resolution} is not a rollup resolution ({", ".join(Database.ROLLUPS)})')
+        return f'{Database.TAB_INTRADAY}_{resolution}'
+
+
+    @staticmethod
+    def _insert_columns(query, columns):
+        """
+        Inserts rows from equal length columns using one executemany and transaction per chunk of Database._INSERT_CHUNK rows
+
+        Parameters
+        ----------
+        query : str
+            Insert query with one placeholder per column
+        columns : list
+            numpy.ndarray for each column, in placeholder order
+
+        Returns
+        -------
+        int
+            Number of rows inserted
+        """
+
+        count = 0
+        length = len(columns[0])
+        for i in range(0, length, Database._INSERT_CHUNK):
+            rows = zip(*[col[i:i+Database._INSERT_CHUNK].tolist() for col in columns])
+            count += Database._execute(query, values=rows, fetch=False)
+        return count
+
+
+    @staticmethod
+    def _column(df, col, dtype=None):
+        """
+        Returns a column as a numpy array
+
+        Parameters
+        ----------
+        df : pandas.DataFrame or dict
+            DataFrame (or dict of numpy arrays) to extract the column from
+        col : str
+            Column name
+        dtype : numpy.dtype, optional
+            Type to cast the column to, by default None (i.e. keep the column's type)
+
+        Returns
+        -------
+        numpy.ndarray
+            Column values
+        """
+
+        return np.asarray(df[col], dtype=dtype)
+
+
+    @staticmethod
+    def _ticker_id(ticker):
+        """
+        Translates a ticker into its listing id, using an in-memory map that is loaded on first use
+
+        Parameters
+        ----------
+        ticker : str
+            Ticker to translate
+
+        Returns
+        -------
+        int or None
+            Listing id if the ticker is listed, else None
+        """
+
+        return Database._ticker_id_map().get(ticker)
+
+
+    @staticmethod
+    def _ticker_id_map():
+        """
+        Returns the map of tickers to listing ids for the current database, loading it if required
+
+        Returns
+        -------
+        dict
+            key : str
+                Ticker
+            value : int
+                Listing id
+        """
+
+        ids = Database._ticker_ids.get(Database._PATH_DB)
+        if ids is None:
+            query = f'SELECT {Database.COL_TICKER}, {Database.COL_ID} FROM {Database.TAB_LISTING}'
+            ids = dict(Database._execute(query))
+            Database._ticker_ids[Database._PATH_DB] = ids
+        return ids
+
+
+    @staticmethod
+    def _ticker_id_column(df):
+        """
+        Returns the listing ids of a DataFrame's ticker column, translating each distinct ticker once
+
+        Parameters
+        ----------
+        df : pandas.DataFrame
+            DataFrame with a Database.COL_TICKER column
+
+        Returns
+        -------
+        numpy.ndarray
+            Listing id of each row
+
+        Raises
+        ------
+        ValueError
+            If a ticker is not listed
+        """
+
+        tickers, inverse = np.unique(Database._column(df, Database.COL_TICKER), return_inverse=True)
+        ids = [Database._ticker_id(t) for t in tickers.tolist()]
+        if None in ids:
+            Database._ticker_ids.pop(Database._PATH_DB, None) # Listed by another connection since loading
+            ids = [Database._ticker_id(t) for t in tickers.tolist()]
+        if None in ids:
+            raise ValueError(f'{tickers[ids.index(None)]} is not a listed ticker')
+        return np.array(ids, dtype=np.int64)[inverse]
+
+
+    @staticmethod
+    def _fetch_all_intraday_or_daily(table, *cols):
+        sel_cols = Database._set_cols(cols)
+        chunks = []
+        for source in Database._sources(table):
+            query = f"""
+            SELECT {sel_cols} FROM {source}
+            JOIN {Database.TAB_LISTING} ON {Database.TAB_LISTING}.{Database.COL_ID} = {source}.{Database.COL_TICKER_ID}
+            ORDER BY {Database.COL_TICKER}, {Database.COL_DATE}
+            """
+            chunks.append(Database._execute(query))
+        if table == Database.TAB_INTRADAY:
+            query = f"""
+            SELECT {Database.TAB_LISTING}.{Database.COL_TICKER}, {Database.COL_TICKER_ID}, data FROM {Database._TAB_BLOCK}
+            JOIN {Database.TAB_LISTING} ON {Database.TAB_LISTING}.{Database.COL_ID} = {Database._TAB_BLOCK}.{Database.COL_TICKER_ID}
+            ORDER BY {Database.COL_TICKER}, day
+            """
+            for ticker, ticker_id, blob in Database._cursor(query):
+                chunks.append(Database._block_rows(Block.decode(blob, Database.BAR_DTYPE), cols, ticker, ticker_id))
+        return Database._merge_rows(chunks, cols, [Database.COL_TICKER, Database.COL_DATE])
+
+
+    @staticmethod
+    def _fetch_single_intraday_or_daily(ticker, table, *cols, start=None, end=None):
+        chunks = []
+        for source in Database._sources(table, start, end):
+            query, params = Database._single_query(ticker, source, cols, start, end)
+            chunks.append(Database._execute(query, params=params))
+        if table == Database.TAB_INTRADAY:
+            ticker_id = Database._ticker_id(ticker)
+            chunks.insert(0, Database._block_rows(Database._fetch_blocks(ticker_id, start, end), cols, ticker, ticker_id))
+        return Database._merge_rows(chunks, cols, [Database.COL_DATE])
+
+
+    @staticmethod
+    def _fetch_single_intraday_or_daily_array(ticker, table, start=None, end=None, dtype=None):
+        """
+        Retrieve intraday or daily data for a single ticker straight from the cursor into a structured array
+
+        Parameters
+        ----------
+        ticker : str
+            Ticker to fetch
+        table : str
+            Database.TAB_INTRADAY : intraday data
+            Database.TAB_DAILY : daily data
+        start : int
+            Timestamp of start date to fetch from
+        end : int
+            Timestamp of end date to fetch from
+        dtype : numpy.dtype, optional
+            Structured type whose fields name the columns to fetch, by default None (i.e. Database.BAR_DTYPE)
+
+        Returns
+        -------
+        numpy.ndarray
+            Structured array of dtype, ordered by date
+        """
+
+        dtype = Database.BAR_DTYPE if dtype is None else dtype
+        chunks = []
+        for source in Database._sources(table, start, end):
+            query, params = Database._single_query(ticker, source, dtype.names, start, end)
+            chunks.append(np.fromiter(Database._cursor(query, params=params), dtype=dtype))
+        if table == Database.TAB_INTRADAY:
+            chunks.insert(0, Database._fetch_blocks(Database._ticker_id(ticker), start, end, dtype))
+        filled = [c for c in chunks if len(c)]
+        if len(filled) > 1:
+            return Database._merge_dates(filled)
+        return filled[0] if filled else chunks[-1]
+
+
+    @staticmethod
+    def _fetch_single_intraday_or_daily_series(ticker, table, start=None, end=None):
+        if ColumnStore.ENABLED:
+            key = Database._ticker_id(ticker)
+            if ColumnStore.stored(Database._PATH_DB, table, key): # Else never synced (e.g. the store was not built)
+                return ColumnStore.read(Database._PATH_DB, table, key, Database.BAR_DTYPE, start, end)
+        data = Database._fetch_single_intraday_or_daily_array(ticker, table, start=start, end=end)
+        return {col: data[col] for col in Database.BAR_DTYPE.names}
+
+
+    @staticmethod
+    def _count_single(ticker, table, end):
+        """
+        Counts the intraday or daily rows of a single ticker up to a date
+
+        Parameters
+        ----------
+        ticker : str
+            Ticker to count
+        table : str
+            Database.TAB_INTRADAY : intraday data
+            Database.TAB_DAILY : daily data
+        end : int
+            Timestamp of the last date to count
+
+        Returns
+        -------
+        int
+            Number of rows
+        """
+
+        count = 0
+        params = (Database._ticker_id(ticker), end)
+        for source in Database._sources(table, end=end):
+            query = f'SELECT COUNT(*) FROM {source} WHERE {Database.COL_TICKER_ID} = ? AND {Database.COL_DATE} <= ?'
+            count += Database._execute(query, params=params)[0][0]
+        if table == Database.TAB_INTRADAY:
+            query = f'SELECT SUM(rows) FROM {Database._TAB_BLOCK} WHERE {Database.COL_TICKER_ID} = ? AND last <= ?'
+            count += Database._execute(query, params=params)[0][0] or 0
+            day = Database._bucket(end, Date.DAY)
+            query = f'SELECT data FROM {Database._TAB_BLOCK} WHERE {Database.COL_TICKER_ID} = ? AND day = ? AND last > ?'
+            for blob, in Database._execute(query, params=(params[0], day, end)):
+                count += int(np.count_nonzero(Block.decode(blob, Database.BAR_DTYPE)[Database.COL_DATE] <= end))
+        return count
+
+
+    @staticmethod
+    def _single_query(ticker, table, cols, start, end):
+        sel_cols = Database._set_cols(cols)
+        query = [
+            f"SELECT {sel_cols} FROM {table} WHERE {Database.COL_TICKER_ID} = ?",
+            '',
+            f'ORDER BY {Database.COL_DATE}']
+        params = (Database._ticker_id(ticker),)
+        if start is not None and end is not None:
+            query[1] = f'AND {Database.COL_DATE} BETWEEN ? AND ?'
+            params += (start, end)
+        return ' '.join(query), params
+
+
+    @staticmethod
+    def _array_to_frame(data):
+        """
+        Converts a structured array of bars into a DataFrame indexed by Sydney time
+
+        Parameters
+        ----------
+        data : numpy.ndarray or dict
+            Structured array of Database.BAR_DTYPE, or its columns by name
+
+        Returns
+        -------
+        pandas.DataFrame
+            Open, high, low, close and volume columns indexed by date
+        """
+
+        index = pd.to_datetime(data[Database.COL_DATE], unit='s', utc=True).tz_convert(Date._TZ_SYDNEY)
+        index.name = Database.COL_DATE
+        return pd.DataFrame({col: data[col] for col in Database.BAR_DTYPE.names[1:]}, index=index)
+
+
+    @staticmethod
+    def _fetch_live_intraday_or_daily(ticker, table, date, *cols):
+        """
+        Retrieve the most recent intraday or daily entry for a single ticker
+
+        Parameters
+        ----------
+        ticker : str
+            Ticker to fetch
+        table : str
+            Database.COL_INTRADAY : intraday data
+            Database.COL_DAILY : daily data
+        date : int
+            Timestamp of the live date
+        """
+
+        sel_cols = Database._set_cols(cols)
+        params = (Database._ticker_id(ticker), date)
+
+        # Main table, then partitions from newest to oldest until an entry is found
+        data = []
+        for source in Database._sources(table, end=date, reverse=True):
+            query = f"""
+            SELECT {sel_cols}, {Database.COL_DATE} FROM {source}
+            WHERE {Database.COL_TICKER_ID} = ? AND {Database.COL_DATE} <= ?
+            ORDER BY {Database.COL_DATE} DESC LIMIT 1
+            """
+            rows = Database._execute(query, params=params)
+            if rows and (not data or rows[0][-1] > data[0][-1]):
+                data = rows
+            if rows and source != table:
+                break
+        if table == Database.TAB_INTRADAY:
+            for b_date, b_row in Database._live_blocks(date, [ticker]).values():
+                if not data or b_date > data[0][-1]:
+                    data = [tuple(b_row[col].item() for col in cols) + (b_date,)]
+        return [row[:-1] for row in data]
+
+
+    @staticmethod
+    def _live_index(ticker, table, date):
+        """
+        Retrieve the most recent intraday or daily entry for a single ticker from the price index, loading the ticker's history on first use
+
+        Parameters
+        ----------
+        ticker : str
+            Ticker to fetch
+        table : str
+            Database.TAB_INTRADAY : intraday data
+            Database.TAB_DAILY : daily data
+        date : int
+            Timestamp of the live date
+
+        Returns
+        -------
+        tuple
+            (date, price) if a record exists, else (None, None)
+        """
+
+        entry = PriceIndex.get(Database._PATH_DB, table, ticker)
+        if entry is None:
+            generation = PriceIndex.generation()
+            data = Database._fetch_single_intraday_or_daily_array(ticker, table, dtype=Database._LIVE_DTYPE)
+            entry = PriceIndex.put(Database._PATH_DB, table, ticker, data[Database.COL_DATE], data[Database.COL_CLOSE], generation)
+        return PriceIndex.as_of(entry, date)
+
+
+    @staticmethod
+    def _fetch_multiple_live_intraday_and_daily(date, tickers):
+        """
+        Retrieve the most recent intraday and daily entries for multiple tickers in a single query
+
+        Parameters
+        ----------
+        date : int
+            Timestamp of the live date
+        tickers : list
+            Tickers to fetch
+
+        Returns
+        -------
+        list
+            (ticker, intraday date, intraday close, daily date, daily close) for each ticker, with None where no entry exists
+        """
+
+        if not tickers:
+            return []
+        rows = ','.join(['(?,?)'] * len(tickers))
+        params = [v for ticker in tickers for v in (ticker, Database._ticker_id(ticker))]
+        query = f"""
+        WITH req ({Database.COL_TICKER}, {Database.COL_TICKER_ID}) AS (VALUES {rows})
+        SELECT req.{Database.COL_TICKER}, i.{Database.COL_DATE}, i.{Database.COL_CLOSE}, d.{Database.COL_DATE}, d.{Database.COL_CLOSE}
+        FROM req {Database._live_join(Database.TAB_INTRADAY, 'i')} {Database._live_join(Database.TAB_DAILY, 'd')}
+        """
+        data = {row[0]: list(row) for row in Database._execute(query, params=(*params, date, date))}
+
+        # Intraday partitions from newest to oldest, until every ticker has an entry
+        pending = list(tickers)
+        for source in Database._sources(Database.TAB_INTRADAY, end=date, reverse=True):
+            if source == Database.TAB_INTRADAY:
+                continue
+            rows = ','.join(['(?,?)'] * len(pending))
+            params = [v for ticker in pending for v in (ticker, Database._ticker_id(ticker))]
+            query = f"""
+            WITH req ({Database.COL_TICKER}, {Database.COL_TICKER_ID}) AS (VALUES {rows})
+            SELECT req.{Database.COL_TICKER}, i.{Database.COL_DATE}, i.{Database.COL_CLOSE}
+            FROM req {Database._live_join(source, 'i', inner=True)}
+            """
+            for ticker, i_date, i_close in Database._execute(query, params=(*params, date)):
+                row = data[ticker]
+                if row[1] is None or i_date > row[1]:
+                    row[1:3] = [i_date, i_close]
+                pending.remove(ticker)
+            if not pending:
+                break
+
+        # Compacted intraday blocks
+        for ticker, (b_date, b_row) in Database._live_blocks(date, tickers).items():
+            row = data[ticker]
+            if row[1] is None or b_date > row[1]:
+                row[1:3] = [b_date, int(b_row[Database.COL_CLOSE])]
+        return [tuple(row) for row in data.values()]
+
+
+    @staticmethod
+    def _live_join(table, alias, inner=False):
+        """
+        Returns a join onto the most recent entry at or before a live date (bound to ?) for each ticker id in req
+
+        Parameters
+        ----------
+        table : str
+            Table to join
+        alias : str
+            Alias of the joined table
+        inner : bool, optional
+            Whether or not to drop tickers without an entry, by default False
+
+        Returns
+        -------
+        str
+            Join clause
+        """
+
+        return f"""
+        {'' if inner else 'LEFT '}JOIN {table} AS {alias} ON {alias}.{Database.COL_TICKER_ID} = req.{Database.COL_TICKER_ID} AND {alias}.{Database.COL_DATE} = (
+            SELECT MAX({Database.COL_DATE}) FROM {table}
+            WHERE {Database.COL_TICKER_ID} = req.{Database.COL_TICKER_ID} AND {Database.COL_DATE} <= ?)
+        """
+
+
+    @staticmethod
+    def _live_price(date, intraday_date, intraday_close, daily_date, daily_close):
+        """
+        Chooses between the most recent intraday and daily close for a live price.
+        Intraday is used if it is from the live day or newer than the last daily entry, else daily
+
+        Parameters
+        ----------
+        date : int
+            Live timestamp
+        intraday_date : int or None
+            Timestamp of the last intraday entry
+        intraday_close : int or None
+            Close of the last intraday entry
+        daily_date : int or None
+            Timestamp of the last daily entry
+        daily_close : int or None
+            Close of the last daily entry
+
+        Returns
+        -------
+        int or None
+            int if a live price is found, else None
+        """
+
+        # No intraday
+        if intraday_date is None:
+            return daily_close
+
+        days_since = lambda t: (t - Date.MIN) // Date.DAY
+
+        # Intraday on current day
+        live_day, intraday_day = days_since(date), days_since(intraday_date)
+        if live_day == intraday_day:
+            return intraday_close
+
+        # No daily
+        if daily_date is None:
+            return intraday_close
+
+        # Return intraday if newer, else daily
+        daily_day = days_since(daily_date)
+        return intraday_close if intraday_day > daily_day else daily_close
+
+
+    @staticmethod
+    def _sources(table, start=None, end=None, reverse=False):
+        """
+        Yields the tables holding intraday or daily data between two dates.
+        Intraday data is read from the main table, then from each overlapping partition (attached just before it is yielded)
+
+        Parameters
+        ----------
+        table : str
+            Database.TAB_INTRADAY : intraday data
+            Database.TAB_DAILY : daily data
+        start : int, optional
+            Timestamp of the start date, by default None (i.e. no lower bound)
+        end : int, optional
+            Timestamp of the end date, by default None (i.e. no upper bound)
+        reverse : bool, optional
+            Whether or not to yield partitions from newest to oldest, by default False
+
+        Yields
+        ------
+        str
+            Table name, qualified by partition name for partitions
+        """
+
+        yield table
+        if table != Database.TAB_INTRADAY:
+            return
+        partitions = Partition.overlapping(Database._PATH_DB, start, end)
+        conn = Connection.get(Database._PATH_DB)
+        for name, _, _ in reversed(partitions) if reverse else partitions:
+            if Partition.attach_readable(conn, [name], Database._PATH_DB):
+                yield f'{name}.{table}'
+
+
+    @staticmethod
+    def _merge_rows(chunks, cols, keys):
+        """
+        Concatenates rows fetched from several tables, re-sorting them if more than one table returned rows.
+        Where tables share keys, the row from the earliest table is kept
+
+        Parameters
+        ----------
+        chunks : list
+            Rows fetched from each table, each already sorted by keys
+        cols : tuple
+            Columns fetched
+        keys : list
+            Columns the rows are sorted by
+
+        Returns
+        -------
+        list
+            Fetched rows
+        """
+
+        chunks = [c for c in chunks if c]
+        if len(chunks) == 1:
+            return chunks[0]
+        rows = [row for c in chunks for row in c]
+        idx = [cols.index(k) for k in keys if k in cols]
+        if not idx:
+            return rows
+        key = lambda row: tuple(row[i] for i in idx)
+        rows.sort(key=key)
+        if len(idx) < len(keys):
+            return rows
+        return [row for i, row in enumerate(rows) if i == 0 or key(row) != key(rows[i - 1])]
 
 
     @staticmethod
@@ -0,0 +1,325 @@
+import atexit
+import os
+import random
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from time import perf_counter
+from asx_tracker.database.connection import Connection
+
+class Instrument():
+
+    # Static variables
+
+    ENABLED         = bool(os.environ.get('ASX_TRACKER_INSTRUMENT')) # Whether or not Database queries are timed (set the environment variable to enable without code changes)
+    SLOW_SECONDS    = float(os.environ.get('ASX_TRACKER_SLOW_MS', 100)) / 1000 # Queries at least this slow are logged with their query plan
+    SUMMARY_AT_EXIT = True # Whether or not the summary is printed when the program exits
+
+    _FILE_LOG       = 'slow_queries.log' # Written next to the database
+    _SAMPLES        = 10000 # Latencies kept per query shape for percentiles (reservoir sampled)
+    _SHAPE_WIDTH    = 100 # Characters of each query shape shown in the summary
+
+    _stats          = {}
+    _plans          = {}
+    _lock           = threading.Lock()
+    _registered     = False
+    _rng            = random.Random(0)
+
+    _RE_SPACE       = re.compile(r'\s+')
+    _RE_VALUES      = re.compile(r'(\([?,\s]*\))(\s*,\s*\([?,\s]*\))+') # Repeated rows of placeholders, e.g. VALUES (?,?),(?,?)
+    _RE_PARTITION   = re.compile(r'\bintraday_\d{6}\.') # Partition names, e.g. intraday_202101.intraday
+
+
+    # Enable
+
+    @staticmethod
+    def enable(slow_seconds=None):
+        """
+        Starts timing Database queries
+
+        Parameters
+        ----------
+        slow_seconds : float, optional
+            Time a query takes to be logged as slow, by default None (i.e. Instrument.SLOW_SECONDS)
+        """
+
+        if slow_seconds is not None:
+            Instrument.SLOW_SECONDS = slow_seconds
+        Instrument.ENABLED = True
+        Instrument._register()
+
+
+    @staticmethod
+    def reset():
+        """
+        Clears all recorded statistics
+        """
+
+        with Instrument._lock:
+            Instrument._stats.clear()
+            Instrument._plans.clear()
+
+
+    # Record
+
+    @staticmethod
+    def record(path, query, seconds, rows, params=None):
+        """
+        Records one execution of a query, logging it with its query plan if slower than Instrument.SLOW_SECONDS
+
+        Parameters
+        ----------
+        path : str
+            Path to the database the query ran on
+        query : str
+            Query executed
+        seconds : float
+            Time taken
+        rows : int
+            Rows fetched or modified
+        params : tuple or dict, optional
+            Values bound to the query (the first row for bulk inserts), by default None
+        """
+
+        shape = Instrument.shape(query)
+        with Instrument._lock:
+            stats = Instrument._stats.get(shape)
+            if stats is None:
+                stats = Instrument._stats[shape] = {'count': 0, 'seconds': 0.0, 'rows': 0, 'samples': []}
+            stats['count'] += 1
+            stats['seconds'] += seconds
+            stats['rows'] += max(rows, 0) # -1 for statements that neither fetch nor modify rows
+            samples = stats['samples']
+            if len(samples) < Instrument._SAMPLES:
+                samples.append(seconds)
+            else:
+                i = Instrument._rng.randrange(stats['count'])
+                if i < Instrument._SAMPLES:
+                    samples[i] = seconds
+        if seconds >= Instrument.SLOW_SECONDS:
+            Instrument._log_slow(path, query, shape, seconds, rows, params)
+
+
+    @staticmethod
+    def wrap(path, query, cursor, start, params=None):
+        """
+        Records a query that has just been executed. Statements that return no rows (e.g. inserts) are recorded straight away,
+        else the cursor is wrapped to record the query once its rows have been read.
+        See Instrument.record
+
+        Parameters
+        ----------
+        cursor : sqlite3.Cursor
+            Cursor of the executed query
+        start : float
+            perf_counter value from before the query was executed
+
+        Returns
+        -------
+        sqlite3.Cursor or TimedCursor
+            Cursor to read the rows from
+        """
+
+        if cursor.description is None:
+            Instrument.record(path, query, perf_counter() - start, cursor.rowcount, params)
+            return cursor
+        return TimedCursor(path, query, cursor, start, params)
+
+
+    @staticmethod
+    def iterate(path, query, cursor, start, params=None):
+        """
+        Yields the rows of a cursor, recording the query once all rows have been consumed.
+        See Instrument.record
+
+        Parameters
+        ----------
+        cursor : sqlite3.Cursor
+            Cursor of the executed query
+        start : float
+            perf_counter value from before the query was executed
+        """
+
+        rows = 0
+        for row in cursor:
+            rows += 1
+            yield row
+        Instrument.record(path, query, perf_counter() - start, rows, params)
+
+
+    @staticmethod
+    def shape(query):
+        """
+        Returns a query with whitespace collapsed, repeated placeholder rows folded and partition names replaced, so queries differing only in those are counted together
+
+        Parameters
+        ----------
+        query : str
+            Query to normalise
+
+        Returns
+        -------
+        str
+            Query shape
+        """
+
+        shape = Instrument._RE_SPACE.sub(' ', query).strip()
+        shape = Instrument._RE_VALUES.sub(r'\1, ...', shape)
+        return Instrument._RE_PARTITION.sub('intraday_<partition>.', shape)
+
+
+    # Report
+
+    @staticmethod
+    def report():
+        """
+        Returns the recorded statistics of each query shape, slowest in total first
+
+        Returns
+        -------
+        list
+            dict with shape, count, total, mean and p99 seconds and rows of each query shape
+        """
+
+        with Instrument._lock:
+            items = [(shape, dict(stats, samples=sorted(stats['samples']))) for shape, stats in Instrument._stats.items()]
+        report = []
+        for shape, stats in items:
+            samples = stats['samples']
+            report.append({
+                'shape': shape,
+                'count': stats['count'],
+                'total': stats['seconds'],
+                'mean': stats['seconds'] / stats['count'],
+                'p99': samples[min(len(samples) - 1, int(0.99 * len(samples)))],
+                'rows': stats['rows']})
+        return sorted(report, key=lambda r: r['total'], reverse=True)
+
+
+    @staticmethod
+    def summary(limit=20):
+        """
+        Prints the recorded statistics of the query shapes taking the most total time
+
+        Parameters
+        ----------
+        limit : int, optional
+            Number of query shapes to print, by default 20
+        """
+
+        report = Instrument.report()
+        if not report:
+            return
+        print(f'Query summary ({sum(r["count"] for r in report)} queries, {sum(r["total"] for r in report):.3f} s)')
+        print(f'{"Count":>8} {"Total ms":>10} {"Mean ms":>9} {"p99 ms":>9} {"Rows":>10}  Query')
+        for r in report[:limit]:
+            shape = r['shape'] if len(r['shape']) <= Instrument._SHAPE_WIDTH else r['shape'][:Instrument._SHAPE_WIDTH - 3] + '...'
+            print(f'{r["count"]:>8} {r["total"] * 1000:>10.1f} {r["mean"] * 1000:>9.3f} {r["p99"] * 1000:>9.3f} {r["rows"]:>10}  {shape}')
+
+
+    # Internal
+
+    @staticmethod
+    def _register():
+        if not Instrument._registered:
+            atexit.register(Instrument._at_exit)
+            Instrument._registered = True
+
+
+    @staticmethod
+    def _at_exit():
+        if Instrument.ENABLED and Instrument.SUMMARY_AT_EXIT:
+            Instrument.summary()
+
+
+    @staticmethod
+    def _log_slow(path, query, shape, seconds, rows, params):
+        """
+        Appends a slow query and its query plan (captured once per query shape) to the slow query log next to the database
+        """
+
+        plan = Instrument._plans.get(shape)
+        if plan is None:
+            plan = Instrument._plans[shape] = Instrument._explain(path, query, params)
+        entry = [
+            f'{datetime.now().isoformat(timespec="seconds")} {seconds * 1000:.1f} ms, {rows} rows',
+            f'  {shape}',
+            *[f'    {line}' for line in plan]]
+        with open(os.path.join(os.path.dirname(path), Instrument._FILE_LOG), 'a') as f:
+            f.write('\n'.join(entry) + '\n')
+
+
+    @staticmethod
+    def _explain(path, query, params):
+        """
+        Returns the lines of a query's plan, indented by depth
+
+        Parameters
+        ----------
+        path : str
+            Path to the database the query ran on
+        query : str
+            Query to explain
+        params : tuple or dict
+            Values bound to the query
+
+        Returns
+        -------
+        list
+            Lines of the query plan
+        """
+
+        try:
+            rows = Connection.get(path).execute(f'EXPLAIN QUERY PLAN {query}', params or ()).fetchall()
+        except sqlite3.Error as e:
+            return [f'(no plan: {e})']
+        depths = {0: -1}
+        lines = []
+        for node, parent, _, detail in rows:
+            depths[node] = depths.get(parent, -1) + 1
+            lines.append('  ' * depths[node] + detail)
+        return lines
+
+
+class TimedCursor():
+
+    # Constructor
+
+    def __init__(self, path, query, cursor, start, params):
+        """
+        Cursor that records its query once its rows have been read, through iteration, fetchall or fetchone.
+        See Instrument.wrap
+        """
+
+        self.path = path
+        self.query = query
+        self.cursor = cursor
+        self.start = start
+        self.params = params
+
+
+    # Read
+
+    def __iter__(self):
+        return Instrument.iterate(self.path, self.query, self.cursor, self.start, self.params)
+
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+
+    def fetchone(self):
+        row = self.cursor.fetchone()
+        Instrument.record(self.path, self.query, perf_counter() - self.start, int(row is not None), self.params)
+        return row
+
+
+    def fetchall(self):
+        rows = self.cursor.fetchall()
+        Instrument.record(self.path, self.query, perf_counter() - self.start, len(rows), self.params)
+        return rows
+
+
+if Instrument.ENABLED:
+    Instrument._register()
\ No newline at end of file
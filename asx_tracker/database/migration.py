@@ -0,0 +1,236 @@
+from asx_tracker.database.sql import Sql
+from asx_tracker.database.connection import Connection
+from asx_tracker.date import Date
+from asx_tracker.utils import Utils
+
+class Migration():
+
+    # Static variables
+
+    _TAB_SCHEMA_VERSION = 'schema_version'
+    _TAB_LISTING        = 'listing'
+    _TAB_BARS           = ['intraday', 'daily']
+    _TAB_ROLLUPS        = ['intraday_5m', 'intraday_15m', 'intraday_1h', 'intraday_1d']
+    _TAB_ROLLUP_PENDING = 'rollup_pending'
+
+
+    # Migrate
+
+    @staticmethod
+    def migrate(path, verbose=True):
+        """
+        Applies all pending migrations to a database, in order, each inside its own transaction
+
+        Parameters
+        ----------
+        path : str
+            Path to the database
+        verbose : bool, optional
+            Whether or not to print progress, by default True
+
+        Returns
+        -------
+        int
+            Schema version after migrating
+        """
+
+        with Connection.writer(path) as conn:
+            conn.execute(Sql.CREATE_TAB_SCHEMA_VERSION)
+        version = Migration.version(path)
+        migrations = Migration._migrations()
+        for i in range(version, len(migrations)):
+            description, fn = migrations[i]
+            if verbose:
+                print(f'Migrating database to version {i + 1} ({description}) ...')
+            with Connection.transaction(path) as conn:
+                fn(conn, verbose)
+                conn.execute(
+                    f'INSERT INTO {Migration._TAB_SCHEMA_VERSION} (version, description, applied) VALUES (?,?,?)',
+                    (i + 1, description, Date.timestamp_now()))
+            if verbose:
+                print(f'{Utils.CLEAR_LINE}  complete')
+        return len(migrations)
+
+
+    @staticmethod
+    def version(path):
+        """
+        Returns the schema version of a database
+
+        Parameters
+        ----------
+        path : str
+            Path to the database
+
+        Returns
+        -------
+        int
+            Latest applied migration, or 0 if none have been applied
+        """
+
+        conn = Connection.get(path)
+        version = conn.execute(f'SELECT MAX(version) FROM {Migration._TAB_SCHEMA_VERSION}').fetchone()[0]
+        return 0 if version is None else version
+
+
+    # Internal
+
+    @staticmethod
+    def _migrations():
+        """
+        Returns all migrations in the order they are applied. Migrations must only ever be appended
+
+        Returns
+        -------
+        list
+            (description, function) for each schema version
+        """
+
+        return [
+            ('clustered WITHOUT ROWID bar tables', Migration._without_rowid_bars),
+            ('integer ticker ids in bar tables', Migration._ticker_ids),
+            ('intraday partition registry', Migration._intraday_partitions),
+            ('intraday rollup tables', Migration._intraday_rollups),
+            ('compressed intraday blocks', Migration._intraday_blocks),
+            ('retention watermarks', Migration._retention),
+            ('scrape job queue', Migration._scrape_jobs),
+            ('watchlist and scrape backoff', Migration._scrape_priorities),
+            ('scrape job request intervals', Migration._scrape_request_intervals)]
+
+
+    @staticmethod
+    def _copy_table(conn, table, create_sql, select_sql, verbose):
+        """
+        Rebuilds a table with a new layout, copying data one ticker at a time
+
+        Parameters
+        ----------
+        conn : sqlite3.Connection
+            Connection with an open transaction
+        table : str
+            Table to rebuild
+        create_sql : str
+            Query creating the new table, with a {table} placeholder for its name
+        select_sql : str
+            Query selecting the rows of one ticker (bound to ?) in the new table's column order, with a {table} placeholder for the old table's name
+        verbose : bool
+            Whether or not to print progress
+        """
+
+        new_table = f'{table}_new'
+        conn.execute(create_sql.format(table=new_table))
+        tickers = [t for t, in conn.execute(f'SELECT DISTINCT ticker FROM {table} ORDER BY ticker')]
+        select_sql = select_sql.format(table=table)
+        for i, ticker in enumerate(tickers):
+            if verbose:
+                print(f'{Utils.CLEAR_LINE}  {int(100 * i / len(tickers))}% - copying {table} for {ticker}', end='', flush=True)
+            conn.execute(f'INSERT INTO {new_table} {select_sql}', (ticker,))
+        conn.execute(f'DROP TABLE {table}')
+        conn.execute(f'ALTER TABLE {new_table} RENAME TO {table}')
+
+
+    # Migrations
+
+    @staticmethod
+    def _without_rowid_bars(conn, verbose):
+        """
+        Version 1: stores intraday and daily rows clustered by (ticker, date) instead of in a rowid table with a separate primary key index
+        """
+
+        for table in Migration._TAB_BARS:
+            select_sql = 'SELECT ticker, date, open, close, low, high, volume FROM {table} WHERE ticker = ? ORDER BY date'
+            Migration._copy_table(conn, table, Sql.CREATE_TAB_BARS_WITHOUT_ROWID, select_sql, verbose)
+
+
+    @staticmethod
+    def _ticker_ids(conn, verbose):
+        """
+        Version 2: gives each listing an integer id and keys intraday and daily rows by (ticker_id, date) instead of repeating the ticker text
+        """
+
+        # Listings (including any tickers that only exist in bar tables)
+        for table in Migration._TAB_BARS:
+            conn.execute(f"INSERT OR IGNORE INTO {Migration._TAB_LISTING} (ticker, name, mgmt_pct) SELECT DISTINCT ticker, '', 0 FROM {table}")
+        select_sql = 'SELECT NULL, ticker, name, mgmt_pct, last_intraday, last_daily FROM {table} WHERE ticker = ?'
+        Migration._copy_table(conn, Migration._TAB_LISTING, Sql.CREATE_TAB_LISTING_WITH_ID, select_sql, verbose)
+
+        # Bars
+        for table in Migration._TAB_BARS:
+            select_sql = f"""
+            SELECT l.id, b.date, b.open, b.close, b.low, b.high, b.volume
+            FROM {{table}} AS b JOIN {Migration._TAB_LISTING} AS l ON l.ticker = b.ticker
+            WHERE b.ticker = ? ORDER BY b.date
+            """
+            Migration._copy_table(conn, table, Sql.CREATE_TAB_BARS_TICKER_ID, select_sql, verbose)
+
+
+    @staticmethod
+    def _intraday_partitions(conn, verbose):
+        """
+        Version 3: registry of the attached database files that intraday data can be partitioned into by date
+        """
+
+        conn.execute(Sql.CREATE_TAB_INTRADAY_PARTITION)
+
+
+    @staticmethod
+    def _intraday_rollups(conn, verbose):
+        """
+        Version 4: 5 minute, 15 minute, 1 hour and 1 day bars rolled up from intraday data.
+        Every listing is marked pending so the rollups are filled by the next Database.refresh_rollups
+        """
+
+        for table in Migration._TAB_ROLLUPS:
+            conn.execute(Sql.CREATE_TAB_BARS_TICKER_ID.format(table=table))
+        conn.execute(Sql.CREATE_TAB_ROLLUP_PENDING)
+        conn.execute(f'INSERT INTO {Migration._TAB_ROLLUP_PENDING} (ticker_id, start, end) SELECT id, ?, ? FROM {Migration._TAB_LISTING}', (Date.MIN, Date.MAX))
+
+
+    @staticmethod
+    def _intraday_blocks(conn, verbose):
+        """
+        Version 5: compressed per-ticker-day blocks that completed days of intraday data can be compacted into (see Database.compact_intraday).
+        Stored as a rowid table since each row holds a blob of about a kilobyte
+        """
+
+        conn.execute(Sql.CREATE_TAB_INTRADAY_BLOCK)
+
+
+    @staticmethod
+    def _retention(conn, verbose):
+        """
+        Version 6: the date before which each table's data has been removed by a retention policy (see Database.apply_retention)
+        """
+
+        conn.execute(Sql.CREATE_TAB_RETENTION)
+
+
+    @staticmethod
+    def _scrape_jobs(conn, verbose):
+        """
+        Version 7: the windows of data a download still has to scrape, so an interrupted download resumes where it stopped (see Scraper.download_intraday)
+        """
+
+        conn.execute(Sql.CREATE_TAB_SCRAPE_JOB)
+        conn.execute(Sql.CREATE_IDX_SCRAPE_JOB_STATE)
+        conn.execute(Sql.CREATE_IDX_SCRAPE_JOB_TICKER)
+
+
+    @staticmethod
+    def _scrape_priorities(conn, verbose):
+        """
+        Version 8: tickers to scrape first, tickers backed off after returning nothing and the rows each scrape job returned (see Scraper.download_intraday)
+        """
+
+        conn.execute(Sql.CREATE_TAB_WATCHLIST)
+        conn.execute(Sql.CREATE_TAB_SCRAPE_BACKOFF)
+        conn.execute(Sql.ALTER_TAB_SCRAPE_JOB_ROWS)
+
+
+    @staticmethod
+    def _scrape_request_intervals(conn, verbose):
+        """
+        Version 9: the interval each scrape job requests, which can be coarser than its download's interval for data older than Yahoo! Finance keeps it for (see Scraper._plan_intraday)
+        """
+
+        conn.execute(Sql.ALTER_TAB_SCRAPE_JOB_REQUEST_INTERVAL)
\ No newline at end of file
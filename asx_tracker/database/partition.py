@@ -0,0 +1,428 @@
+import argparse
+import os
+import shutil
+from datetime import datetime
+from asx_tracker.database.sql import Sql
+from asx_tracker.database.connection import Connection
+from asx_tracker.database.price_index import PriceIndex
+from asx_tracker.date import Date
+from asx_tracker.utils import Utils
+
+class Partition():
+
+    # Static variables
+
+    MONTHS              = None # Months of intraday data per partition file (None keeps new intraday data in the main database)
+
+    _TAB_INTRADAY       = 'intraday'
+    _TAB_PARTITION      = 'intraday_partition'
+    _DIR_PARTITIONS     = 'partitions'
+    _DIR_ARCHIVE        = 'archive'
+    _MAX_ATTACHED       = 8 # SQLite allows 10 attached databases by default
+    _PRAGMA_NEW         = 'auto_vacuum = INCREMENTAL' # Only set on new files (see Connection._PRAGMA_NEW)
+    _PRAGMAS            = ['journal_mode = WAL', 'synchronous = NORMAL']
+
+    _registry           = {}
+
+
+    # Partitions
+
+    @staticmethod
+    def overlapping(path, start=None, end=None):
+        """
+        Returns the active partitions that hold intraday data between two dates
+
+        Parameters
+        ----------
+        path : str
+            Path to the main database
+        start : int, optional
+            Timestamp of the start date, by default None (i.e. no lower bound)
+        end : int, optional
+            Timestamp of the end date, by default None (i.e. no upper bound)
+
+        Returns
+        -------
+        list
+            (name, start, end) of each overlapping partition, ordered by date
+        """
+
+        return [p for p in Partition._active(path) if (end is None or p[1] <= end) and (start is None or p[2] > start)]
+
+
+    @staticmethod
+    def ensure(path, start, end):
+        """
+        Creates partitions for any dates in a range not covered by an active partition, using Partition.MONTHS months per partition.
+        Partitions never overlap, so new partitions are shortened to the months not already covered (e.g. after Partition.MONTHS changes)
+
+        Parameters
+        ----------
+        path : str
+            Path to the main database
+        start : int
+            Timestamp of the first date
+        end : int
+            Timestamp of the last date
+
+        Returns
+        -------
+        list
+            (name, start, end) of each partition covering the dates, ordered by date
+
+        Raises
+        ------
+        ValueError
+            If a date in the range is not covered by a partition
+        """
+
+        existing = Partition._active(path)
+        created = False
+        _, b_start, b_end = Partition.bounds(start)
+        while b_start <= end:
+            for gap_start, gap_end in Partition._gaps(existing, b_start, b_end):
+                Partition._create(path, Partition._name(gap_start, gap_end), gap_start, gap_end)
+                created = True
+            _, b_start, b_end = Partition.bounds(b_end)
+        if created:
+            Partition._registry.pop(path, None)
+        partitions = Partition.overlapping(path, start, end)
+        if Partition._gaps(partitions, start, end + 1):
+            raise ValueError(f'Intraday partitions do not cover {Date.timestamp_to_date_str(start)} - {Date.timestamp_to_date_str(end)}')
+        return partitions
+
+
+    @staticmethod
+    def bounds(date):
+        """
+        Returns the partition that a date belongs to when no partitions exist
+
+        Parameters
+        ----------
+        date : int
+            Timestamp of the date
+
+        Returns
+        -------
+        tuple
+            (name, start, end) of the partition, where start is inclusive and end is exclusive
+        """
+
+        d = Date.timestamp_to_datetime(date)
+        months = Partition.MONTHS or 1
+        index = (d.year * 12 + d.month - 1) // months * months
+        start = Partition._month_start(index)
+        end = Partition._month_start(index + months)
+        return Partition._name(start, end), start, end
+
+
+    @staticmethod
+    def attach(conn, names, path):
+        """
+        Attaches partitions to a connection (under their own names), detaching others if too many are attached
+
+        Parameters
+        ----------
+        conn : sqlite3.Connection
+            Connection to the main database
+        names : list
+            Names of the partitions to attach
+        path : str
+            Path to the main database
+        """
+
+        attached = {row[1] for row in conn.execute('PRAGMA database_list')} - {'main', 'temp'}
+        missing = [n for n in names if n not in attached]
+        if not missing:
+            return
+        if len(attached) + len(missing) > Partition._MAX_ATTACHED:
+            for name in attached - set(names):
+                conn.execute(f'DETACH DATABASE {name}')
+            PriceIndex.invalidate(path) # Commits while detached would be missed, as data_version restarts when reattached
+        for name in missing:
+            conn.execute(f'ATTACH DATABASE ? AS {name}', (Partition._file(path, name),))
+            if not conn.execute(f'PRAGMA {name}.page_count').fetchone()[0]:
+                conn.execute(f'PRAGMA {name}.{Partition._PRAGMA_NEW}')
+            for pragma in Partition._PRAGMAS:
+                conn.execute(f'PRAGMA {name}.{pragma}')
+
+
+    @staticmethod
+    def attach_readable(conn, names, path):
+        """
+        Attaches partitions to a reader connection, returning those that can be read.
+        Inside a snapshot (see Connection.snapshot) nothing can be attached, and partitions that were not attached when it began are left out,
+        as partitions created since hold no rows the snapshot can see
+
+        Parameters
+        ----------
+        See Partition.attach
+
+        Returns
+        -------
+        list
+            Names of the partitions to read
+        """
+
+        if not conn.in_transaction:
+            Partition.attach(conn, names, path)
+            return names
+        attached = {row[1] for row in conn.execute('PRAGMA database_list')}
+        return [n for n in names if n in attached]
+
+
+    # Tooling
+
+    @staticmethod
+    def split(path, verbose=True):
+        """
+        Moves intraday data from the main database into partitions
+
+        Parameters
+        ----------
+        path : str
+            Path to the main database
+        verbose : bool, optional
+            Whether or not to print progress, by default True
+
+        Returns
+        -------
+        int
+            Number of rows moved
+        """
+
+        conn = Connection.get(path)
+        start, end = conn.execute(f'SELECT MIN(date), MAX(date) FROM main.{Partition._TAB_INTRADAY}').fetchone()
+        if start is None:
+            return 0
+        count = 0
+        for name, p_start, p_end in Partition.ensure(path, start, end):
+            if verbose:
+                print(f'{Utils.CLEAR_LINE}  {count} moved - currently moving {name}', end='', flush=True)
+            with Connection.writer(path) as writer:
+                Partition.attach(writer, [name], path)
+            with Connection.transaction(path) as writer:
+                where = 'WHERE date >= ? AND date < ?'
+                count += writer.execute(f'INSERT OR IGNORE INTO {name}.{Partition._TAB_INTRADAY} SELECT * FROM main.{Partition._TAB_INTRADAY} {where}', (p_start, p_end)).rowcount
+                writer.execute(f'DELETE FROM main.{Partition._TAB_INTRADAY} {where}', (p_start, p_end))
+        if verbose:
+            print(f'{Utils.CLEAR_LINE}  complete ({count} moved)')
+        return count
+
+
+    @staticmethod
+    def archive(path, before):
+        """
+        Detaches partitions that end before a date and moves their files into the archive directory.
+        Archived partitions are no longer queried
+
+        Parameters
+        ----------
+        path : str
+            Path to the main database
+        before : int
+            Timestamp that archived partitions must end before
+
+        Returns
+        -------
+        list
+            Names of the archived partitions
+        """
+
+        names = [p[0] for p in Partition._active(path) if p[2] <= before]
+        Partition._move(path, names, archived=True)
+        return names
+
+
+    @staticmethod
+    def restore(path, names):
+        """
+        Moves archived partitions back from the archive directory so they are queried again
+
+        Parameters
+        ----------
+        path : str
+            Path to the main database
+        names : list
+            Names of the partitions to restore
+        """
+
+        Partition._move(path, names, archived=False)
+
+
+    @staticmethod
+    def drop(path, before):
+        """
+        Detaches partitions that end before a date and deletes their files
+
+        Parameters
+        ----------
+        path : str
+            Path to the main database
+        before : int
+            Timestamp that dropped partitions must end before
+
+        Returns
+        -------
+        tuple
+            (names of the dropped partitions, bytes of files deleted)
+        """
+
+        names = [p[0] for p in Partition._active(path) if p[2] <= before]
+        size = 0
+        reader = Connection.get(path)
+        with Connection.writer(path) as writer:
+            for name in names:
+                Partition._detach([reader, writer], name)
+                src = Partition._file(path, name)
+                for ext in ['', '-wal', '-shm']:
+                    if os.path.exists(src + ext):
+                        size += os.path.getsize(src + ext)
+                        os.remove(src + ext)
+                writer.execute(f'DELETE FROM {Partition._TAB_PARTITION} WHERE name = ?', (name,))
+        Partition._registry.pop(path, None)
+        return names, size
+
+
+    # Internal
+
+    @staticmethod
+    def _active(path):
+        """
+        Returns all partitions that have not been archived, loading the registry if required
+
+        Parameters
+        ----------
+        path : str
+            Path to the main database
+
+        Returns
+        -------
+        list
+            (name, start, end) of each partition, ordered by date
+        """
+
+        registry = Partition._registry.get(path)
+        if registry is None:
+            query = f'SELECT name, start, end FROM {Partition._TAB_PARTITION} WHERE archived = 0 ORDER BY start'
+            with Connection.writer(path) as conn: # Sees partitions created by an open write transaction, unlike a reader inside a snapshot
+                registry = conn.execute(query).fetchall()
+            Partition._registry[path] = registry
+        return registry
+
+
+    @staticmethod
+    def _create(path, name, start, end):
+        if os.path.exists(Partition._file(path, name, archived=True)):
+            raise ValueError(f'Partition {name} is archived and must be restored before new data is added')
+        os.makedirs(os.path.dirname(Partition._file(path, name)), exist_ok=True)
+        with Connection.writer(path) as conn:
+            registered = conn.execute(f'SELECT start, end FROM {Partition._TAB_PARTITION} WHERE name = ?', (name,)).fetchone()
+            if registered is not None and tuple(registered) != (start, end):
+                raise ValueError(f'Partition {name} is already registered for different dates')
+            Partition.attach(conn, [name], path)
+            conn.execute(Sql.CREATE_TAB_PARTITION_INTRADAY.format(table=f'{name}.{Partition._TAB_INTRADAY}'))
+            conn.execute(f'INSERT OR IGNORE INTO {Partition._TAB_PARTITION} (name, start, end) VALUES (?,?,?)', (name, start, end))
+
+
+    @staticmethod
+    def _gaps(partitions, start, end):
+        """
+        Returns the parts of a range not covered by any of the partitions
+
+        Parameters
+        ----------
+        partitions : list
+            (name, start, end) of each partition, ordered by date
+        start : int
+            Timestamp of the start of the range (inclusive)
+        end : int
+            Timestamp of the end of the range (exclusive)
+
+        Returns
+        -------
+        list
+            (start, end) of each uncovered part, ordered by date
+        """
+
+        gaps = []
+        for _, p_start, p_end in partitions:
+            if p_end <= start or p_start >= end:
+                continue
+            if p_start > start:
+                gaps.append((start, p_start))
+            start = max(start, p_end)
+        if start < end:
+            gaps.append((start, end))
+        return gaps
+
+
+    @staticmethod
+    def _name(start, end):
+        """
+        Returns the name of the partition between two month starts, e.g. intraday_202101 for one month or intraday_202101_202103 for three
+        """
+
+        first, last = Date.timestamp_to_datetime(start), Date.timestamp_to_datetime(end - 1)
+        name = f'{Partition._TAB_INTRADAY}_{first.year}{first.month:02d}'
+        return name if (first.year, first.month) == (last.year, last.month) else f'{name}_{last.year}{last.month:02d}'
+
+
+    @staticmethod
+    def _move(path, names, archived):
+        reader = Connection.get(path)
+        with Connection.writer(path) as writer:
+            for name in names:
+                Partition._detach([reader, writer], name)
+                src, dst = Partition._file(path, name, not archived), Partition._file(path, name, archived)
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                for ext in ['', '-wal', '-shm']:
+                    if os.path.exists(src + ext):
+                        shutil.move(src + ext, dst + ext)
+                writer.execute(f'UPDATE {Partition._TAB_PARTITION} SET archived = ? WHERE name = ?', (int(archived), name))
+        Partition._registry.pop(path, None)
+        PriceIndex.invalidate(path)
+
+
+    @staticmethod
+    def _detach(conns, name):
+        for conn in conns:
+            if name in {row[1] for row in conn.execute('PRAGMA database_list')}:
+                conn.execute(f'DETACH DATABASE {name}')
+
+
+    @staticmethod
+    def _file(path, name, archived=False):
+        directory = os.path.join(os.path.dirname(path), Partition._DIR_PARTITIONS)
+        if archived:
+            directory = os.path.join(directory, Partition._DIR_ARCHIVE)
+        return os.path.join(directory, f'{name}.db')
+
+
+    @staticmethod
+    def _month_start(index):
+        d = datetime(index // 12, index % 12 + 1, 1)
+        return int(Date._TZ_SYDNEY_INFO.localize(d).timestamp())
+
+
+if __name__ == "__main__":
+    from asx_tracker.database.database import Database
+
+    parser = argparse.ArgumentParser(description='Manage intraday partitions')
+    parser.add_argument('command', choices=['split', 'archive', 'restore', 'list'])
+    parser.add_argument('--path', default='asx_tracker/database/database.db')
+    parser.add_argument('--before', help="Archive partitions ending before this date, e.g. '1 JAN 2022'")
+    parser.add_argument('--names', nargs='*', default=[], help='Partitions to restore')
+    args = parser.parse_args()
+
+    Database._PATH_DB = args.path
+    Database.create_tables()
+    if args.command == 'split':
+        Partition.split(args.path)
+    elif args.command == 'archive':
+        print('\n'.join(Partition.archive(args.path, Date.date_str_to_timestamp(args.before))))
+    elif args.command == 'restore':
+        Partition.restore(args.path, args.names)
+    else:
+        for name, start, end in Partition.overlapping(args.path):
+            print(f'{name}\t{Date.timestamp_to_date_str(start)} - {Date.timestamp_to_date_str(end)}')
\ No newline at end of file
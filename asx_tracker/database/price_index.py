@@ -0,0 +1,195 @@
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from time import monotonic
+import numpy as np
+from asx_tracker.database.connection import Connection
+
+class PriceIndex():
+
+    # Static variables
+
+    ENABLED             = True # Whether or not live prices are answered from in-memory arrays instead of per-lookup queries
+    MEMORY_BUDGET       = 128 * 2**20 # Bytes of arrays kept before the least recently used tickers are evicted
+
+    _CHECK_INTERVAL     = 1.0 # Seconds between checks for commits by other processes
+
+    _entries            = OrderedDict()
+    _bytes              = 0
+    _generation         = 0 # Incremented by every invalidation
+    _versions           = {}
+    _checked            = {}
+    _lock               = threading.Lock()
+
+
+    # Lookup
+
+    @staticmethod
+    def get(path, table, ticker):
+        """
+        Returns the cached dates and closes of a ticker, marking them as recently used
+
+        Parameters
+        ----------
+        path : str
+            Path to the main database
+        table : str
+            Table the prices are from
+        ticker : str
+            Ticker to look up
+
+        Returns
+        -------
+        tuple or None
+            (dates, closes) arrays sorted by date if cached, else None
+        """
+
+        PriceIndex._check_version(path)
+        key = (path, table, ticker)
+        with PriceIndex._lock:
+            entry = PriceIndex._entries.get(key)
+            if entry is not None:
+                PriceIndex._entries.move_to_end(key)
+            return entry
+
+
+    @staticmethod
+    def generation():
+        """
+        Returns the number of invalidations so far, to be read before loading prices for PriceIndex.put
+
+        Returns
+        -------
+        int
+            Invalidation count
+        """
+
+        return PriceIndex._generation
+
+
+    @staticmethod
+    def put(path, table, ticker, dates, closes, generation):
+        """
+        Caches the dates and closes of a ticker, evicting the least recently used tickers if over PriceIndex.MEMORY_BUDGET.
+        Prices are not cached if they may already be out of date, i.e. if invalidated while they were loaded,
+        or if loaded inside the current thread's write transaction, which could still roll back
+
+        Parameters
+        ----------
+        See PriceIndex.get
+        dates : numpy.ndarray
+            Timestamps sorted in ascending order
+        closes : numpy.ndarray
+            Close of each timestamp
+        generation : int
+            PriceIndex.generation before the prices were loaded
+
+        Returns
+        -------
+        tuple
+            (dates, closes) as cached
+        """
+
+        entry = (array('q', np.asarray(dates, dtype=np.int64).tobytes()), array('q', np.asarray(closes, dtype=np.int64).tobytes()))
+        key = (path, table, ticker)
+        if Connection.depth(path):
+            return entry
+        with PriceIndex._lock:
+            if generation != PriceIndex._generation:
+                return entry
+            PriceIndex._pop(key)
+            PriceIndex._entries[key] = entry
+            PriceIndex._bytes += PriceIndex._size(entry)
+            while PriceIndex._bytes > PriceIndex.MEMORY_BUDGET and len(PriceIndex._entries) > 1:
+                PriceIndex._pop(next(iter(PriceIndex._entries)))
+        return entry
+
+
+    @staticmethod
+    def as_of(entry, date):
+        """
+        Returns the last price at or before a date using a binary search
+
+        Parameters
+        ----------
+        entry : tuple
+            (dates, closes) returned by PriceIndex.get or PriceIndex.put
+        date : int
+            Timestamp to look up
+
+        Returns
+        -------
+        tuple
+            (date, close) if a price exists, else (None, None)
+        """
+
+        dates, closes = entry
+        i = bisect_right(dates, date)
+        if i == 0:
+            return None, None
+        return dates[i - 1], closes[i - 1]
+
+
+    # Invalidate
+
+    @staticmethod
+    def invalidate(path, table=None, tickers=None):
+        """
+        Drops cached prices so they are reloaded on next use.
+        Called once this process's writes commit, as commits by this process are not tracked by PriceIndex._check_version
+
+        Parameters
+        ----------
+        path : str
+            Path to the main database
+        table : str, optional
+            Table to drop prices of, by default None (i.e. all tables)
+        tickers : list, optional
+            Tickers to drop, by default None (i.e. all tickers)
+        """
+
+        tickers = None if tickers is None else set(tickers)
+        with PriceIndex._lock:
+            PriceIndex._generation += 1
+            for key in list(PriceIndex._entries):
+                if key[0] == path and (table is None or key[1] == table) and (tickers is None or key[2] in tickers):
+                    PriceIndex._pop(key)
+
+
+    # Internal
+
+    @staticmethod
+    def _check_version(path):
+        """
+        Drops all cached prices of a database if another process has committed to it, or to an attached partition, since the last check.
+        Checks at most once every PriceIndex._CHECK_INTERVAL seconds, skipping checks while another thread of this process is writing
+
+        Parameters
+        ----------
+        path : str
+            Path to the main database
+        """
+
+        now = monotonic()
+        if now - PriceIndex._checked.get(path, -PriceIndex._CHECK_INTERVAL) < PriceIndex._CHECK_INTERVAL:
+            return
+        PriceIndex._checked[path] = now
+        versions = Connection.data_versions(path)
+        if versions is None:
+            return
+        if PriceIndex._versions.get(path, versions) != versions: # Also when partitions are attached, as their earlier commits were not tracked
+            PriceIndex.invalidate(path)
+        PriceIndex._versions[path] = versions
+
+
+    @staticmethod
+    def _pop(key):
+        entry = PriceIndex._entries.pop(key, None)
+        if entry is not None:
+            PriceIndex._bytes -= PriceIndex._size(entry)
+
+
+    @staticmethod
+    def _size(entry):
+        return sum(len(a) * a.itemsize for a in entry)
\ No newline at end of file
@@ -42,4 +42,179 @@ class Sql():
         PRIMARY KEY (ticker, date),
         FOREIGN KEY (ticker) REFERENCES listing (ticker) ON UPDATE CASCADE ON DELETE CASCADE
     )
+    """
+
+    CREATE_TAB_SCHEMA_VERSION = f"""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version         INTEGER NOT NULL,
+        description     TEXT    NOT NULL,
+        applied         INTEGER NOT NULL
+    )
+    """
+
+
+    # Migrations (version 1)
+
+    CREATE_TAB_BARS_WITHOUT_ROWID = """
+    CREATE TABLE {table} (
+        ticker          TEXT    NOT NULL,
+        date            INTEGER NOT NULL,
+        open            INTEGER NOT NULL,
+        close           INTEGER NOT NULL,
+        low             INTEGER NOT NULL,
+        high            INTEGER NOT NULL,
+        volume          INTEGER NOT NULL,
+        PRIMARY KEY (ticker, date),
+        FOREIGN KEY (ticker) REFERENCES listing (ticker) ON UPDATE CASCADE ON DELETE CASCADE
+    ) WITHOUT ROWID
+    """
+
+
+    # Migrations (version 2)
+
+    CREATE_TAB_LISTING_WITH_ID = """
+    CREATE TABLE {table} (
+        id              INTEGER PRIMARY KEY,
+        ticker          TEXT    NOT NULL    UNIQUE,
+        name            TEXT    NOT NULL,
+        mgmt_pct        INTEGER NOT NULL,
+        last_intraday   INTEGER NOT NULL    DEFAULT 0,
+        last_daily      INTEGER NOT NULL    DEFAULT 0
+    )
+    """
+
+    CREATE_TAB_BARS_TICKER_ID = """
+    CREATE TABLE {table} (
+        ticker_id       INTEGER NOT NULL,
+        date            INTEGER NOT NULL,
+        open            INTEGER NOT NULL,
+        close           INTEGER NOT NULL,
+        low             INTEGER NOT NULL,
+        high            INTEGER NOT NULL,
+        volume          INTEGER NOT NULL,
+        PRIMARY KEY (ticker_id, date),
+        FOREIGN KEY (ticker_id) REFERENCES listing (id) ON DELETE CASCADE
+    ) WITHOUT ROWID
+    """
+
+
+    # Migrations (version 3)
+
+    CREATE_TAB_INTRADAY_PARTITION = """
+    CREATE TABLE IF NOT EXISTS intraday_partition (
+        name            TEXT    PRIMARY KEY,
+        start           INTEGER NOT NULL,
+        end             INTEGER NOT NULL,
+        archived        INTEGER NOT NULL    DEFAULT 0
+    )
+    """
+
+    CREATE_TAB_PARTITION_INTRADAY = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        ticker_id       INTEGER NOT NULL,
+        date            INTEGER NOT NULL,
+        open            INTEGER NOT NULL,
+        close           INTEGER NOT NULL,
+        low             INTEGER NOT NULL,
+        high            INTEGER NOT NULL,
+        volume          INTEGER NOT NULL,
+        PRIMARY KEY (ticker_id, date)
+    ) WITHOUT ROWID
+    """
+
+
+    # Migrations (version 4)
+
+    CREATE_TAB_ROLLUP_PENDING = """
+    CREATE TABLE IF NOT EXISTS rollup_pending (
+        ticker_id       INTEGER PRIMARY KEY,
+        start           INTEGER NOT NULL,
+        end             INTEGER NOT NULL
+    )
+    """
+
+
+    # Migrations (version 5)
+
+    CREATE_TAB_INTRADAY_BLOCK = """
+    CREATE TABLE IF NOT EXISTS intraday_block (
+        ticker_id       INTEGER NOT NULL,
+        day             INTEGER NOT NULL,
+        first           INTEGER NOT NULL,
+        last            INTEGER NOT NULL,
+        rows            INTEGER NOT NULL,
+        data            BLOB    NOT NULL,
+        PRIMARY KEY (ticker_id, day),
+        FOREIGN KEY (ticker_id) REFERENCES listing (id) ON DELETE CASCADE
+    )
+    """
+
+
+    # Migrations (version 6)
+
+    CREATE_TAB_RETENTION = """
+    CREATE TABLE IF NOT EXISTS retention (
+        name            TEXT    PRIMARY KEY,
+        before          INTEGER NOT NULL
+    )
+    """
+
+
+    # Migrations (version 7)
+
+    CREATE_TAB_SCRAPE_JOB = """
+    CREATE TABLE IF NOT EXISTS scrape_job (
+        id              INTEGER PRIMARY KEY,
+        ticker_id       INTEGER NOT NULL,
+        interval        TEXT    NOT NULL,
+        start           INTEGER NOT NULL,
+        end             INTEGER NOT NULL,
+        state           TEXT    NOT NULL    DEFAULT 'pending',
+        attempts        INTEGER NOT NULL    DEFAULT 0,
+        created         INTEGER NOT NULL,
+        FOREIGN KEY (ticker_id) REFERENCES listing (id) ON DELETE CASCADE
+    )
+    """
+
+    CREATE_IDX_SCRAPE_JOB_STATE = """
+    CREATE INDEX IF NOT EXISTS scrape_job_state ON scrape_job (interval, state)
+    """
+
+    CREATE_IDX_SCRAPE_JOB_TICKER = """
+    CREATE INDEX IF NOT EXISTS scrape_job_ticker ON scrape_job (ticker_id, interval, start)
+    """
+
+
+    # Migrations (version 8)
+
+    CREATE_TAB_WATCHLIST = """
+    CREATE TABLE IF NOT EXISTS watchlist (
+        ticker_id       INTEGER NOT NULL,
+        source          TEXT    NOT NULL,
+        added           INTEGER NOT NULL,
+        PRIMARY KEY (ticker_id, source),
+        FOREIGN KEY (ticker_id) REFERENCES listing (id) ON DELETE CASCADE
+    ) WITHOUT ROWID
+    """
+
+    CREATE_TAB_SCRAPE_BACKOFF = """
+    CREATE TABLE IF NOT EXISTS scrape_backoff (
+        ticker_id       INTEGER NOT NULL,
+        interval        TEXT    NOT NULL,
+        misses          INTEGER NOT NULL,
+        until           INTEGER NOT NULL,
+        PRIMARY KEY (ticker_id, interval),
+        FOREIGN KEY (ticker_id) REFERENCES listing (id) ON DELETE CASCADE
+    ) WITHOUT ROWID
+    """
+
+    ALTER_TAB_SCRAPE_JOB_ROWS = """
+    ALTER TABLE scrape_job ADD COLUMN rows INTEGER
+    """
+
+
+    # Migrations (version 9)
+
+    ALTER_TAB_SCRAPE_JOB_REQUEST_INTERVAL = """
+    ALTER TABLE scrape_job ADD COLUMN request_interval TEXT
     """
\ No newline at end of file
@@ -0,0 +1,74 @@
+import argparse
+from asx_tracker.date import Date
+from asx_tracker.database.database import Database
+from asx_tracker.utils import Utils
+
+class Maintenance():
+
+    # Static variables
+
+    RETENTION_MONTHS    = 12 # Months of 1 minute intraday data to keep (older intraday data is only kept as rollups)
+    VACUUM_SECONDS      = 30 # Seconds to spend reclaiming free space per run
+
+
+    # Maintenance
+
+    @staticmethod
+    def run(months=None, seconds=None, compact=False):
+        """
+        Applies the retention policy to intraday data, optionally compacts completed days, then reclaims free space
+
+        Parameters
+        ----------
+        months : int, optional
+            Months of 1 minute intraday data to keep, by default None (i.e. Maintenance.RETENTION_MONTHS)
+        seconds : float, optional
+            Seconds to spend reclaiming free space, by default None (i.e. Maintenance.VACUUM_SECONDS)
+        compact : bool, optional
+            Whether or not to compact completed days of intraday data into blocks, by default False
+
+        Returns
+        -------
+        tuple
+            (rows removed, bytes reclaimed)
+        """
+
+        months = Maintenance.RETENTION_MONTHS if months is None else months
+        seconds = Maintenance.VACUUM_SECONDS if seconds is None else seconds
+
+        # Retention
+        before = Date.timestamp_to_day_start(Date.timestamp_now() - months * Date.MONTH_31)
+        print(f'Removing 1 minute intraday data before {Date.timestamp_to_date_str(before)} ...')
+        count, partitions = Database.apply_retention(before)
+        print(f'{Utils.CLEAR_LINE}  complete ({count} rows and {len(partitions)} partitions removed)')
+
+        # Compaction
+        if compact:
+            print('Compacting intraday data ...')
+            print(f'{Utils.CLEAR_LINE}  complete ({Database.compact_intraday()} rows compacted)')
+
+        # Vacuum
+        print('Reclaiming free space ...')
+        reclaimed, remaining = Database.vacuum(seconds)
+        print(f'{Utils.CLEAR_LINE}  complete ({Maintenance._mib(reclaimed)} reclaimed, {Maintenance._mib(remaining)} still free)')
+        return count, reclaimed
+
+
+    # Internal
+
+    @staticmethod
+    def _mib(size):
+        return f'{size / 2**20:,.1f} MiB'
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Apply the intraday retention policy and reclaim free space')
+    parser.add_argument('--path', default='asx_tracker/database/database.db')
+    parser.add_argument('--months', type=int, default=Maintenance.RETENTION_MONTHS, help='Months of 1 minute intraday data to keep')
+    parser.add_argument('--seconds', type=float, default=Maintenance.VACUUM_SECONDS, help='Seconds to spend reclaiming free space')
+    parser.add_argument('--compact', action='store_true', help='Compact completed days of intraday data into blocks')
+    args = parser.parse_args()
+
+    Database._PATH_DB = args.path
+    Database.create_tables()
+    Maintenance.run(args.months, args.seconds, args.compact)
\ No newline at end of file
@@ -41,6 +41,8 @@ class SimulatorRunMenu(Menu):
         self.holdings = HoldingList()
         self.orders = OrderList()
         self.transactions = TransactionList()
+        self.watched = None
+        self._watch()
         self.set_title()
         self.set_subtitle()
 
@@ -65,8 +67,9 @@ class SimulatorRunMenu(Menu):
         # Tickers and amounts
         holdings_tickers = self.holdings.tickers()
         orders_tickers = self.orders.tickers()
-        tickers = list(set(holdings_tickers + orders_tickers))
-        prices = Database.fetch_multiple_live_prices(self._delayed_time(), *tickers)
+        tickers = sorted(set(holdings_tickers + orders_tickers))
+        with Database.snapshot():
+            prices = Database.fetch_multiple_live_prices(self._delayed_time(), *tickers)
         asx_value = sum([self.holdings[t].units * prices[t] for t in holdings_tickers])
 
         # Subtitle
@@ -95,6 +98,7 @@ class SimulatorRunMenu(Menu):
 
         option = Menu.select_option(self.options)
         if option == 9:
+            Database.replace_watchlist([], Database.WATCH_SIMULATOR) # Before popping, as the controller only returns once the program exits
             return controller.pop()
         print()
         if option == 1:
@@ -175,6 +179,7 @@ class SimulatorRunMenu(Menu):
         if Utils.confirm(f'Confirm cancel {order}'):
             self.transactions.add(Transaction(self.now, order, status=Transaction.STATUS_CANCELLED))
             self.orders.remove(idx)
+            self._watch()
 
 
     # Visualise
@@ -276,6 +281,18 @@ class SimulatorRunMenu(Menu):
     # Internal
 
 
+    def _watch(self):
+        """
+        Writes the tickers of open positions (holdings and pending orders) to the watchlist, so the scraper updates them first.
+        Only written when they have changed since the last write
+        """
+
+        tickers = sorted(set(self.holdings.tickers() + self.orders.tickers()))
+        if tickers != self.watched:
+            Database.replace_watchlist(tickers, Database.WATCH_SIMULATOR)
+            self.watched = tickers
+
+
     def _delayed_time(self):
         """
         Returns the delayed simulator time
@@ -350,6 +367,7 @@ class SimulatorRunMenu(Menu):
         message = f'Confirm {order} ({StrFormat.int100_to_currency_str(self.broke)} brokerage)'
         if Utils.confirm(message):
             self.orders.add(order)
+            self._watch()
 
 
     def _limit_order(self, ticker, units, order_type):
@@ -374,6 +392,7 @@ class SimulatorRunMenu(Menu):
         message = f'Confirm {order} ({StrFormat.int100_to_currency_str(self.broke)} brokerage)'
         if Utils.confirm(message):
             self.orders.add(order)
+            self._watch()
 
 
     def _advance_and_fill(self, date):
@@ -404,7 +423,8 @@ class SimulatorRunMenu(Menu):
             # Fill orders
             else:
                 tickers = self.orders.tickers()
-                prices = Database.fetch_multiple_live_prices(self.now, *tickers)
+                with Database.snapshot():
+                    prices = Database.fetch_multiple_live_prices(self.now, *tickers)
                 self._fill_all_orders(prices)
                 self.now += Date.MINUTE
 
@@ -430,6 +450,8 @@ class SimulatorRunMenu(Menu):
                 filled.append(i)
         for i in reversed(filled):
             self.orders.remove(i)
+        if filled:
+            self._watch()
 
 
     def _fill_single_order(self, order, price):
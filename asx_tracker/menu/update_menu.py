@@ -1,5 +1,7 @@
 from asx_tracker.menu.menu import Menu
+from asx_tracker.database.database import Database
 from asx_tracker.scraper import Scraper
+from asx_tracker.maintenance import Maintenance
 from asx_tracker.printer import Printer
 from asx_tracker.utils import Utils
 
@@ -10,7 +12,7 @@ class UpdateMenu(Menu):
     def __init__(self, **kwargs):
         super().__init__(
             title = "Update data",
-            options = ["Download new data", "Back"])
+            options = ["Download new data", "Watchlist", "Maintenance", "Back"])
 
 
     # Menu options
@@ -28,6 +30,10 @@ class UpdateMenu(Menu):
         option = Menu.select_option(self.options)
         if option == 1:
             UpdateMenu.download()
+        elif option == 2:
+            UpdateMenu.watchlist()
+        elif option == 3:
+            UpdateMenu.maintain()
         controller.pop()
 
 
@@ -107,4 +113,44 @@ class UpdateMenu(Menu):
         print(f'1. Open {Scraper._URL_COM}')
         print("2. Copy the destination URL of the 'ASX LISTED COMPANIES CSV' button")
         print()
-        return input('Enter destination URL: ')
\ No newline at end of file
+        return input('Enter destination URL: ')
+
+
+    # Watchlist
+
+    @staticmethod
+    def watchlist():
+        """
+        Adds or removes tickers on the watchlist, which are downloaded before other tickers
+        """
+
+        while True:
+            print()
+            tickers = Database.fetch_watchlist(Database.WATCH_USER)
+            print(f'Watchlist: {", ".join(tickers) if tickers else "empty"}')
+            ticker = input('Enter Ticker to add or remove (blank to finish): ').strip().upper()
+            if not ticker:
+                return
+            if ticker in tickers:
+                Database.remove_watchlist(ticker)
+            elif not Database.add_watchlist(ticker):
+                print(f'{ticker} is not a valid Ticker')
+
+
+    # Maintenance
+
+    @staticmethod
+    def maintain():
+        """
+        Removes intraday data older than the retention policy and reclaims free space in the database
+        """
+
+        print()
+        try:
+            Maintenance.run()
+        except Exception as e:
+            print(f'{Utils.CLEAR_LINE}  FAILED: {e}')
+
+        # Complete
+        Printer.divider()
+        input(f'Press Enter to continue')
\ No newline at end of file
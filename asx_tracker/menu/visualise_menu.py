@@ -29,6 +29,7 @@ class VisualiseMenu(Menu):
         self.plt_type = VisualiseMenu._DEF_PLT_TYPE
         self.variation = VisualiseMenu._DEF_VARIATION
         self.mav = None
+        self.bars = Plot.DEF_BARS
         self.set_options()
 
 
@@ -47,6 +48,7 @@ class VisualiseMenu(Menu):
             f'Set plot type:\t{self.plt_type}',
             f'Data variation:\t{self.variation}',
             f'Moving average:\t{fn(self.mav)}',
+            f'Maximum bars:\t{self.bars}',
             'Visualise',
             'Back'
         ]
@@ -63,7 +65,7 @@ class VisualiseMenu(Menu):
         """
 
         option = Menu.select_option(self.options)
-        if option == 8:
+        if option == 9:
             return controller.pop()
         print()
         if option == 1:
@@ -78,6 +80,8 @@ class VisualiseMenu(Menu):
             self.set_variation()
         elif option == 6:
             self.set_mav()
+        elif option == 7:
+            self.set_bars()
         else:
             self.visualise()
         self.set_options()
@@ -166,6 +170,23 @@ class VisualiseMenu(Menu):
             Printer.ack("Values should be integers, e.g. '3' or '3,5'")
 
 
+    # Bars
+
+    def set_bars(self):
+        """
+        Sets the approximate maximum number of bars to plot, which data is resampled to
+        """
+
+        txt = input('Enter maximum bars: ')
+        try:
+            val = int(txt)
+        except ValueError:
+            val = 0
+        if val <= 0:
+            return Printer.ack(f'{txt} is not valid')
+        self.bars = val
+
+
     def visualise(self):
         """
         Presents a plot with the selected settings
@@ -177,7 +198,7 @@ class VisualiseMenu(Menu):
         kwargs = {}
         if self.mav is not None: kwargs['mav'] = VisualiseMenu._str_to_mav(self.mav)
         fn = Plot.daily if self.variation == VisualiseMenu._VAR_DAILY else Plot.intraday
-        fn(self.ticker, self.start, self.end, type=VisualiseMenu._PLT_TYPES[self.plt_type], **kwargs)
+        fn(self.ticker, self.start, self.end, bars=self.bars, type=VisualiseMenu._PLT_TYPES[self.plt_type], **kwargs)
 
 
     # Internal
@@ -0,0 +1,285 @@
+import argparse
+import os
+from contextlib import nullcontext
+from datetime import datetime
+import numpy as np
+from asx_tracker.date import Date
+from asx_tracker.database.database import Database
+from asx_tracker.utils import Utils
+
+class Parquet():
+
+    # Static variables
+
+    BY_MONTH        = 'month'
+    BY_TICKER       = 'ticker'
+    BY_OPTIONS      = [BY_MONTH, BY_TICKER]
+
+    _FILE_LISTING   = 'listing.parquet'
+    _EXT            = '.parquet'
+    _TABLES         = [Database.TAB_DAILY, Database.TAB_INTRADAY]
+    _LISTING_COLS   = [Database.COL_TICKER, Database.COL_NAME, Database.COL_MGMT_PCT, Database.COL_LAST_INTRADAY, Database.COL_LAST_DAILY]
+    _BATCH          = 100000 # Rows read from a file per insert
+    _COMPRESSION    = 'zstd'
+
+
+    # Export
+
+    @staticmethod
+    def export(directory, by=BY_MONTH, verbose=True):
+        """
+        Writes listings, daily and intraday data to Parquet files in a directory, with daily and intraday data split into one file per month or ticker.
+        Each file is written one ticker at a time (as its own row group), so memory use is bounded by one ticker's rows per file
+
+        Parameters
+        ----------
+        directory : str
+            Directory to write to, holding listing.parquet and a subdirectory of files per table
+        by : str, optional
+            Parquet.BY_MONTH : one file per calendar month (e.g. intraday/2021-01.parquet)
+            Parquet.BY_TICKER : one file per ticker (e.g. intraday/CBA.parquet)
+            By default Parquet.BY_MONTH
+        verbose : bool, optional
+            Whether or not to print progress, by default True
+
+        Returns
+        -------
+        int
+            Number of daily and intraday rows written
+        """
+
+        pa, pq = Parquet._pyarrow()
+        if by not in Parquet.BY_OPTIONS:
+            raise ValueError(f'{by} is not one of {", ".join(Parquet.BY_OPTIONS)}')
+        os.makedirs(directory, exist_ok=True)
+
+        # Listings
+        rows = Database.fetch_all_listings(*Parquet._LISTING_COLS)
+        listing = pa.table({col: [row[i] for row in rows] for i, col in enumerate(Parquet._LISTING_COLS)})
+        Parquet._write(pq, os.path.join(directory, Parquet._FILE_LISTING), [listing], listing.schema)
+        tickers = [row[0] for row in rows]
+
+        # Daily and intraday
+        count = 0
+        for table in Parquet._TABLES:
+            os.makedirs(os.path.join(directory, table), exist_ok=True)
+            ranges = {t: Database.fetch_single_date_range(t, table) for t in tickers}
+            ranges = {t: r for t, r in ranges.items() if r[0] is not None}
+            if by == Parquet.BY_TICKER:
+                files = [(t, [(t, None, None)]) for t in ranges]
+            else:
+                files = [(name, [(t, start, end - 1) for t, r in ranges.items() if r[0] < end and r[1] >= start])
+                         for name, start, end in Parquet._months(ranges.values())]
+            for i, (name, parts) in enumerate(files):
+                if verbose:
+                    print(f'{Utils.CLEAR_LINE}  {int(100 * i / len(files))}% - exporting {table} for {name}', end='', flush=True)
+                chunks = (Parquet._to_table(pa, t, Parquet._fetch(table, t, start, end)) for t, start, end in parts)
+                count += Parquet._write(pq, os.path.join(directory, table, f'{name}{Parquet._EXT}'), chunks, Parquet._schema(pa))
+        return count
+
+
+    # Import
+
+    @staticmethod
+    def import_(directory, verbose=True):
+        """
+        Loads listings, daily and intraday data from Parquet files written by Parquet.export.
+        Each file is read in batches of Parquet._BATCH rows and inserted in one transaction (or one per batch if its dates span too many partitions), and existing rows are kept
+
+        Parameters
+        ----------
+        directory : str
+            Directory written by Parquet.export
+        verbose : bool, optional
+            Whether or not to print progress, by default True
+
+        Returns
+        -------
+        int
+            Number of daily and intraday rows inserted
+        """
+
+        _, pq = Parquet._pyarrow()
+
+        # Listings (rows from other tables refer to them)
+        Database.insert_listings(pq.read_table(os.path.join(directory, Parquet._FILE_LISTING)).to_pandas())
+
+        # Daily and intraday
+        count = 0
+        for table in Parquet._TABLES:
+            table_dir = os.path.join(directory, table)
+            files = sorted(f for f in os.listdir(table_dir) if f.endswith(Parquet._EXT)) if os.path.isdir(table_dir) else []
+            insert = Database.insert_intraday if table == Database.TAB_INTRADAY else Database.insert_daily
+            for i, name in enumerate(files):
+                if verbose:
+                    print(f'{Utils.CLEAR_LINE}  {int(100 * i / len(files))}% - importing {table} from {name}', end='', flush=True)
+                pf = pq.ParquetFile(os.path.join(table_dir, name))
+                start, end = Parquet._date_range(pf)
+                if start is None:
+                    continue
+                if table == Database.TAB_DAILY:
+                    start = end = None
+                with Database.transaction(start, end) if Database._fits_transaction(start, end) else nullcontext():
+                    for batch in pf.iter_batches(batch_size=Parquet._BATCH):
+                        count += insert(batch.to_pandas())
+        if verbose:
+            print(f'{Utils.CLEAR_LINE}  updating rollups', end='', flush=True)
+        Database.refresh_rollups()
+        return count
+
+
+    # Internal
+
+    @staticmethod
+    def _pyarrow():
+        """
+        Imports pyarrow, which is only required for Parquet export and import
+
+        Returns
+        -------
+        tuple
+            (pyarrow, pyarrow.parquet) modules
+
+        Raises
+        ------
+        ImportError
+            If pyarrow is not installed
+        """
+
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError('Parquet export and import require pyarrow (pip install pyarrow)') from None
+        return pyarrow, pyarrow.parquet
+
+
+    @staticmethod
+    def _schema(pa):
+        types = {np.dtype(np.int32): pa.int32(), np.dtype(np.int64): pa.int64()}
+        fields = [(Database.COL_TICKER, pa.string())]
+        fields += [(col, types[Database.BAR_DTYPE[col]]) for col in Database.BAR_DTYPE.names]
+        return pa.schema(fields)
+
+
+    @staticmethod
+    def _fetch(table, ticker, start, end):
+        if table == Database.TAB_INTRADAY:
+            return Database.fetch_single_intraday_array(ticker, start=start, end=end)
+        return Database.fetch_single_daily_array(ticker, start=start, end=end)
+
+
+    @staticmethod
+    def _to_table(pa, ticker, data):
+        """
+        Converts a ticker's structured array of Database.BAR_DTYPE into an Arrow table of Parquet._schema
+        """
+
+        columns = {Database.COL_TICKER: pa.array([ticker] * len(data), type=pa.string())}
+        columns.update({col: pa.array(data[col]) for col in Database.BAR_DTYPE.names})
+        return pa.table(columns, schema=Parquet._schema(pa))
+
+
+    @staticmethod
+    def _write(pq, path, tables, schema):
+        """
+        Writes Arrow tables to a Parquet file as one row group each, replacing the file only once it is complete
+
+        Parameters
+        ----------
+        pq : module
+            pyarrow.parquet
+        path : str
+            Path of the file
+        tables : iterable
+            Arrow tables to write
+        schema : pyarrow.Schema
+            Schema of the tables
+
+        Returns
+        -------
+        int
+            Number of rows written
+        """
+
+        count = 0
+        tmp = f'{path}.tmp'
+        with pq.ParquetWriter(tmp, schema, compression=Parquet._COMPRESSION) as writer:
+            for table in tables:
+                if table.num_rows:
+                    writer.write_table(table)
+                    count += table.num_rows
+        os.replace(tmp, path)
+        return count
+
+
+    @staticmethod
+    def _date_range(pf):
+        """
+        Returns the first and last dates in a Parquet file, from its row group statistics where available
+
+        Parameters
+        ----------
+        pf : pyarrow.parquet.ParquetFile
+            File to read
+
+        Returns
+        -------
+        tuple
+            (first date, last date), or (None, None) if the file is empty
+        """
+
+        col = pf.schema_arrow.get_field_index(Database.COL_DATE)
+        stats = [pf.metadata.row_group(i).column(col).statistics for i in range(pf.metadata.num_row_groups)]
+        if not stats:
+            return None, None
+        if all(s is not None and s.has_min_max for s in stats):
+            return min(s.min for s in stats), max(s.max for s in stats)
+        dates = pf.read(columns=[Database.COL_DATE]).column(0).to_numpy()
+        return (int(dates.min()), int(dates.max())) if len(dates) else (None, None)
+
+
+    @staticmethod
+    def _months(ranges):
+        """
+        Returns the calendar months (in Sydney time) covering date ranges
+
+        Parameters
+        ----------
+        ranges : iterable
+            (first date, last date) of each range
+
+        Returns
+        -------
+        list
+            (name, start, exclusive end) of each month, e.g. ('2021-01', ...)
+        """
+
+        ranges = list(ranges)
+        if not ranges:
+            return []
+        first = Date.timestamp_to_datetime(min(r[0] for r in ranges))
+        last = Date.timestamp_to_datetime(max(r[1] for r in ranges))
+        start = lambda i: int(Date._TZ_SYDNEY_INFO.localize(datetime(i // 12, i % 12 + 1, 1)).timestamp())
+        indexes = range(first.year * 12 + first.month - 1, last.year * 12 + last.month)
+        return [(f'{i // 12}-{i % 12 + 1:02d}', start(i), start(i + 1)) for i in indexes]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Export or import the price database as Parquet files')
+    parser.add_argument('command', choices=['export', 'import'])
+    parser.add_argument('directory', help='Directory of Parquet files')
+    parser.add_argument('--path', default='asx_tracker/database/database.db')
+    parser.add_argument('--by', choices=Parquet.BY_OPTIONS, default=Parquet.BY_MONTH, help='Split exported data into one file per month or ticker')
+    args = parser.parse_args()
+
+    Database._PATH_DB = args.path
+    Database.create_tables()
+    if args.command == 'export':
+        print(f'Exporting to {args.directory} ...')
+        count = Parquet.export(args.directory, args.by)
+        print(f'{Utils.CLEAR_LINE}  complete ({count} rows exported)')
+    else:
+        print(f'Importing from {args.directory} ...')
+        count = Parquet.import_(args.directory)
+        print(f'{Utils.CLEAR_LINE}  complete ({count} rows imported)')
\ No newline at end of file
@@ -1,9 +1,7 @@
 import mplfinance
-import pandas as pd
 from asx_tracker.date import Date
 from asx_tracker.database.database import Database
 from asx_tracker.printer import Printer
-from asx_tracker.utils import Utils
 
 class Plot():
 
@@ -15,6 +13,9 @@ class Plot():
     _COL_CLOSE      = 'Close'
     _COL_VOL        = 'Volume'
     _DEF_TYPE       = 'line'
+    DEF_BARS        = 800 # Roughly one bar per horizontal pixel of the plot
+    _BAR_SIZES      = [Date.MINUTE, 5 * Date.MINUTE, 15 * Date.MINUTE, 30 * Date.MINUTE, Date.HOUR, 2 * Date.HOUR, Date.DAY, Date.WEEK, 4 * Date.WEEK]
+    _RENAME_COLS    = {Database.COL_OPEN: _COL_OPEN, Database.COL_HIGH: _COL_HIGH, Database.COL_LOW: _COL_LOW, Database.COL_CLOSE: _COL_CLOSE, Database.COL_VOL: _COL_VOL}
 
     _PERIOD_1D      = '1 day'
     _PERIOD_1W      = '1 week'
@@ -30,7 +31,7 @@ class Plot():
     # Plot intraday
 
     @staticmethod
-    def intraday(ticker, start, end, **kwargs):
+    def intraday(ticker, start, end, bars=None, **kwargs):
         """
         Plots intraday data for a ticker
 
@@ -42,21 +43,23 @@ class Plot():
             Timestamp of start date of the plot
         end : int
             Timestamp of end date of the plot
+        bars : int, optional
+            Approximate maximum number of bars to plot, by default None (i.e. Plot.DEF_BARS)
         """
 
-        Plot._plot_intraday_or_daily(ticker, Database.fetch_single_intraday, start, end, **kwargs)
+        Plot._plot_intraday_or_daily(ticker, Database.TAB_INTRADAY, start, end, bars, **kwargs)
 
 
     # Plot daily
 
     @staticmethod
-    def daily(ticker, start, end, **kwargs):
+    def daily(ticker, start, end, bars=None, **kwargs):
         """
         Plots daily data for a ticker.
         See Plot.intraday
         """
 
-        Plot._plot_intraday_or_daily(ticker, Database.fetch_single_daily, start, end, **kwargs)
+        Plot._plot_intraday_or_daily(ticker, Database.TAB_DAILY, start, end, bars, **kwargs)
 
 
     # Periods
@@ -158,7 +161,7 @@ class Plot():
     # Internal
 
     @staticmethod
-    def _plot_intraday_or_daily(ticker, fetch_fn, start, end, **kwargs):
+    def _plot_intraday_or_daily(ticker, table, start, end, bars=None, **kwargs):
         """
         Plots one of intraday or daily data for a ticker
 
@@ -166,13 +169,15 @@ class Plot():
         ----------
         ticker : str
             Ticker to plot data for
-        fetch_fn : function
-            Database.fetch_single_intraday : if plotting intraday data
-            Database.fetch_single_daily : if plotting daily data
+        table : str
+            Database.TAB_INTRADAY : if plotting intraday data
+            Database.TAB_DAILY : if plotting daily data
         start : int
             Timestamp of start date of the plot
         end : int
             Timestamp of end date of the plot
+        bars : int, optional
+            See Plot.intraday
 
         Returns
         -------
@@ -180,7 +185,7 @@ class Plot():
             Whether or not data was found for the specified ticker and dates
         """
 
-        df = Plot._fetch_intraday_or_daily(ticker, fetch_fn, start, end)
+        df = Plot._fetch_intraday_or_daily(ticker, table, start, end, bars)
         if df is None:
             Printer.ack(f'No data found for {ticker} between the specified dates')
         else:
@@ -189,7 +194,7 @@ class Plot():
 
 
     @staticmethod
-    def _plot_period_long(ticker, start, end, **kwargs):
+    def _plot_period_long(ticker, start, end, bars=None, **kwargs):
         """
         Plots data across a period for a ticker
 
@@ -201,34 +206,38 @@ class Plot():
             Timestamp of start date of the plot
         end : int
             Timestamp of end date of the plot
+        bars : int, optional
+            See Plot.intraday
         """
 
         # Market closed
         if not Date.market_open(end):
             daily_end = Date.timestamp_to_day_end(end) if Date.after_close(end) else Date.timestamp_to_prev_day_end(end)
-            return Plot.daily(ticker, start, daily_end, **kwargs)
+            return Plot.daily(ticker, start, daily_end, bars, **kwargs)
 
         # Market open
         daily_end = Date.timestamp_to_prev_day_end(end)
-        intraday_date, intraday_price = Database.fetch_single_live_intraday(ticker, end)
+        with Database.snapshot([ticker]):
+            intraday_date, intraday_price = Database.fetch_single_live_intraday(ticker, end)
+            recent = intraday_date is not None and Date.same_day(end, intraday_date)
+            df = Plot._fetch_intraday_or_daily(ticker, Database.TAB_DAILY, start, daily_end, bars) if recent else None
 
         # No recent intraday
-        if intraday_date is None or not Date.same_day(end, intraday_date):
-            return Plot.daily(ticker, start, daily_end, **kwargs)
+        if not recent:
+            return Plot.daily(ticker, start, daily_end, bars, **kwargs)
 
         # Recent intraday
-        df = Plot._fetch_intraday_or_daily(ticker, Database.fetch_single_daily, start, daily_end)
         if df is None:
-            return Plot.intraday(ticker, start, end, **kwargs)
+            return Plot.intraday(ticker, start, end, bars, **kwargs)
         div_price = intraday_price / 100
         df.loc[Date.timestamp_to_datetime(intraday_date)] = {k: 0 if k == Plot._COL_VOL else div_price for k in df.columns}
         Plot._plot(df, title=ticker, **kwargs)
 
 
     @staticmethod
-    def _fetch_intraday_or_daily(ticker, fetch_fn, start, end):
+    def _fetch_intraday_or_daily(ticker, table, start, end, bars=None):
         """
-        Fetches a DataFrame of intraday or daily data for a ticker
+        Fetches a DataFrame of intraday or daily data for a ticker, resampled in the database to about Plot.DEF_BARS bars
 
         Parameters
         ----------
@@ -240,20 +249,46 @@ class Plot():
             DataFrame with intraday or daily data for a ticker if data is found, else None
         """
 
-        fetch_cols = [Database.COL_DATE, Database.COL_OPEN, Database.COL_HIGH, Database.COL_LOW, Database.COL_CLOSE, Database.COL_VOL]
-        data = fetch_fn(ticker, *fetch_cols, start=start, end=end)
-        if len(data) == 0:
-            return
-        plot_cols = [Database.COL_DATE, Plot._COL_OPEN, Plot._COL_HIGH, Plot._COL_LOW, Plot._COL_CLOSE, Plot._COL_VOL]
-        df = pd.DataFrame(data, columns=plot_cols)
-        for col in [Plot._COL_OPEN, Plot._COL_HIGH, Plot._COL_LOW, Plot._COL_CLOSE]:
-            df[col] /= 100
-        new_dates = Date.timestamp_to_datetime(*df[Database.COL_DATE])
-        df[Database.COL_DATE] = new_dates if Utils.has_len(new_dates) else [new_dates]
-        df.set_index(Database.COL_DATE, inplace=True)
+        with Database.snapshot([ticker]):
+            first, last = Database.fetch_single_date_range(ticker, table, start, end)
+            if first is None:
+                return
+            bucket = Plot._bar_size(table, first, last, bars)
+            df = Database.fetch_bars_frame(ticker, first, last, bucket, table=table)
+        df = df.rename(columns=Plot._RENAME_COLS)
+        prices = [Plot._COL_OPEN, Plot._COL_HIGH, Plot._COL_LOW, Plot._COL_CLOSE]
+        df[prices] = df[prices] / 100
         return df
 
 
+    @staticmethod
+    def _bar_size(table, start, end, bars=None):
+        """
+        Returns the smallest bar size that shows the trading time between two dates in about the given number of bars
+
+        Parameters
+        ----------
+        See Plot._plot_intraday_or_daily
+
+        Returns
+        -------
+        int
+            Bar size in seconds
+        """
+
+        # Trading time (intraday data only covers trading hours, and neither covers weekends)
+        span = end - start
+        if table == Database.TAB_INTRADAY and span >= Date.DAY:
+            span *= (Date.HOUR_CLOSE - Date.HOUR_OPEN) * Date.HOUR / Date.DAY
+        if span >= Date.WEEK:
+            span *= 5 / 7
+
+        bars = Plot.DEF_BARS if bars is None else bars
+        native = Date.DAY if table == Database.TAB_DAILY else Date.MINUTE
+        target = span / bars
+        return next((size for size in Plot._BAR_SIZES if size >= max(target, native)), Plot._BAR_SIZES[-1])
+
+
     @staticmethod
     def _plot(df, block=True, **kwargs):
         """
@@ -0,0 +1,182 @@
+import threading
+from time import monotonic
+from asx_tracker.token_bucket import TokenBucket
+
+class CircuitOpenError(Exception):
+    """
+    Raised when requests keep failing after the circuit has been opened RateController.max_opens times in a row
+    """
+
+
+class RateController():
+
+    # Static variables
+
+    CLOSED          = 'closed'
+    OPEN            = 'open'
+    HALF_OPEN       = 'half open'
+
+    _INCREASE       = 0.05 # Fraction of the ceiling added to the rate after each healthy response
+    _DECREASE       = 0.5 # Factor the rate is multiplied by after each throttled or failed response
+    _LATENCY_SPIKE  = 3.0 # Responses this many times slower than the average are treated as a sign of overload
+    _LATENCY_WEIGHT = 0.1 # Weight of each response in the average latency
+
+
+    # Constructor
+
+    def __init__(self, ceiling, floor=None, failures=5, cooldown=15.0, max_opens=4):
+        """
+        Adaptive rate limiter shared by threads, with a circuit breaker.
+        The rate increases additively toward the ceiling while responses are healthy and halves on throttling, errors or latency spikes.
+        After repeated failures the circuit opens, pausing every request for a cooldown (doubling each time it reopens), then lets one probe request through
+
+        Parameters
+        ----------
+        ceiling : float
+            Most requests per second
+        floor : float, optional
+            Fewest requests per second, by default None (i.e. ceiling / 16)
+        failures : int, optional
+            Consecutive failures that open the circuit, by default 5
+        cooldown : float, optional
+            Seconds the circuit stays open the first time, by default 15.0
+        max_opens : int, optional
+            Times in a row the circuit can open before requests raise CircuitOpenError, by default 4
+        """
+
+        self._cond = threading.Condition()
+        self.ceiling = ceiling
+        self.floor = ceiling / 16 if floor is None else floor
+        self.failures = failures
+        self.cooldown = cooldown
+        self.max_opens = max_opens
+        self.bucket = TokenBucket(ceiling)
+        self.state = RateController.CLOSED
+        self.opens = 0
+        self.latency = None
+        self._failed = 0
+        self._open_until = 0.0
+        self._resume = 0.0
+        self._probing = False
+
+
+    # Requests
+
+    def acquire(self):
+        """
+        Waits until a request may be sent: the circuit is closed (or this is the probe of a half open circuit), any Retry-After pause is over and a token is available.
+        Every acquire must be followed by one of RateController.success, RateController.throttled or RateController.failure
+
+        Returns
+        -------
+        float
+            Seconds waited for a token
+
+        Raises
+        ------
+        CircuitOpenError
+            If the circuit has opened too many times in a row
+        """
+
+        with self._cond:
+            while True:
+                if self.opens > self.max_opens:
+                    raise CircuitOpenError(f'Requests kept failing after pausing {self.max_opens} times')
+                now = monotonic()
+                if self.state == RateController.OPEN:
+                    if now < self._open_until:
+                        self._cond.wait(self._open_until - now)
+                        continue
+                    self.state = RateController.HALF_OPEN
+                    self._probing = False
+                if self.state == RateController.HALF_OPEN:
+                    if self._probing:
+                        self._cond.wait()
+                        continue
+                    self._probing = True
+                if now < self._resume:
+                    self._cond.wait(self._resume - now)
+                    continue
+                break
+        return self.bucket.acquire()
+
+
+    def success(self, latency):
+        """
+        Records a healthy response, closing the circuit and increasing the rate (or decreasing it if the response was unusually slow)
+
+        Parameters
+        ----------
+        latency : float
+            Seconds the response took
+        """
+
+        with self._cond:
+            self._close()
+            spike = self.latency is not None and latency > self.latency * RateController._LATENCY_SPIKE
+            self.latency = latency if self.latency is None else self.latency + RateController._LATENCY_WEIGHT * (latency - self.latency)
+            if spike:
+                self._decrease()
+            else:
+                self.bucket.set_rate(min(self.ceiling, self.bucket.rate + self.ceiling * RateController._INCREASE))
+
+
+    def throttled(self, retry_after=None):
+        """
+        Records a response asking for fewer requests (e.g. status code 429), decreasing the rate
+
+        Parameters
+        ----------
+        retry_after : float, optional
+            Seconds every request should wait, by default None
+        """
+
+        with self._cond:
+            self._close()
+            self._decrease()
+            if retry_after:
+                self._resume = max(self._resume, monotonic() + retry_after)
+
+
+    def failure(self):
+        """
+        Records a failed request (e.g. status code 5xx, an outage page or no connection), decreasing the rate and opening the circuit if failures keep happening
+        """
+
+        with self._cond:
+            if self.state == RateController.OPEN:
+                return # Sent before the circuit opened
+            self._decrease()
+            self._failed += 1
+            if self.state == RateController.HALF_OPEN or self._failed >= self.failures:
+                self.opens += 1
+                self.state = RateController.OPEN
+                self._open_until = monotonic() + self.cooldown * 2 ** (self.opens - 1)
+                self._failed = 0
+                self._probing = False
+                self._cond.notify_all()
+
+
+    def reset(self):
+        """
+        Closes the circuit and forgets past failures, keeping the current rate
+        """
+
+        with self._cond:
+            self._close()
+            self._resume = 0.0
+
+
+    # Internal
+
+    def _close(self):
+        self._failed = 0
+        if self.state != RateController.CLOSED or self.opens:
+            self.state = RateController.CLOSED
+            self.opens = 0
+            self._probing = False
+            self._cond.notify_all()
+
+
+    def _decrease(self):
+        self.bucket.set_rate(max(self.floor, self.bucket.rate * RateController._DECREASE))
\ No newline at end of file
@@ -1,9 +1,23 @@
+import io
+import queue
+import threading
+from collections import Counter
+from functools import partial
+import numpy as np
 import pandas as pd
-from time import sleep, time
 import requests
+from time import perf_counter
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from asx_tracker.database.database import Database
+from asx_tracker.rate_controller import RateController, CircuitOpenError
 from asx_tracker.utils import Utils
 from asx_tracker.date import Date
+from asx_tracker.str_format import StrFormat
+try:
+    from orjson import loads as json_loads # Optional, faster JSON decoding
+except ImportError:
+    from json import loads as json_loads
 
 class Scraper():
 
@@ -22,12 +36,17 @@ class Scraper():
     _COL_API_LOW        = 'low'
     _COL_API_CLOSE      = 'close'
     _COL_API_VOL        = 'volume'
+    _API_COLS           = {_COL_API_OPEN: Database.COL_OPEN, _COL_API_HIGH: Database.COL_HIGH, _COL_API_LOW: Database.COL_LOW, _COL_API_CLOSE: Database.COL_CLOSE, _COL_API_VOL: Database.COL_VOL}
+    _PRICE_COLS         = [Database.COL_OPEN, Database.COL_HIGH, Database.COL_LOW, Database.COL_CLOSE]
 
+    _URL_YFINANCE       = 'https://query2.finance.yahoo.com'
     _URL_COM            = 'https://www2.asx.com.au/markets/trade-our-cash-market/directory'
     _URL_ETP            = 'https://www2.asx.com.au/markets/trade-our-cash-market/asx-investment-products-directory/etps'
 
     _INTERVAL_DAILY     = '1d'
     _INTERVAL_INTRADAY  = '1m'
+    _INTERVAL_ROLLUPS   = {'1h': Database.ROLLUP_1H, '5m': Database.ROLLUP_5M} # Coarser intervals kept longer than 1 minute data, saved to rollups (oldest first)
+    _INTERVAL_HISTORY   = {'1m': (Date.timestamp_30_days, Date.WEEK), '5m': (Date.timestamp_60_days, 60 * Date.DAY), '1h': (Date.timestamp_730_days, 730 * Date.DAY)} # (earliest date fn, most seconds per request)
     _RANGE_DAILY        = '10y'
     _PARAM_START        = 'period1'
     _PARAM_END          = 'period2'
@@ -37,8 +56,54 @@ class Scraper():
     _TICKER_EXT         = '.AX'
     _METHOD_DAILY       = 'daily'
     _METHOD_INTRADAY    = 'intraday'
-    _SCRAPE_ATTEMPTS    = 2
+    _SCRAPE_ATTEMPTS    = 3 # Retries are paced by Scraper._rate, which slows down after failures
     _RATE_LIMIT         = 2.0 # Seconds (<1.8 will cause IP banning i.e. 2000 per hour)
+    _WORKERS            = 4 # Jobs scraped at once (requests still share one rate limit)
+    _COMMIT_PERIODS     = 50 # Scraped periods saved in one transaction
+    _JOB_ATTEMPTS       = 3 # Downloads a failed job is retried in before it is given up on
+    _JOB_WAIT           = 0.1 # Seconds a worker waits before looking for a claimable job again
+    _PLAN_AGE           = Date.DAY # Unfinished plans older than this are replanned, since Yahoo! Finance only keeps 30 days of 1 minute data
+    _BACKOFF            = Date.DAY # Seconds a ticker that returned nothing is left out of downloads, doubling each time it happens in a row
+    _MAX_BACKOFF        = 32 * Date.DAY
+    _MISS_WINDOW        = Date.WEEK # Tickers only count as returning nothing over windows this long, since shorter ones can hold no trading days
+    _VOLUME_PERIOD      = 30 * Date.DAY # Seconds of daily volume tickers are prioritised by
+
+    _TIMEOUT            = (5, 30) # Seconds to connect and to wait between bytes received
+    _CONNECT_RETRIES    = 2 # Retries of requests that failed before reaching the server (others are retried by Scraper._repeat_scrape_period, at the rate limit)
+    _RETRY_BACKOFF      = 0.5 # Seconds before the first connection retry, doubling after each
+
+    _rate               = RateController(1 / _RATE_LIMIT) # Shared by every Yahoo! Finance request, slowing down when Yahoo! Finance struggles
+    _session            = None
+    _session_lock       = threading.Lock()
+
+
+    # Sources
+
+    @staticmethod
+    def use_urls(yfinance=None, etp=None, com=None):
+        """
+        Points the scraper at other servers (e.g. a local stand-in for benchmarks), leaving any URL not given unchanged
+
+        Parameters
+        ----------
+        yfinance : str, optional
+            Base URL of the Yahoo! Finance chart API, by default None
+        etp : str, optional
+            URL of the ASX page listing exchange traded products, by default None
+        com : str, optional
+            URL of the ASX page linking to the CSV of companies, by default None
+
+        Returns
+        -------
+        dict
+            Previous URLs, as keyword arguments that restore them
+        """
+
+        previous = {'yfinance': Scraper._URL_YFINANCE, 'etp': Scraper._URL_ETP, 'com': Scraper._URL_COM}
+        Scraper._URL_YFINANCE = yfinance or Scraper._URL_YFINANCE
+        Scraper._URL_ETP = etp or Scraper._URL_ETP
+        Scraper._URL_COM = com or Scraper._URL_COM
+        return previous
 
 
     # Scrape ETFs
@@ -54,7 +119,7 @@ class Scraper():
             DataFrame of ASX ETFs
         """
 
-        dfs = pd.read_html(Scraper._URL_ETP, header=0)
+        dfs = pd.read_html(io.StringIO(Scraper._get(Scraper._URL_ETP).text), header=0)
         df = pd.concat([df[[Scraper._COL_ETP_TICKER,Scraper._COL_ETP_NAME,Scraper._COL_ETP_MGMT_PCT]][df[Scraper._COL_ETP_TYPE] == 'ETF'] for df in dfs], axis=0)
         df.rename(columns={Scraper._COL_ETP_TICKER: Database.COL_TICKER, Scraper._COL_ETP_NAME: Database.COL_NAME, Scraper._COL_ETP_MGMT_PCT: Database.COL_MGMT_PCT}, inplace=True)
         df[Database.COL_TICKER] = df[Database.COL_TICKER].str.upper()
@@ -83,7 +148,7 @@ class Scraper():
             DataFrame of ASX companies
         """
 
-        df = pd.read_csv(url, header=0)[[Scraper._COL_COM_TICKER, Scraper._COL_COM_NAME, Scraper._COL_COM_LIST_DATE]]
+        df = pd.read_csv(io.StringIO(Scraper._get(url).text), header=0)[[Scraper._COL_COM_TICKER, Scraper._COL_COM_NAME, Scraper._COL_COM_LIST_DATE]]
         df.dropna(subset=[Scraper._COL_COM_LIST_DATE], inplace=True)
         df.drop(Scraper._COL_COM_LIST_DATE, axis=1, inplace=True)
         df.rename(columns={Scraper._COL_COM_TICKER: Database.COL_TICKER, Scraper._COL_COM_NAME: Database.COL_NAME}, inplace=True)
@@ -106,7 +171,10 @@ class Scraper():
             Number of entries saved
         """
 
-        return Scraper._download_intraday_or_daily(Scraper._download_ticker_intraday, Database.COL_LAST_INTRADAY, Scraper._INTERVAL_INTRADAY)
+        count = Scraper._download_intraday_or_daily(Scraper._plan_intraday, Database.COL_LAST_INTRADAY, Scraper._INTERVAL_INTRADAY)
+        print(f'{Utils.CLEAR_LINE}  100% ({count} added) - updating rollups', end='', flush=True)
+        Database.refresh_rollups()
+        return count
 
 
     # Scrape daily
@@ -122,21 +190,26 @@ class Scraper():
             Number of entries saved
         """
 
-        return Scraper._download_intraday_or_daily(Scraper._download_ticker_daily, Database.COL_LAST_DAILY, Scraper._INTERVAL_DAILY)
+        return Scraper._download_intraday_or_daily(Scraper._plan_daily, Database.COL_LAST_DAILY, Scraper._INTERVAL_DAILY)
 
 
     # Internal
 
     @staticmethod
-    def _download_intraday_or_daily(scrape_fn, date_col, interval):
+    def _download_intraday_or_daily(plan_fn, date_col, interval):
         """
-        Scrapes and saves all intraday or daily data
+        Scrapes and saves all intraday or daily data.
+        The windows to scrape are planned as jobs in the database first, so an interrupted download resumes with the jobs it had left.
+        Jobs are planned in priority order (see Database.fetch_scrape_schedule), leaving out tickers that kept returning nothing until their back off ends.
+        Scraper._WORKERS workers claim jobs at once, so network latency overlaps the wait for the rate limit instead of adding to it.
+        Scraped periods are held in memory and saved Scraper._COMMIT_PERIODS at a time, so the database is only locked while saving, not while waiting on requests.
+        If Yahoo! Finance stays unavailable (see RateController), the run stops after saving what was already scraped
 
         Parameters
         ----------
-        scrape_fn : fn
-            Scraper._download_ticker_intraday: Scrape intraday data
-            Scraper._download_ticker_daily: Scrape daily data
+        plan_fn : fn
+            Scraper._plan_intraday: Scrape intraday data
+            Scraper._plan_daily: Scrape daily data
         date_col : str
             Database.COL_LAST_INTRADAY: Scrape intraday data
             Database.COL_LAST_DAILY: Scrape daily data
@@ -148,126 +221,276 @@ class Scraper():
         -------
         int
             Number of entries saved
+
+        Raises
+        ------
+        CircuitOpenError
+            If Yahoo! Finance stays unavailable
         """
 
-        # Setup data
-        count = 0
-        data = Database.fetch_all_listings(Database.COL_TICKER, date_col)
-        len_data = len(data)
-        params = {Scraper._PARAM_INTERVAL: interval}
+        # Plan
+        Scraper._rate.reset()
+        left = Database.resume_scrape_jobs(interval, Scraper._JOB_ATTEMPTS, Date.timestamp_now() - Scraper._PLAN_AGE)
+        if left:
+            print(f'{Utils.CLEAR_LINE}  resuming previous download ({left} requests left)')
+        else:
+            now = Date.timestamp_now()
+            with Database.transaction():
+                Database.update_scrape_backoff(interval, now, Scraper._BACKOFF, Scraper._MAX_BACKOFF, Scraper._MISS_WINDOW)
+                listings = Database.fetch_scrape_schedule(interval, date_col, now, now - Scraper._VOLUME_PERIOD)
+                jobs = [(ticker, *window) for ticker, last_save in listings for window in plan_fn(last_save, now)]
+                Database.plan_scrape_jobs(interval, jobs)
+            Scraper._print_plan(jobs)
 
         # Scrape
-        for i, (ticker, last_save) in enumerate(data):
-            pct_complete = int(100 * i / len_data)
-            print(f'{Utils.CLEAR_LINE}  {pct_complete}% ({count} added) - currently downloading {ticker}', end='', flush=True)
-            count += scrape_fn(ticker, last_save, params)
+        count = 0
+        pending = []
+        results = queue.Queue()
+        stop = threading.Event()
+        workers = [threading.Thread(target=Scraper._work, args=(interval, results, stop), daemon=True) for _ in range(Scraper._WORKERS)]
+        for worker in workers:
+            worker.start()
+        progress = Database.fetch_scrape_progress(interval)
+        finished = progress[Database.JOB_DONE] + progress[Database.JOB_FAILED]
+        start_time = perf_counter()
+        try:
+            running = len(workers)
+            while running:
+                result = results.get()
+                if result is None:
+                    running -= 1
+                    continue
+                if isinstance(result, CircuitOpenError):
+                    raise result
+                job_id, ticker, data, request_interval = result
+                if job_id is not None:
+                    pending.append((job_id, ticker, Scraper._insert_fn(request_interval), data, date_col))
+                if len(pending) >= Scraper._COMMIT_PERIODS:
+                    count += Scraper._commit(pending)
+                Scraper._print_progress(interval, count, ticker, finished, start_time)
+        except (CircuitOpenError, KeyboardInterrupt):
+            Scraper._commit(pending) # Keep what was scraped, the remaining jobs are resumed by the next download
+            raise
+        finally:
+            stop.set()
+            for worker in workers:
+                worker.join(Scraper._TIMEOUT[1]) # A worker left behind could claim jobs of the next download
+
+        return count + Scraper._commit(pending)
 
-        return count
+
+    @staticmethod
+    def _work(interval, results, stop):
+        """
+        Claims and scrapes jobs on a worker thread until there are none left to claim
+
+        Parameters
+        ----------
+        interval : str
+            Interval of the data to scrape
+        results : queue.Queue
+            Receives (job id, ticker, scraped data, request interval) of each scraped job ((None, ticker, None, None) for failed jobs),
+            the CircuitOpenError if Yahoo! Finance stays unavailable, then None once the worker stops
+        stop : threading.Event
+            Set to stop claiming jobs and drop the results of jobs in progress
+        """
+
+        try:
+            while not stop.is_set():
+                job = Database.claim_scrape_job(interval)
+                if job is None:
+                    if Database.fetch_scrape_progress(interval)[Database.JOB_RUNNING] == 0:
+                        return
+                    stop.wait(Scraper._JOB_WAIT) # Another worker's job may make the next window of its ticker claimable
+                    continue
+                job_id, ticker, start, end, request_interval = job
+                params = {Scraper._PARAM_INTERVAL: request_interval, Scraper._PARAM_START: start, Scraper._PARAM_END: end}
+                try:
+                    data = Scraper._repeat_scrape_period(ticker, params)
+                except CircuitOpenError:
+                    raise
+                except Exception as e:
+                    if stop.is_set():
+                        return
+                    print(f'{Utils.CLEAR_LINE}  FAILED: {ticker} - {e} ')
+                    Database.update_scrape_job(job_id, Database.JOB_FAILED)
+                    results.put((None, ticker, None, None))
+                    continue
+                if stop.is_set():
+                    return # Left running, so the next download scrapes it again
+                Database.update_scrape_job(job_id, Database.JOB_SCRAPED)
+                results.put((job_id, ticker, data, request_interval))
+        except CircuitOpenError as e:
+            results.put(e)
+        finally:
+            results.put(None)
 
 
     @staticmethod
-    def _download_ticker_intraday(ticker, last_save, params):
+    def _plan_intraday(last_save, now):
         """
-        Scrapes and saves all intraday data for a ticker
+        Returns the fewest windows of intraday data that fill a ticker's gap since its last save.
+        Each interval's history is covered by the finest interval Yahoo! Finance still keeps for it (1 minute data back to 30 days ago, then Scraper._INTERVAL_ROLLUPS),
+        split into requests as long as the interval allows. Windows start at a market open and are skipped if the market has not opened since the last one, so no request covers only weekends or nights
 
         Parameters
         ----------
-        ticker : str
-            Listing's ticker
         last_save : int
             Timestamp of the last saved entry
-        params : dict
-            See Scraper._url_yfinance for possible values
+        now : int
+            Current timestamp
 
         Returns
         -------
-        int
-            Number of entries saved
+        list
+            (start, end, interval) of each window, in date order
         """
 
-        # Setup data
-        count = 0
-        stop = Date.timestamp_now()
-        params[Scraper._PARAM_START] = max(last_save + 1, Date.timestamp_30_days(stop, Date.HOUR))
-
-        # Scrape intervals
-        while params[Scraper._PARAM_START] <= stop:
-            params[Scraper._PARAM_END] = params[Scraper._PARAM_START] + Date.WEEK
-            tmp_count = Scraper._save_period(ticker, Database.insert_intraday, params, Database.COL_LAST_INTRADAY)
-            if tmp_count is None:
-                break
-            count += tmp_count
-            params[Scraper._PARAM_START] = params[Scraper._PARAM_END] + 1
-
-        return count
+        # Earliest date of each interval, starting on a whole day so days are never split between rollups and 1 minute data
+        intervals = list(Scraper._INTERVAL_ROLLUPS) + [Scraper._INTERVAL_INTRADAY]
+        firsts = [Date.timestamp_to_next_day_start(Scraper._INTERVAL_HISTORY[i][0](now, Date.HOUR)) for i in intervals]
+
+        windows = []
+        for i, interval in enumerate(intervals):
+            last = firsts[i + 1] - 1 if i + 1 < len(intervals) else now
+            resume = last_save + 1 if interval == Scraper._INTERVAL_INTRADAY else Date.timestamp_to_day_start(last_save + 1) # Rollups of a part day would replace the whole day's bars
+            start = max(resume, firsts[i])
+            while True:
+                start = Date.timestamp_next_open(start) if Date.before_open(start) or Date.after_close(start) else start
+                if start > last:
+                    break
+                end = min(start + Scraper._INTERVAL_HISTORY[interval][1] - 1, last)
+                windows.append((start, end, interval))
+                start = end + 1
+        return windows
 
 
     @staticmethod
-    def _download_ticker_daily(ticker, last_save, params):
+    def _plan_daily(last_save, now):
         """
-        Scrapes and saves all daily data for a ticker
+        Returns the window of daily data to scrape for a ticker, up to yesterday
 
         Parameters
         ----------
-        ticker : str
-            Listing's ticker
         last_save : int
             Timestamp of the last saved entry
-        params : dict
-            See Scraper._url_yfinance for possible values
+        now : int
+            Current timestamp
 
         Returns
         -------
-        int
-            Number of entries saved
+        list
+            (start, end, interval) of the window, or no windows if there has been no market open since the last save
         """
 
-        # Setup data
-        stop = Date.timestamp_now(-Date.DAY)
-        params[Scraper._PARAM_START] = last_save + 1
-        if params[Scraper._PARAM_START] > stop:
-            return 0
+        stop = now - Date.DAY
+        return [(last_save + 1, stop, Scraper._INTERVAL_DAILY)] if Date.timestamp_next_open(last_save) <= stop else []
+
+
+    @staticmethod
+    def _insert_fn(request_interval):
+        """
+        Returns the function saving data scraped at an interval
+
+        Parameters
+        ----------
+        request_interval : str
+            Interval the data was requested at
 
-        # Scrape intervals
-        params[Scraper._PARAM_END] = stop
-        count = Scraper._save_period(ticker, Database.insert_daily, params, Database.COL_LAST_DAILY)
-        return count if count is not None else 0
+        Returns
+        -------
+        fn
+            Database.insert_intraday, Database.insert_daily or Database.insert_rollup for the interval's rollup
+        """
+
+        if request_interval in Scraper._INTERVAL_ROLLUPS:
+            return partial(Database.insert_rollup, resolution=Scraper._INTERVAL_ROLLUPS[request_interval])
+        return Database.insert_daily if request_interval == Scraper._INTERVAL_DAILY else Database.insert_intraday
 
 
     @staticmethod
-    def _save_period(ticker, insert_fn, params, date_col):
+    def _print_plan(jobs):
         """
-        Saves a single period of intraday or daily data for a ticker to the database
+        Prints the number of requests a new download plans to send, and how long they take at the rate limit
 
         Parameters
         ----------
+        jobs : list
+            (ticker, start, end, request interval) of each planned job
+        """
+
+        intervals = Counter(job[3] for job in jobs)
+        split = f' ({", ".join(f"{n} at {i}" for i, n in intervals.items())})' if len(intervals) > 1 else ''
+        eta = StrFormat.seconds_to_duration_str(len(jobs) / Scraper._rate.ceiling)
+        print(f'{Utils.CLEAR_LINE}  {len(jobs)} requests planned{split}, at least {eta}')
+
+
+    @staticmethod
+    def _print_progress(interval, count, ticker, finished, start_time):
+        """
+        Prints the progress of a download from its scrape jobs, with the time left estimated from the jobs finished so far
+
+        Parameters
+        ----------
+        interval : str
+            Interval of the data being scraped
+        count : int
+            Number of entries saved
         ticker : str
-            Listing's ticker
-        insert_fn : function
-            Database.insert_intraday : Save to intraday database table
-            Database.insert_daily : Save to daily database table
-        params : dict
-            See Scraper._url_yfinance for possible values
-        date_col : str
-            Database.COL_LAST_INTRADAY: Scrape intraday data
-            Database.COL_LAST_DAILY: Scrape daily data
+            Ticker last scraped
+        finished : int
+            Number of jobs finished before the download started
+        start_time : float
+            perf_counter value from when the download started
+        """
+
+        progress = Database.fetch_scrape_progress(interval)
+        total = sum(progress.values())
+        done = progress[Database.JOB_DONE] + progress[Database.JOB_FAILED] + progress[Database.JOB_SCRAPED]
+        left = total - done
+        rate = (done - finished) / (perf_counter() - start_time)
+        eta = f', {StrFormat.seconds_to_duration_str(left / rate)} left' if rate > 0 else ''
+        print(f'{Utils.CLEAR_LINE}  {int(100 * done / max(total, 1))}% ({count} added, {left} requests{eta}) - downloaded {ticker}', end='', flush=True)
+
+
+    @staticmethod
+    def _commit(pending):
+        """
+        Saves scraped periods, moves their tickers' last save dates forward and marks their jobs done in one transaction, so all three are always committed together.
+        If the transaction fails, each period is retried in its own transaction so one bad period does not lose the others
+
+        Parameters
+        ----------
+        pending : list
+            (job id, ticker, insert_fn, columns or None if there were no values, date_col) of each scraped period, emptied once saved
 
         Returns
         -------
-        int or None
-            Number of entries if scrape was successful, None if not successful
+        int
+            Number of entries saved
         """
 
+        periods, pending[:] = list(pending), []
+        if not periods:
+            return 0
+        intraday = [data[Database.COL_DATE] for _, _, insert_fn, data, _ in periods if data is not None and insert_fn == Database.insert_intraday]
+        start = int(min(dates.min() for dates in intraday)) if intraday else None
+        end = int(max(dates.max() for dates in intraday)) if intraday else None
         try:
-            df = Scraper._repeat_scrape_period(ticker, params)
-            if df is None or len(df) == 0:
-                return 0
-            last_save = df[Database.COL_DATE].max()
-            count = insert_fn(df)
-            Database.update_listings_date(ticker, last_save, date_col)
+            count = 0
+            with Database.transaction(start, end):
+                for job_id, ticker, insert_fn, data, date_col in periods:
+                    if data is not None and len(data[Database.COL_DATE]):
+                        count += insert_fn(data)
+                        Database.update_listings_date(ticker, data[Database.COL_DATE].max(), date_col)
+                    Database.update_scrape_job(job_id, Database.JOB_DONE, 0 if data is None else len(data[Database.COL_DATE]))
             return count
         except Exception as e:
-            print(f'{Utils.CLEAR_LINE}  FAILED: {ticker} - {e} ')
+            if len(periods) > 1:
+                return sum(Scraper._commit([period]) for period in periods)
+            print(f'{Utils.CLEAR_LINE}  FAILED: {periods[0][1]} - {e} ')
+            Database.update_scrape_job(periods[0][0], Database.JOB_FAILED)
+            return 0
 
 
     @staticmethod
@@ -286,8 +509,8 @@ class Scraper():
 
         Returns
         -------
-        pandas.DataFrame
-            Scraped data over a time period
+        dict or None
+            Scraped data over a time period (see Scraper._parse_chart), None if there are no values
 
         Raises
         ------
@@ -323,40 +546,105 @@ class Scraper():
 
         Returns
         -------
-        pandas.DataFrame
-            Scraped data over a time period
+        dict or None
+            Scraped data over a time period (see Scraper._parse_chart), None if there are no values
 
         Raises
         ------
         RuntimeError
+            If the request could not be sent
             If status code is not 200
             If Yahoo! Finance servers are down
             If JSON cannot be walked successfully
         ValueError
             If Yahoo! Finance returned a custom error
+        CircuitOpenError
+            If Yahoo! Finance stays unavailable
         """
 
-        start_time = time()
-
         # Scrape
+        Scraper._rate.acquire()
         url = Scraper._url_yfinance(ticker + Scraper._TICKER_EXT, params)
-        data = requests.get(url, headers={'User-Agent':Utils.USER_AGENT})
+        start = perf_counter()
+        try:
+            data = Scraper._get(url, check=False)
+        except requests.RequestException as e:
+            Scraper._rate.failure()
+            raise RuntimeError(f'Request failed ({e})') from None
+
+        # Throttled
+        if data.status_code == 429:
+            Scraper._rate.throttled(Scraper._retry_after(data))
+            raise RuntimeError(f'Status code not 200 ({data.status_code})')
+
+        # Servers down
+        if data.status_code >= 500 or b'Will be right back' in data.content:
+            Scraper._rate.failure()
+            if data.status_code == 200:
+                raise RuntimeError('Yahoo! Finance servers are currently down')
+            raise RuntimeError(f'Status code not 200 ({data.status_code})')
+        Scraper._rate.success(perf_counter() - start)
 
         # Failed request
         if data.status_code != 200:
-            Scraper._rate_limit(start_time)
             if data.status_code == 400:
                 return None # No values
             raise RuntimeError(f'Status code not 200 ({data.status_code})')
 
-        # Servers down
-        if 'Will be right back' in data.text:
-            Scraper._rate_limit(start_time)
-            raise RuntimeError('Yahoo! Finance servers are currently down')
+        return Scraper._parse_chart(data.content, ticker)
+
+
+    @staticmethod
+    def _retry_after(response):
+        """
+        Returns the seconds to wait requested by a response's Retry-After header
+
+        Parameters
+        ----------
+        response : requests.Response
+            Response to a request
+
+        Returns
+        -------
+        float or None
+            Seconds to wait, None if the header is missing or not a number of seconds
+        """
+
+        try:
+            return float(response.headers['Retry-After'])
+        except (KeyError, ValueError):
+            return None
+
 
-        data = data.json()
+    @staticmethod
+    def _parse_chart(content, ticker):
+        """
+        Parses a chart API response straight into numpy columns ready for Database.insert_intraday or Database.insert_daily.
+        Bars with any null value are dropped and prices are converted to cents, all without building a DataFrame
+
+        Parameters
+        ----------
+        content : bytes
+            Body of the response (decoded with orjson if installed)
+        ticker : str
+            Listing's ticker
+
+        Returns
+        -------
+        dict or None
+            numpy.ndarray of each column (Database.COL_TICKER, Database.COL_DATE, Database.COL_OPEN, Database.COL_HIGH,
+            Database.COL_LOW, Database.COL_CLOSE and Database.COL_VOL), None if there are no values
+
+        Raises
+        ------
+        RuntimeError
+            If JSON cannot be walked successfully
+        ValueError
+            If Yahoo! Finance returned a custom error
+        """
+
+        data = json_loads(content)
         if 'chart' not in data:
-            Scraper._rate_limit(start_time)
             raise RuntimeError('No key "chart"')
         data = data['chart']
 
@@ -364,71 +652,54 @@ class Scraper():
         if 'error' in data:
             error = data['error']
             if error and 'description' in error:
-                Scraper._rate_limit(start_time)
                 raise ValueError(error['description'])
 
         if 'result' not in data:
-            Scraper._rate_limit(start_time)
             raise RuntimeError('No key "result"')
         data = data['result']
         if not Utils.has_len(data):
-            Scraper._rate_limit(start_time)
             raise RuntimeError('Value for key "result" has no len')
         if len(data) != 1:
-            Scraper._rate_limit(start_time)
             raise RuntimeError('Value for key "result" is not of length 1')
         data = data[0]
 
         # Dates
         if Scraper._COL_API_DATE not in data:
-            Scraper._rate_limit(start_time)
             return None # No values
         dates = data[Scraper._COL_API_DATE]
         if not Utils.has_len(dates):
-            Scraper._rate_limit(start_time)
             raise RuntimeError(f'Value for key "{Scraper._COL_API_DATE}" has no len')
         len_dates = len(dates)
         if len_dates == 0:
-            Scraper._rate_limit(start_time)
             return None # No values
 
         # Quotes
         if 'indicators' not in data:
-            Scraper._rate_limit(start_time)
             raise RuntimeError('No key "indicators"')
         quote = data['indicators']
         if 'quote' not in quote:
-            Scraper._rate_limit(start_time)
             raise RuntimeError('No key "quote"')
         quote = quote['quote']
         if not Utils.has_len(quote):
-            Scraper._rate_limit(start_time)
             raise RuntimeError('Value for key "quote" has no len')
         if len(quote) != 1:
-            Scraper._rate_limit(start_time)
             raise RuntimeError('Value for key "quote" is not of length 1')
         quote = quote[0]
 
-        # Values
-        try:
-            high = Scraper._get_quote_value(Scraper._COL_API_HIGH, quote, len_dates)
-            open = Scraper._get_quote_value(Scraper._COL_API_OPEN, quote, len_dates)
-            low = Scraper._get_quote_value(Scraper._COL_API_LOW, quote, len_dates)
-            close = Scraper._get_quote_value(Scraper._COL_API_CLOSE, quote, len_dates)
-            volume = Scraper._get_quote_value(Scraper._COL_API_VOL, quote, len_dates)
-        except Exception as e:
-            Scraper._rate_limit(start_time)
-            raise e
+        # Values (nulls become NaN)
+        columns = {Database.COL_DATE: np.array(dates, dtype=np.float64)}
+        for key, col in Scraper._API_COLS.items():
+            columns[col] = np.array(Scraper._get_quote_value(key, quote, len_dates), dtype=np.float64)
 
-        # DataFrame
-        df = pd.DataFrame({Database.COL_DATE: dates, Database.COL_HIGH: high, Database.COL_OPEN: open, Database.COL_LOW: low, Database.COL_CLOSE: close, Database.COL_VOL: volume})
-        df.dropna(how='any', inplace=True)
-        for col in [Database.COL_HIGH, Database.COL_OPEN, Database.COL_LOW, Database.COL_CLOSE]:
-            df[col] = round(df[col] * 100).astype(int)
-        df[Database.COL_VOL] = df[Database.COL_VOL].astype(int)
-        df[Database.COL_TICKER] = ticker
-        Scraper._rate_limit(start_time)
-        return df
+        # Columns
+        mask = np.logical_and.reduce([np.isfinite(values) for values in columns.values()])
+        data = {Database.COL_TICKER: np.full(int(mask.sum()), ticker, dtype=object)}
+        for col, values in columns.items():
+            values = values[mask]
+            if col in Scraper._PRICE_COLS:
+                values = np.rint(values * 100)
+            data[col] = values.astype(np.int64)
+        return data
 
 
     @staticmethod
@@ -467,20 +738,56 @@ class Scraper():
 
 
     @staticmethod
-    def _rate_limit(start_time):
+    def _http():
+        """
+        Returns the HTTP session shared by every scraper request, creating it on first use.
+        Connections are kept alive and pooled (one per worker), so requests after the first skip the TCP and TLS handshakes, and responses are gzip or deflate compressed
+
+        Returns
+        -------
+        requests.Session
+            Shared session
         """
-        Pauses the program to prevent exceeding Yahoo! Finance rate limits
+
+        with Scraper._session_lock:
+            if Scraper._session is None:
+                retry = Retry(total=Scraper._CONNECT_RETRIES, connect=Scraper._CONNECT_RETRIES, read=0, status=0, other=0, backoff_factor=Scraper._RETRY_BACKOFF)
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=Scraper._WORKERS, max_retries=retry)
+                session = requests.Session()
+                session.headers.update({'User-Agent': Utils.USER_AGENT, 'Accept-Encoding': 'gzip, deflate'})
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                Scraper._session = session
+            return Scraper._session
+
+
+    @staticmethod
+    def _get(url, check=True):
+        """
+        Sends a GET request on the shared session (see Scraper._http)
 
         Parameters
         ----------
-        start_time : float
-            Last time Yahoo! Finance API was used
+        url : str
+            URL to request
+        check : bool, optional
+            Whether or not to raise an error if the status code is not successful, by default True
+
+        Returns
+        -------
+        requests.Response
+            Response to the request
+
+        Raises
+        ------
+        requests.HTTPError
+            If check and the status code is not successful
         """
 
-        elapsed = time() - start_time
-        sleep_time = Scraper._RATE_LIMIT - elapsed
-        if sleep_time > 0:
-            sleep(sleep_time)
+        response = Scraper._http().get(url, timeout=Scraper._TIMEOUT)
+        if check:
+            response.raise_for_status()
+        return response
 
 
     @staticmethod
@@ -510,4 +817,4 @@ class Scraper():
         """
 
         params_str = '&'.join([f'{k}={v}' for k,v in params.items()])
-        return f'https://query2.finance.yahoo.com/v8/finance/chart/{ticker}?{params_str}'
\ No newline at end of file
+        return f'{Scraper._URL_YFINANCE}/v8/finance/chart/{ticker}?{params_str}'
\ No newline at end of file
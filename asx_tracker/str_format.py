@@ -217,4 +217,24 @@ class StrFormat():
 		if len(dollars) > 0:
 			split_dollars.append(dollars)
 		dollars = ','.join(reversed(split_dollars))
-		return pref + '$' + dollars + '.' + cents
\ No newline at end of file
+		return pref + '$' + dollars + '.' + cents
+
+
+	@staticmethod
+	def seconds_to_duration_str(seconds):
+		"""
+        Converts a number of seconds to a H:MM:SS string
+
+        Parameters
+        ----------
+        seconds : float
+            Seconds to convert
+
+        Returns
+        -------
+        str
+            Duration string representation of seconds
+        """
+
+		minutes, seconds = divmod(int(seconds), 60)
+		return f'{minutes // 60}:{minutes % 60:02d}:{seconds:02d}'
\ No newline at end of file
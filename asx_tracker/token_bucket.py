@@ -0,0 +1,80 @@
+import threading
+from time import monotonic, sleep
+
+class TokenBucket():
+
+    # Constructor
+
+    def __init__(self, rate, capacity=1):
+        """
+        Rate limiter shared by threads, refilling tokens continuously at a fixed rate
+
+        Parameters
+        ----------
+        rate : float
+            Tokens added per second
+        capacity : int, optional
+            Most tokens that can be saved up (i.e. the largest burst), by default 1
+        """
+
+        self._lock = threading.Lock()
+        self._capacity = capacity
+        self._tokens = capacity
+        self._updated = monotonic()
+        self.rate = None
+        self.set_rate(rate)
+
+
+    # Setters
+
+    def set_rate(self, rate):
+        """
+        Set the rate tokens are added at
+
+        Parameters
+        ----------
+        rate : float
+            Tokens added per second
+
+        Raises
+        ------
+        ValueError
+            Non-positive rate
+        """
+
+        if rate <= 0:
+            raise ValueError('Non-positive rate')
+        with self._lock:
+            if self.rate is not None:
+                self._refill() # Tokens saved up so far are kept at the old rate
+            self.rate = rate
+
+
+    # Tokens
+
+    def acquire(self):
+        """
+        Takes a token, waiting until one is available.
+        Tokens are reserved in the order threads ask for them, so waiting threads are served first come first served
+
+        Returns
+        -------
+        float
+            Seconds waited
+        """
+
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait > 0:
+            sleep(wait)
+        return wait
+
+
+    # Internal
+
+    def _refill(self):
+        now = monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
\ No newline at end of file
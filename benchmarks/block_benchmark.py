@@ -0,0 +1,90 @@
+import argparse
+import os
+from time import perf_counter
+from asx_tracker.date import Date
+from asx_tracker.database.database import Database
+from asx_tracker.database.connection import Connection
+from benchmarks.synthetic import Synthetic
+
+class BlockBenchmark():
+
+    # Benchmark
+
+    @staticmethod
+    def run(path, tickers, days, repeat):
+        """
+        Compares the size and full intraday read time of a database before and after compacting it into blocks.
+        The benchmark database is copied first, so it is left uncompacted
+
+        Parameters
+        ----------
+        path : str
+            Path to the benchmark database (built if it does not exist)
+        tickers : int
+            Number of synthetic listings
+        days : int
+            Number of trading days per listing
+        repeat : int
+            Number of tickers to read the full intraday history of
+        """
+
+        names = Synthetic.build(path, tickers, days)[:repeat]
+        Database.refresh_rollups()
+        raw = BlockBenchmark._measure(names)
+        raw_size = BlockBenchmark._vacuum_size(path, f'{path}.raw')
+
+        copy = f'{path}.blocks'
+        BlockBenchmark._remove(copy)
+        Connection.get(path).execute('VACUUM INTO ?', (copy,))
+        Synthetic.use(copy)
+        start = perf_counter()
+        rows = Database.compact_intraday(Date.MAX)
+        print(f'Compact:\t{perf_counter() - start:,.2f} s ({rows:,} rows)')
+        blocks = BlockBenchmark._measure(names)
+        blocks_size = BlockBenchmark._vacuum_size(copy, f'{copy}.vacuum')
+        BlockBenchmark._remove(copy)
+        Synthetic.use(path)
+
+        print(f'Size:\t\t{raw_size / 2**20:,.1f} MiB -> {blocks_size / 2**20:,.1f} MiB ({raw_size / blocks_size:.1f}x smaller)')
+        print(f'Rows:\t\t{raw * 1000:,.3f} ms per ticker')
+        print(f'Blocks:\t\t{blocks * 1000:,.3f} ms per ticker ({raw / blocks:.1f}x faster)')
+
+
+    # Internal
+
+    @staticmethod
+    def _measure(names):
+        start = perf_counter()
+        total = 0
+        for ticker in names:
+            total += int(Database.fetch_single_intraday_array(ticker)[Database.COL_CLOSE].sum())
+        return (perf_counter() - start) / len(names)
+
+
+    @staticmethod
+    def _vacuum_size(path, target):
+        """
+        Returns the size of a database once vacuumed (i.e. without free pages), using a temporary copy
+        """
+
+        BlockBenchmark._remove(target)
+        Connection.get(path).execute('VACUUM INTO ?', (target,))
+        size = os.path.getsize(target)
+        BlockBenchmark._remove(target)
+        return size
+
+
+    @staticmethod
+    def _remove(path):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark compacting intraday data into compressed blocks')
+    parser.add_argument('--path', default='benchmarks/benchmark.db')
+    parser.add_argument('--tickers', type=int, default=200)
+    parser.add_argument('--days', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    BlockBenchmark.run(args.path, args.tickers, args.days, args.repeat)
\ No newline at end of file
@@ -0,0 +1,60 @@
+import argparse
+from time import perf_counter
+from asx_tracker.database.database import Database
+from asx_tracker.database.column_store import ColumnStore
+from benchmarks.synthetic import Synthetic
+
+class ColumnStoreBenchmark():
+
+    # Benchmark
+
+    @staticmethod
+    def run(path, tickers, days, repeat):
+        """
+        Compares full intraday series reads from SQLite against the memory-mapped column store
+
+        Parameters
+        ----------
+        path : str
+            Path to the benchmark database (built if it does not exist)
+        tickers : int
+            Number of synthetic listings
+        days : int
+            Number of trading days per listing
+        repeat : int
+            Number of tickers to read the full intraday history of
+        """
+
+        names = Synthetic.build(path, tickers, days)[:repeat]
+        start = perf_counter()
+        rows = Database.sync_column_store(Database.TAB_INTRADAY, rebuild=True)
+        print(f'Rebuild:\t{perf_counter() - start:,.2f} s ({rows:,} rows)')
+
+        ColumnStore.ENABLED = False
+        before = ColumnStoreBenchmark._measure(names)
+        ColumnStore.ENABLED = True
+        ColumnStoreBenchmark._measure(names) # Open memory maps
+        after = ColumnStoreBenchmark._measure(names)
+        print(f'SQLite:\t\t{before * 1000:,.3f} ms per ticker')
+        print(f'Column store:\t{after * 1000:,.3f} ms per ticker ({before / after:.0f}x faster)')
+
+
+    # Internal
+
+    @staticmethod
+    def _measure(names):
+        start = perf_counter()
+        total = 0
+        for ticker in names:
+            total += int(Database.fetch_single_intraday_series(ticker)[Database.COL_CLOSE].sum())
+        return (perf_counter() - start) / len(names)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark full intraday series reads')
+    parser.add_argument('--path', default='benchmarks/benchmark.db')
+    parser.add_argument('--tickers', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    ColumnStoreBenchmark.run(args.path, args.tickers, args.days, args.repeat)
\ No newline at end of file
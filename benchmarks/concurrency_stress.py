@@ -0,0 +1,110 @@
+import argparse
+import multiprocessing
+import random
+from time import perf_counter
+import numpy as np
+import pandas as pd
+from asx_tracker.date import Date
+from asx_tracker.database.database import Database
+from benchmarks.synthetic import Synthetic
+
+class ConcurrencyStress():
+
+    # Stress test
+
+    @staticmethod
+    def run(path, tickers, days, readers, seconds):
+        """
+        Runs one writer process inserting intraday data while several reader processes fetch from the same database.
+        Each read checks that a ticker's row count taken before and after fetching its rows agree with the rows fetched, i.e. that it saw a single snapshot
+
+        Parameters
+        ----------
+        path : str
+            Path to the benchmark database (built if it does not exist)
+        tickers : int
+            Number of synthetic listings
+        days : int
+            Number of trading days per listing
+        readers : int
+            Number of reader processes
+        seconds : float
+            Duration of the test
+        """
+
+        Synthetic.build(path, tickers, days)
+        ctx = multiprocessing.get_context('spawn')
+        results = ctx.Queue()
+        procs = [ctx.Process(target=ConcurrencyStress._writer, args=(path, tickers, days, seconds, results))]
+        procs += [ctx.Process(target=ConcurrencyStress._reader, args=(path, tickers, seconds, i, results)) for i in range(readers)]
+        for p in procs:
+            p.start()
+        reports = sorted([results.get() for _ in procs])
+        for p in procs:
+            p.join()
+
+        for name, count, latencies, errors, inconsistent in reports:
+            unit = 'rows' if name == 'writer' else 'reads'
+            p99 = np.percentile(latencies, 99) * 1000 if latencies else 0
+            print(f'{name}:\t{count / seconds:,.0f} {unit}/sec, p99 {p99:,.1f} ms, {errors} errors, {inconsistent} inconsistent snapshots')
+
+
+    # Internal
+
+    @staticmethod
+    def _writer(path, tickers, days, seconds, results):
+        Database._PATH_DB = path
+        names = Synthetic.tickers(tickers)
+        rng = random.Random(0)
+        date = Synthetic.trading_days(days)[-1] + Date.DAY
+        count, latencies, errors = 0, [], 0
+        stop = perf_counter() + seconds
+        while perf_counter() < stop:
+            batch = rng.sample(names, min(20, len(names)))
+            dates = date + Date.MINUTE * np.arange(60)
+            df = pd.DataFrame({
+                Database.COL_TICKER: np.repeat(batch, len(dates)),
+                Database.COL_DATE: np.tile(dates, len(batch)),
+                Database.COL_OPEN: 100, Database.COL_HIGH: 101, Database.COL_LOW: 99, Database.COL_CLOSE: 100, Database.COL_VOL: 1000})
+            start = perf_counter()
+            try:
+                count += Database.insert_intraday(df)
+            except Exception:
+                errors += 1
+            latencies.append(perf_counter() - start)
+            date += Date.HOUR
+        results.put(('writer', count, latencies, errors, 0))
+
+
+    @staticmethod
+    def _reader(path, tickers, seconds, i, results):
+        Database._PATH_DB = path
+        names = Synthetic.tickers(tickers)
+        rng = random.Random(i + 1)
+        count, latencies, errors, inconsistent = 0, [], 0, 0
+        stop = perf_counter() + seconds
+        while perf_counter() < stop:
+            start = perf_counter()
+            try:
+                ticker = rng.choice(names)
+                with Database.snapshot():
+                    before = Database._count_single(ticker, Database.TAB_INTRADAY, Date.MAX)
+                    rows = len(Database.fetch_single_intraday_array(ticker))
+                    after = Database._count_single(ticker, Database.TAB_INTRADAY, Date.MAX)
+                inconsistent += not before == rows == after
+                count += 1
+            except Exception:
+                errors += 1
+            latencies.append(perf_counter() - start)
+        results.put((f'reader {i}', count, latencies, errors, inconsistent))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Stress test one writer and several readers on the same database')
+    parser.add_argument('--path', default='benchmarks/benchmark.db')
+    parser.add_argument('--tickers', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=5)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+    ConcurrencyStress.run(args.path, args.tickers, args.days, args.readers, args.seconds)
\ No newline at end of file
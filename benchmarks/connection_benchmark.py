@@ -0,0 +1,80 @@
+import argparse
+import random
+import sqlite3
+from time import perf_counter
+from asx_tracker.database.database import Database
+from asx_tracker.database.price_index import PriceIndex
+from benchmarks.synthetic import Synthetic
+
+class ConnectionBenchmark():
+
+    # Benchmark
+
+    @staticmethod
+    def run(path, tickers, days, queries):
+        """
+        Compares live price lookups per second with a fresh connection per query against pooled connections.
+        Pooled lookups are timed with PriceIndex disabled, so each lookup queries the database, and then with it enabled
+
+        Parameters
+        ----------
+        path : str
+            Path to the benchmark database (built if it does not exist)
+        tickers : int
+            Number of synthetic listings
+        days : int
+            Number of trading days per listing
+        queries : int
+            Number of lookups to time
+        """
+
+        names = Synthetic.build(path, tickers, days)
+        rng = random.Random(1)
+        lookups = list(zip([rng.choice(names) for _ in range(queries)], Synthetic.random_dates(rng, days, queries)))
+
+        before = ConnectionBenchmark._time(lambda t, d: ConnectionBenchmark._fresh_connection(path, t, d), lookups)
+        PriceIndex.ENABLED = False
+        after = ConnectionBenchmark._time(Database.fetch_single_live_intraday, lookups)
+        PriceIndex.ENABLED = True
+        PriceIndex.invalidate(path)
+        indexed = ConnectionBenchmark._time(Database.fetch_single_live_intraday, lookups)
+        print(f'Fresh connection per query:\t{before:,.0f} queries/sec')
+        print(f'Pooled connection:\t\t{after:,.0f} queries/sec ({after / before:.1f}x)')
+        print(f'Pooled with price index:\t{indexed:,.0f} queries/sec ({indexed / before:.1f}x)')
+
+
+    # Internal
+
+    @staticmethod
+    def _time(fn, lookups):
+        start = perf_counter()
+        for ticker, date in lookups:
+            fn(ticker, date)
+        return len(lookups) / (perf_counter() - start)
+
+
+    @staticmethod
+    def _fresh_connection(path, ticker, date):
+        query = f"""
+        SELECT {Database.COL_DATE},{Database.COL_CLOSE} FROM {Database.TAB_INTRADAY}
+        WHERE {Database.COL_TICKER_ID} = {Database._ticker_id(ticker)} AND {Database.COL_DATE} <= {date}
+        ORDER BY {Database.COL_DATE} DESC LIMIT 1
+        """
+        conn = sqlite3.connect(path)
+        cursor = conn.cursor()
+        cursor.execute(query)
+        response = cursor.fetchall()
+        conn.commit()
+        cursor.close()
+        conn.close()
+        return response
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark pooled SQLite connections')
+    parser.add_argument('--path', default='benchmarks/benchmark.db')
+    parser.add_argument('--tickers', type=int, default=2000, help='Use ~2000 tickers and ~40 days for a multi-GB database')
+    parser.add_argument('--days', type=int, default=5)
+    parser.add_argument('--queries', type=int, default=20000)
+    args = parser.parse_args()
+    ConnectionBenchmark.run(args.path, args.tickers, args.days, args.queries)
\ No newline at end of file
@@ -0,0 +1,117 @@
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import threading
+from time import perf_counter
+from asx_tracker.scraper import Scraper
+from asx_tracker.rate_controller import RateController
+from asx_tracker.database.connection import Connection
+from benchmarks.synthetic import Synthetic
+from benchmarks.yahoo_server import YahooServer
+
+class DownloadBenchmark():
+
+    # Benchmark
+
+    @staticmethod
+    def run(companies, etfs, rate, fixtures=None, outage=None, **faults):
+        """
+        Runs every step of UpdateMenu.download into a new database against a local stand-in for Yahoo! Finance and the ASX website,
+        reporting the requests and rows per second of each step and the wall time of the whole download
+
+        Parameters
+        ----------
+        companies : int
+            Number of synthetic companies listed
+        etfs : int
+            Number of synthetic ETFs listed
+        rate : float
+            Most requests per second to Yahoo! Finance (the real scraper sends at most 1 every Scraper._RATE_LIMIT seconds)
+        fixtures : str, optional
+            Directory of recorded responses (see YahooServer.record), by default None (i.e. synthetic responses only)
+        outage : tuple, optional
+            (seconds after the start the outage begins, seconds it lasts), by default None (i.e. no outage)
+        **faults
+            Latency and fault keyword arguments of YahooServer.start
+        """
+
+        tickers = Synthetic.tickers(companies + etfs)
+        server = YahooServer.start(companies=tickers[:companies], etfs=tickers[companies:], fixtures=fixtures, **faults)
+        urls = Scraper.use_urls(yfinance=server.url, etp=f'{server.url}{YahooServer.PATH_ETP}')
+        rate_controller = Scraper._rate
+        Scraper._rate = RateController(rate)
+        steps = [
+            ('Companies', Scraper.download_companies, (f'{server.url}{YahooServer.PATH_COMPANIES}',)),
+            ('ETFs', Scraper.download_etfs, ()),
+            ('Intraday', Scraper.download_intraday, ()),
+            ('Daily', Scraper.download_daily, ())]
+        timers = [] if outage is None else [
+            threading.Timer(outage[0], setattr, (server, 'outage', True)),
+            threading.Timer(outage[0] + outage[1], setattr, (server, 'outage', False))]
+
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    Synthetic.use(os.path.join(tmp, 'download.db'))
+                print(f'{companies} companies and {etfs} ETFs at up to {rate:.0f} requests/sec')
+                print(f'{"Step":<10} {"Time s":>7} {"Requests":>9} {"Rows":>9} {"Requests/s":>11} {"Rows/s":>9}  Outcome')
+                total_requests = total_rows = 0
+                start = perf_counter()
+                for timer in timers:
+                    timer.start()
+                for name, fn, args in steps:
+                    requests, rows, elapsed, outcome = DownloadBenchmark._step(server, fn, args)
+                    total_requests += requests
+                    total_rows += rows
+                    print(f'{name:<10} {elapsed:>7.1f} {requests:>9} {rows:>9} {requests / elapsed:>11.1f} {rows / elapsed:>9.0f}  {outcome}')
+                elapsed = perf_counter() - start
+                print(f'{"Total":<10} {elapsed:>7.1f} {total_requests:>9} {total_rows:>9} {total_requests / elapsed:>11.1f} {total_rows / elapsed:>9.0f}')
+                Connection.close()
+        finally:
+            for timer in timers:
+                timer.cancel()
+            Scraper._rate = rate_controller
+            Scraper.use_urls(**urls)
+            YahooServer.stop(server)
+
+
+    # Internal
+
+    @staticmethod
+    def _step(server, fn, args):
+        """
+        Runs one step of the download, reporting failures the way UpdateMenu.download_single does
+
+        Returns
+        -------
+        tuple
+            (requests sent, rows saved, seconds taken, outcome)
+        """
+
+        requests = server.stats['requests']
+        start = perf_counter()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                rows = fn(*args)
+            outcome = 'completed'
+        except Exception as e:
+            rows = 0
+            outcome = f'FAILED: {e}'
+        return server.stats['requests'] - requests, rows, perf_counter() - start, outcome
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark a full download against a local stand-in for Yahoo! Finance and the ASX website')
+    parser.add_argument('--companies', type=int, default=200)
+    parser.add_argument('--etfs', type=int, default=50)
+    parser.add_argument('--rate', type=float, default=200, help='Most requests per second')
+    parser.add_argument('--fixtures', help='Directory of recorded responses (see benchmarks.yahoo_server --record)')
+    parser.add_argument('--latency-ms', type=float, default=20)
+    parser.add_argument('--error-pct', type=float, default=0, help='Percentage of requests answered with status code 503')
+    parser.add_argument('--throttle-pct', type=float, default=0, help='Percentage of requests answered with status code 429')
+    parser.add_argument('--outage', type=float, nargs=2, metavar=('START', 'SECONDS'), help='Serve the outage page from START seconds for SECONDS')
+    args = parser.parse_args()
+    DownloadBenchmark.run(args.companies, args.etfs, args.rate, args.fixtures, args.outage,
+        latency=args.latency_ms / 1000, error_pct=args.error_pct, throttle_pct=args.throttle_pct, retry_after=0.2)
\ No newline at end of file
@@ -0,0 +1,138 @@
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import pandas as pd
+from time import perf_counter
+from asx_tracker.date import Date
+from asx_tracker.scraper import Scraper
+from asx_tracker.rate_controller import RateController, CircuitOpenError
+from asx_tracker.token_bucket import TokenBucket
+from asx_tracker.database.database import Database
+from asx_tracker.database.connection import Connection
+from benchmarks.synthetic import Synthetic
+from benchmarks.yahoo_server import YahooServer
+
+class FaultBenchmark():
+
+    # Benchmark
+
+    @staticmethod
+    def run(tickers, rate, outage):
+        """
+        Downloads daily data for synthetic listings from a fault injecting stand-in for Yahoo! Finance, comparing a fixed request rate
+        (the scraper before RateController) against the adaptive rate and circuit breaker.
+        Rates and pauses are scaled down from the real ones so each scenario takes seconds
+
+        Parameters
+        ----------
+        tickers : int
+            Number of synthetic listings (one request each)
+        rate : float
+            Most requests per second
+        outage : float
+            Seconds of the temporary outage scenario
+        """
+
+        scenarios = [
+            ('Healthy', {}, None),
+            ('5% throttled, 10% errors, 5% slow', {'throttle_pct': 5, 'error_pct': 10, 'spike_pct': 5, 'spike_latency': 0.5}, None),
+            (f'{outage:.0f} s outage', {}, (1.0, 1.0 + outage)),
+            ('Permanent outage', {}, (0.0, None))]
+        print(f'{tickers} tickers at up to {rate:.0f} requests/sec')
+        print(f'{"Scenario":<36} {"Limiter":<9} {"Time s":>7} {"Requests":>9} {"Faults":>7} {"Saved":>6}  Outcome')
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, faults, window in scenarios:
+                for limiter in ['fixed', 'adaptive']:
+                    Synthetic.use(os.path.join(tmp, f'{len(os.listdir(tmp))}.db'))
+                    names = Synthetic.tickers(tickers)
+                    last = Date.timestamp_now(-60 * Date.DAY)
+                    Database.insert_listings(pd.DataFrame({
+                        Database.COL_TICKER: names, Database.COL_NAME: names, Database.COL_MGMT_PCT: 0,
+                        Database.COL_LAST_INTRADAY: 0, Database.COL_LAST_DAILY: last}))
+                    Scraper._rate = FaultBenchmark._FixedRate(rate) if limiter == 'fixed' else RateController(rate, cooldown=0.5, max_opens=3)
+                    elapsed, stats, outcome = FaultBenchmark._download(faults, window)
+                    saved = sum(1 for _, date in Database.fetch_all_listings(Database.COL_TICKER, Database.COL_LAST_DAILY) if date > last)
+                    print(f'{name:<36} {limiter:<9} {elapsed:>7.1f} {stats["requests"]:>9} {stats["faults"]:>7} {saved:>6}  {outcome}')
+            Connection.close()
+
+
+    # Internal
+
+    class _FixedRate():
+        """
+        Fixed rate limiter with the interface of RateController, ignoring how requests went
+        """
+
+        def __init__(self, rate):
+            self.ceiling = rate
+            self.bucket = TokenBucket(rate)
+
+        def acquire(self):
+            return self.bucket.acquire()
+
+        def success(self, latency):
+            pass
+
+        def throttled(self, retry_after=None):
+            pass
+
+        def failure(self):
+            pass
+
+        def reset(self):
+            pass
+
+
+    @staticmethod
+    def _download(faults, window):
+        """
+        Runs Scraper.download_daily against a new stand-in server
+
+        Parameters
+        ----------
+        faults : dict
+            Fault keyword arguments of YahooServer.start
+        window : tuple or None
+            (seconds after the start the outage begins, seconds after the start it ends or None to never end), None for no outage
+
+        Returns
+        -------
+        tuple
+            (seconds taken, server stats, outcome)
+        """
+
+        server = YahooServer.start(retry_after=0.2, **faults)
+        urls = Scraper.use_urls(yfinance=server.url)
+        timers = []
+        if window is not None:
+            timers.append(threading.Timer(window[0], setattr, (server, 'outage', True)))
+            if window[1] is not None:
+                timers.append(threading.Timer(window[1], setattr, (server, 'outage', False)))
+        start = perf_counter()
+        for timer in timers:
+            timer.start()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                Scraper.download_daily()
+            outcome = 'completed'
+        except CircuitOpenError as e:
+            outcome = f'stopped ({e})'
+        finally:
+            elapsed = perf_counter() - start
+            for timer in timers:
+                timer.cancel()
+            Scraper.use_urls(**urls)
+            YahooServer.stop(server)
+        return elapsed, dict(server.stats), outcome
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the scraper against a fault injecting stand-in for Yahoo! Finance')
+    parser.add_argument('--tickers', type=int, default=200)
+    parser.add_argument('--rate', type=float, default=40, help='Most requests per second')
+    parser.add_argument('--outage', type=float, default=3, help='Seconds of the temporary outage')
+    args = parser.parse_args()
+    FaultBenchmark.run(args.tickers, args.rate, args.outage)
\ No newline at end of file
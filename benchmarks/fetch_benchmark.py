@@ -0,0 +1,71 @@
+import argparse
+import tracemalloc
+import pandas as pd
+from time import perf_counter
+from asx_tracker.date import Date
+from asx_tracker.database.database import Database
+from benchmarks.synthetic import Synthetic
+
+class FetchBenchmark():
+
+    # Benchmark
+
+    @staticmethod
+    def run(path, tickers, days, repeat):
+        """
+        Compares building a plot DataFrame from fetched tuples against the columnar fetch
+
+        Parameters
+        ----------
+        path : str
+            Path to the benchmark database (built if it does not exist)
+        tickers : int
+            Number of synthetic listings
+        days : int
+            Number of trading days per listing
+        repeat : int
+            Number of tickers to fetch the full intraday history of
+        """
+
+        names = Synthetic.build(path, tickers, days)[:repeat]
+        before = FetchBenchmark._measure(FetchBenchmark._tuples, names)
+        after = FetchBenchmark._measure(Database.fetch_single_intraday_frame, names)
+        rows = len(Database.fetch_single_intraday_array(names[0]))
+        print(f'Tuples to DataFrame:\t{before[0] * 1000:,.1f} ms, {before[1] / 2**20:,.1f} MiB peak ({rows:,} rows per ticker)')
+        print(f'Columnar fetch:\t\t{after[0] * 1000:,.1f} ms, {after[1] / 2**20:,.1f} MiB peak ({before[0] / after[0]:.1f}x faster)')
+
+
+    # Internal
+
+    @staticmethod
+    def _measure(fn, names):
+        tracemalloc.start()
+        start = perf_counter()
+        for ticker in names:
+            fn(ticker)
+        elapsed = (perf_counter() - start) / len(names)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return elapsed, peak
+
+
+    @staticmethod
+    def _tuples(ticker):
+        cols = [Database.COL_DATE, Database.COL_OPEN, Database.COL_HIGH, Database.COL_LOW, Database.COL_CLOSE, Database.COL_VOL]
+        data = Database.fetch_single_intraday(ticker, *cols)
+        df = pd.DataFrame(data, columns=cols)
+        for col in cols[1:5]:
+            df[col] /= 100
+        df[Database.COL_DATE] = Date.timestamp_to_datetime(*df[Database.COL_DATE])
+        df.set_index(Database.COL_DATE, inplace=True)
+        return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark fetching full intraday histories')
+    parser.add_argument('--path', default='benchmarks/benchmark.db')
+    parser.add_argument('--tickers', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    FetchBenchmark.run(args.path, args.tickers, args.days, args.repeat)
\ No newline at end of file
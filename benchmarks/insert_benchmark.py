@@ -0,0 +1,86 @@
+import argparse
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from time import perf_counter
+from asx_tracker.database.database import Database
+from asx_tracker.database.connection import Connection
+from benchmarks.synthetic import Synthetic
+
+class InsertBenchmark():
+
+    # Benchmark
+
+    @staticmethod
+    def run(tickers, days):
+        """
+        Compares rows inserted per second by the row-by-row loop against the columnar insert path
+
+        Parameters
+        ----------
+        tickers : int
+            Number of synthetic listings
+        days : int
+            Number of daily entries per listing (e.g. 2520 for a 10 year backfill)
+        """
+
+        df = InsertBenchmark._frame(tickers, days)
+        with tempfile.TemporaryDirectory() as tmp:
+            before = InsertBenchmark._time(InsertBenchmark._row_loop, df, os.path.join(tmp, 'before.db'))
+            after = InsertBenchmark._time(Database.insert_daily, df, os.path.join(tmp, 'after.db'))
+            Connection.close()
+        print(f'Row-by-row loop:\t{before:,.0f} rows/sec ({len(df):,} rows)')
+        print(f'Columnar insert:\t{after:,.0f} rows/sec ({after / before:.1f}x)')
+
+
+    # Internal
+
+    @staticmethod
+    def _frame(tickers, days):
+        rng = np.random.default_rng(0)
+        n = tickers * days
+        close = rng.integers(100, 10000, n)
+        return pd.DataFrame({
+            Database.COL_TICKER: np.repeat(Synthetic.tickers(tickers), days),
+            Database.COL_DATE: np.tile(Synthetic.START + np.arange(days) * 86400, tickers),
+            Database.COL_OPEN: close,
+            Database.COL_CLOSE: close,
+            Database.COL_LOW: close - 10,
+            Database.COL_HIGH: close + 10,
+            Database.COL_VOL: rng.integers(0, 1000000, n)})
+
+
+    @staticmethod
+    def _time(fn, df, path):
+        Synthetic.use(path)
+        tickers = df[Database.COL_TICKER].unique()
+        Database.insert_listings(pd.DataFrame({Database.COL_TICKER: tickers, Database.COL_NAME: tickers, Database.COL_MGMT_PCT: 0}))
+        start = perf_counter()
+        count = fn(df)
+        elapsed = perf_counter() - start
+        assert count == len(df)
+        return count / elapsed
+
+
+    @staticmethod
+    def _row_loop(df):
+        data = []
+        for i in range(len(df)):
+            row = df.iloc[i]
+            data.append((Database._ticker_id(row[Database.COL_TICKER]), int(row[Database.COL_DATE]), int(row[Database.COL_OPEN]), int(row[Database.COL_CLOSE]), int(row[Database.COL_LOW]), int(row[Database.COL_HIGH]), int(row[Database.COL_VOL])))
+        query = f"""
+        INSERT OR IGNORE INTO {Database.TAB_DAILY}
+        ({Database.COL_TICKER_ID}, {Database.COL_DATE}, {Database.COL_OPEN}, {Database.COL_CLOSE}, {Database.COL_LOW}, {Database.COL_HIGH}, {Database.COL_VOL})
+        VALUES
+        (?,?,?,?,?,?,?)
+        """
+        return Database._execute(query, values=data, fetch=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark bulk inserts of daily data')
+    parser.add_argument('--tickers', type=int, default=20)
+    parser.add_argument('--days', type=int, default=2520)
+    args = parser.parse_args()
+    InsertBenchmark.run(args.tickers, args.days)
\ No newline at end of file
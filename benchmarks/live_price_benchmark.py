@@ -0,0 +1,76 @@
+import argparse
+import random
+from time import perf_counter
+from asx_tracker.database.database import Database
+from asx_tracker.database.price_index import PriceIndex
+from benchmarks.synthetic import Synthetic
+
+class LivePriceBenchmark():
+
+    # Benchmark
+
+    @staticmethod
+    def run(path, tickers, days, basket, rounds):
+        """
+        Compares per-ticker live price lookups against the batched single-query lookup and the in-memory price index
+
+        Parameters
+        ----------
+        path : str
+            Path to the benchmark database (built if it does not exist)
+        tickers : int
+            Number of synthetic listings
+        days : int
+            Number of trading days per listing
+        basket : int
+            Number of tickers priced per lookup (e.g. open orders and holdings)
+        rounds : int
+            Number of lookups to time
+        """
+
+        names = Synthetic.build(path, tickers, days)
+        rng = random.Random(2)
+        lookups = [(date, rng.sample(names, basket)) for date in sorted(Synthetic.random_dates(rng, days, rounds))]
+
+        PriceIndex.ENABLED = False
+        before = LivePriceBenchmark._time(LivePriceBenchmark._per_ticker, lookups)
+        batched = LivePriceBenchmark._time(Database.fetch_multiple_live_prices, lookups)
+        PriceIndex.ENABLED = True
+        PriceIndex.invalidate(path)
+        cold = LivePriceBenchmark._time(Database.fetch_multiple_live_prices, lookups)
+        warm = LivePriceBenchmark._time(Database.fetch_multiple_live_prices, lookups)
+        print(f'Per-ticker queries:\t{before:,.0f} lookups/sec ({basket} tickers each)')
+        print(f'Batched query:\t\t{batched:,.0f} lookups/sec ({batched / before:.1f}x)')
+        print(f'Price index (cold):\t{cold:,.0f} lookups/sec ({cold / before:.1f}x, including first loads)')
+        print(f'Price index (warm):\t{warm:,.0f} lookups/sec ({warm / before:.1f}x)')
+
+
+    # Internal
+
+    @staticmethod
+    def _time(fn, lookups):
+        start = perf_counter()
+        for date, basket in lookups:
+            fn(date, *basket)
+        return len(lookups) / (perf_counter() - start)
+
+
+    @staticmethod
+    def _per_ticker(date, *tickers):
+        prices = {}
+        for ticker in tickers:
+            intraday = Database.fetch_single_live_intraday(ticker, date)
+            daily = Database.fetch_single_live_daily(ticker, date)
+            prices[ticker] = Database._live_price(date, *intraday, *daily)
+        return prices
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark live price lookups')
+    parser.add_argument('--path', default='benchmarks/benchmark.db')
+    parser.add_argument('--tickers', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=5)
+    parser.add_argument('--basket', type=int, default=20)
+    parser.add_argument('--rounds', type=int, default=2000)
+    args = parser.parse_args()
+    LivePriceBenchmark.run(args.path, args.tickers, args.days, args.basket, args.rounds)
\ No newline at end of file
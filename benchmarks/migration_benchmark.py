@@ -0,0 +1,117 @@
+import argparse
+import os
+import random
+import tempfile
+from time import perf_counter
+from asx_tracker.date import Date
+from asx_tracker.database.database import Database
+from asx_tracker.database.connection import Connection
+from asx_tracker.database.migration import Migration
+from asx_tracker.database.sql import Sql
+from benchmarks.synthetic import Synthetic
+
+class MigrationBenchmark():
+
+    # Benchmark
+
+    @staticmethod
+    def run(path, tickers, days, scans):
+        """
+        Compares database size and single day range scans per second before and after migrating a baseline (version 0) database
+
+        Parameters
+        ----------
+        path : str
+            Path to the benchmark database (built if it does not exist)
+        tickers : int
+            Number of synthetic listings
+        days : int
+            Number of trading days per listing
+        scans : int
+            Number of range scans to time
+        """
+
+        names = Synthetic.build(path, tickers, days)
+        rng = random.Random(3)
+        ranges = [(rng.choice(names), d, d + Date.DAY) for d in Synthetic.random_dates(rng, days, scans)]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            copy = os.path.join(tmp, 'baseline.db')
+            MigrationBenchmark._baseline(path, copy)
+            before = MigrationBenchmark._measure(copy, ranges, MigrationBenchmark._baseline_scan)
+            start = perf_counter()
+            Migration.migrate(copy, verbose=False)
+            elapsed = perf_counter() - start
+            after = MigrationBenchmark._measure(copy, ranges, MigrationBenchmark._scan)
+            version = Migration.version(copy)
+            Connection.close()
+            Database._PATH_DB = path
+
+        print(f'Migration:\t{elapsed:,.1f} s')
+        print(f'Version 0:\t{before[0] / 2**20:,.1f} MiB, {before[1]:,.0f} range scans/sec')
+        print(f'Version {version}:\t{after[0] / 2**20:,.1f} MiB ({after[0] / before[0]:.0%}), {after[1]:,.0f} range scans/sec ({after[1] / before[1]:.1f}x)')
+
+
+    # Internal
+
+    @staticmethod
+    def _baseline(path, copy):
+        """
+        Copies a database's listings, intraday and daily data into a new database using the unmigrated (version 0) tables
+        """
+
+        with Connection.writer(copy) as conn:
+            for query in [Sql.CREATE_TAB_LISTING, Sql.CREATE_TAB_INTRADAY, Sql.CREATE_TAB_DAILY]:
+                conn.execute(query)
+            conn.execute('ATTACH DATABASE ? AS src', (path,))
+        listing_cols = [Database.COL_TICKER, Database.COL_NAME, Database.COL_MGMT_PCT, Database.COL_LAST_INTRADAY, Database.COL_LAST_DAILY]
+        bar_cols = [Database.COL_DATE, Database.COL_OPEN, Database.COL_CLOSE, Database.COL_LOW, Database.COL_HIGH, Database.COL_VOL]
+        with Connection.transaction(copy) as conn:
+            conn.execute(f'INSERT INTO main.{Database.TAB_LISTING} SELECT {",".join(listing_cols)} FROM src.{Database.TAB_LISTING}')
+            for table in [Database.TAB_INTRADAY, Database.TAB_DAILY]:
+                conn.execute(f"""
+                INSERT INTO main.{table}
+                SELECT l.{Database.COL_TICKER}, {",".join(['b.' + c for c in bar_cols])}
+                FROM src.{table} AS b JOIN src.{Database.TAB_LISTING} AS l ON l.{Database.COL_ID} = b.{Database.COL_TICKER_ID}
+                """)
+        with Connection.writer(copy) as conn:
+            conn.execute('DETACH DATABASE src')
+
+
+    @staticmethod
+    def _measure(path, ranges, scan_fn):
+        conn = Connection.get(path)
+        conn.execute('VACUUM')
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        size = os.path.getsize(path)
+        Database._PATH_DB = path
+        start = perf_counter()
+        for ticker, start_date, end_date in ranges:
+            scan_fn(ticker, start=start_date, end=end_date)
+        return size, len(ranges) / (perf_counter() - start)
+
+
+    @staticmethod
+    def _scan(ticker, start, end):
+        cols = [Database.COL_DATE, Database.COL_OPEN, Database.COL_HIGH, Database.COL_LOW, Database.COL_CLOSE, Database.COL_VOL]
+        return Database.fetch_single_intraday(ticker, *cols, start=start, end=end)
+
+
+    @staticmethod
+    def _baseline_scan(ticker, start, end):
+        query = f"""
+        SELECT {Database.COL_DATE}, {Database.COL_OPEN}, {Database.COL_HIGH}, {Database.COL_LOW}, {Database.COL_CLOSE}, {Database.COL_VOL}
+        FROM {Database.TAB_INTRADAY} WHERE {Database.COL_TICKER} = ? AND {Database.COL_DATE} BETWEEN ? AND ?
+        ORDER BY {Database.COL_DATE}
+        """
+        return Database._execute(query, params=(ticker, start, end))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark schema migrations')
+    parser.add_argument('--path', default='benchmarks/benchmark.db')
+    parser.add_argument('--tickers', type=int, default=2000)
+    parser.add_argument('--days', type=int, default=5)
+    parser.add_argument('--scans', type=int, default=5000)
+    args = parser.parse_args()
+    MigrationBenchmark.run(args.path, args.tickers, args.days, args.scans)
\ No newline at end of file
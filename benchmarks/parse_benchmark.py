@@ -0,0 +1,99 @@
+import argparse
+import json
+import os
+import numpy as np
+import pandas as pd
+from time import perf_counter
+from asx_tracker import scraper
+from asx_tracker.date import Date
+from asx_tracker.scraper import Scraper
+from asx_tracker.database.database import Database
+from benchmarks.synthetic import Synthetic
+from benchmarks.yahoo_server import YahooServer
+
+class ParseBenchmark():
+
+    # Benchmark
+
+    @staticmethod
+    def run(payloads, repeat):
+        """
+        Compares the time to parse chart API responses into insertable columns by building a DataFrame against Scraper._parse_chart
+
+        Parameters
+        ----------
+        payloads : list
+            Paths to recorded chart API responses, or empty for synthetic one week 1 minute and ten year daily responses
+        repeat : int
+            Number of times each response is parsed
+        """
+
+        if payloads:
+            contents = [(os.path.basename(p), open(p, 'rb').read()) for p in payloads]
+        else:
+            contents = [
+                ('1m (1 week)', json.dumps(YahooServer.chart('AAA.AX', Synthetic.START, Synthetic.START + Date.WEEK, '1m')).encode()),
+                ('1d (10 years)', json.dumps(YahooServer.chart('AAA.AX', Synthetic.START, Synthetic.START + 3652 * Date.DAY, '1d')).encode())]
+        decoders = [('json', json.loads)]
+        if scraper.json_loads is not json.loads:
+            decoders.append(('orjson', scraper.json_loads))
+
+        for name, content in contents:
+            before = ParseBenchmark._time(ParseBenchmark._dataframe, content, repeat)
+            print(f'{name}, {len(content) / 1024:.0f} KiB:')
+            print(f'  DataFrame:\t\t{before * 1000:.2f} ms')
+            for decoder, loads in decoders:
+                scraper.json_loads = loads
+                after = ParseBenchmark._time(Scraper._parse_chart, content, repeat)
+                print(f'  Arrays ({decoder}):\t{after * 1000:.2f} ms ({before / after:.1f}x)')
+            ParseBenchmark._check(content)
+        scraper.json_loads = decoders[-1][1]
+
+
+    # Internal
+
+    @staticmethod
+    def _time(fn, content, repeat):
+        start = perf_counter()
+        for _ in range(repeat):
+            fn(content, 'AAA')
+        return (perf_counter() - start) / repeat
+
+
+    @staticmethod
+    def _dataframe(content, ticker):
+        """
+        Parses a chart API response the way the scraper did before Scraper._parse_chart (without the validation, which both share)
+        """
+
+        data = json.loads(content)['chart']['result'][0]
+        quote = data['indicators']['quote'][0]
+        df = pd.DataFrame({
+            Database.COL_DATE: data[Scraper._COL_API_DATE],
+            Database.COL_HIGH: quote[Scraper._COL_API_HIGH],
+            Database.COL_OPEN: quote[Scraper._COL_API_OPEN],
+            Database.COL_LOW: quote[Scraper._COL_API_LOW],
+            Database.COL_CLOSE: quote[Scraper._COL_API_CLOSE],
+            Database.COL_VOL: quote[Scraper._COL_API_VOL]})
+        df.dropna(how='any', inplace=True)
+        for col in [Database.COL_HIGH, Database.COL_OPEN, Database.COL_LOW, Database.COL_CLOSE]:
+            df[col] = round(df[col] * 100).astype(int)
+        df[Database.COL_VOL] = df[Database.COL_VOL].astype(int)
+        df[Database.COL_TICKER] = ticker
+        return df
+
+
+    @staticmethod
+    def _check(content):
+        df = ParseBenchmark._dataframe(content, 'AAA')
+        data = Scraper._parse_chart(content, 'AAA')
+        for col in df.columns:
+            assert np.array_equal(df[col].to_numpy(), data[col]), f'{col} differs'
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark parsing chart API responses')
+    parser.add_argument('payloads', nargs='*', help='Recorded chart API responses (by default synthetic 1m and 1d responses)')
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    ParseBenchmark.run(args.payloads, args.repeat)
\ No newline at end of file
@@ -0,0 +1,59 @@
+import argparse
+from asx_tracker.date import Date
+from asx_tracker.scraper import Scraper
+
+class PlanBenchmark():
+
+    # Benchmark
+
+    @staticmethod
+    def run(tickers):
+        """
+        Compares the intraday requests planned by walking forward one week per request (the scraper before the trading calendar planner)
+        against Scraper._plan_intraday, for downloads at different times since the last one
+
+        Parameters
+        ----------
+        tickers : int
+            Number of listings downloaded
+        """
+
+        monday = Date.timestamp_to_day_start(Date.date_str_to_timestamp('12 OCT 2026 10:00AM'))
+        at = lambda days, hour: monday + days * Date.DAY + hour * Date.HOUR
+        scenarios = [
+            ('Saturday, last download Friday close', at(5, 12), at(4, 16)),
+            ('Monday before open, last Friday close', at(7, 9), at(4, 16)),
+            ('Weekday evening, last at close', at(2, 20), at(2, 16)),
+            ('Weekday midday, last previous close', at(2, 12), at(1, 16)),
+            ('Two weeks since the last download', at(2, 12), at(-12, 16)),
+            ('New listings', at(2, 12), 0)]
+        print(f'{tickers} tickers')
+        print(f'{"Scenario":<40} {"Week walk":>10} {"Planner":>8}  {"Days of history":>16}')
+        for name, now, last_save in scenarios:
+            before = PlanBenchmark._week_walk(last_save, now)
+            after = Scraper._plan_intraday(last_save, now)
+            history = lambda windows: f'{(now - windows[0][0]) / Date.DAY:.1f}' if windows else '-'
+            print(f'{name:<40} {len(before) * tickers:>10} {len(after) * tickers:>8}  {history(before):>7} -> {history(after):<6}')
+
+
+    # Internal
+
+    @staticmethod
+    def _week_walk(last_save, now):
+        """
+        Plans windows the way the scraper did before Scraper._plan_intraday, one week per request from the last save (or 30 days ago)
+        """
+
+        windows = []
+        start = max(last_save + 1, Date.timestamp_30_days(now, Date.HOUR))
+        while start <= now:
+            windows.append((start, start + Date.WEEK))
+            start += Date.WEEK + 1
+        return windows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the number of intraday requests planned per download')
+    parser.add_argument('--tickers', type=int, default=2000)
+    args = parser.parse_args()
+    PlanBenchmark.run(args.tickers)
\ No newline at end of file
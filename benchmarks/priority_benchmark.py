@@ -0,0 +1,127 @@
+import argparse
+import contextlib
+import io
+import os
+import random
+import tempfile
+import pandas as pd
+from time import perf_counter
+from asx_tracker.date import Date
+from asx_tracker.scraper import Scraper
+from asx_tracker.rate_controller import RateController
+from asx_tracker.database.database import Database
+from asx_tracker.database.connection import Connection
+from benchmarks.synthetic import Synthetic
+from benchmarks.yahoo_server import YahooServer
+
+class PriorityBenchmark():
+
+    # Benchmark
+
+    @staticmethod
+    def run(tickers, delisted_pct, watched, runs, rate):
+        """
+        Downloads daily data for synthetic listings several times in a row from a stand-in for Yahoo! Finance, comparing alphabetical order without back off
+        (the scraper before Database.fetch_scrape_schedule) against priority order with delisted tickers backed off.
+        Each run follows a week without downloads, so every listed ticker has data to scrape
+
+        Parameters
+        ----------
+        tickers : int
+            Number of synthetic listings
+        delisted_pct : float
+            Percentage of listings the server answers with status code 400
+        watched : int
+            Number of listings on the watchlist (the last alphabetically)
+        runs : int
+            Number of downloads in a row
+        rate : float
+            Most requests per second
+        """
+
+        names = Synthetic.tickers(tickers)
+        delisted = random.Random(0).sample(names, int(tickers * delisted_pct / 100))
+        server = YahooServer.start(delisted=[f'{t}{Scraper._TICKER_EXT}' for t in delisted])
+        schedule_fn = Database.fetch_scrape_schedule
+        backoff = Scraper._BACKOFF, Scraper._MAX_BACKOFF
+        urls = Scraper.use_urls(yfinance=server.url)
+        print(f'{tickers} tickers ({len(delisted)} delisted, {watched} watched) at up to {rate:.0f} requests/sec')
+        print(f'{"Order":<12} {"Run":>3} {"Time s":>7} {"Requests":>9} {"Watchlist fresh":>16} {"Busiest 10% fresh":>18}')
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                for order in ['alphabetical', 'priority']:
+                    Synthetic.use(os.path.join(tmp, f'{order}.db'))
+                    Database.insert_listings(pd.DataFrame({
+                        Database.COL_TICKER: names, Database.COL_NAME: names, Database.COL_MGMT_PCT: 0,
+                        Database.COL_LAST_INTRADAY: 0, Database.COL_LAST_DAILY: Date.timestamp_now(-60 * Date.DAY)}))
+                    for ticker in names[-watched:] if watched else []:
+                        Database.add_watchlist(ticker)
+                    if order == 'alphabetical':
+                        Database.fetch_scrape_schedule = lambda interval, date_col, now, volume_since: Database.fetch_all_listings(Database.COL_TICKER, date_col)
+                        Scraper._BACKOFF = Scraper._MAX_BACKOFF = 0
+                    for i in range(runs):
+                        if i:
+                            with Connection.transaction(Database._PATH_DB) as conn:
+                                conn.execute(f'UPDATE {Database.TAB_LISTING} SET {Database.COL_LAST_DAILY} = {Database.COL_LAST_DAILY} - ?', (Date.WEEK,))
+                        Scraper._rate = RateController(rate)
+                        server.stats.update(requests=0)
+                        start = perf_counter()
+                        with contextlib.redirect_stdout(io.StringIO()):
+                            Scraper.download_daily()
+                        elapsed = perf_counter() - start
+                        watch_fresh, busy_fresh = PriorityBenchmark._fresh_after(names[-watched:] if watched else [])
+                        print(f'{order:<12} {i + 1:>3} {elapsed:>7.1f} {server.stats["requests"]:>9} {watch_fresh:>16} {busy_fresh:>18}')
+                    Database.fetch_scrape_schedule = schedule_fn
+                    Scraper._BACKOFF, Scraper._MAX_BACKOFF = backoff
+                Connection.close()
+        finally:
+            Database.fetch_scrape_schedule = schedule_fn
+            Scraper._BACKOFF, Scraper._MAX_BACKOFF = backoff
+            Scraper.use_urls(**urls)
+            YahooServer.stop(server)
+
+
+    # Internal
+
+    @staticmethod
+    def _fresh_after(watched):
+        """
+        Returns the number of requests of the last download before the watched tickers, and the busiest 10% of tickers by recent daily volume, were all scraped.
+        Workers claim jobs in plan order, so this is the position of the last of their jobs
+
+        Parameters
+        ----------
+        watched : list
+            Watched tickers
+
+        Returns
+        -------
+        tuple
+            (requests before the watched tickers were scraped, requests before the busiest tickers were scraped)
+        """
+
+        conn = Connection.get(Database._PATH_DB)
+        jobs = [t for t, in conn.execute(f"""
+        SELECT l.{Database.COL_TICKER} FROM {Database._TAB_SCRAPE_JOB} j
+        JOIN {Database.TAB_LISTING} l ON l.{Database.COL_ID} = j.{Database.COL_TICKER_ID}
+        WHERE j.interval = ? ORDER BY j.id
+        """, (Scraper._INTERVAL_DAILY,))]
+        volumes = conn.execute(f'''
+        SELECT {Database.COL_TICKER_ID}, SUM({Database.COL_VOL}) FROM {Database.TAB_DAILY}
+        WHERE {Database.COL_DATE} >= ? GROUP BY {Database.COL_TICKER_ID} ORDER BY 2 DESC
+        ''', (Date.timestamp_now() - Scraper._VOLUME_PERIOD,)).fetchall()
+        ids = {i: t for t, i in conn.execute(f'SELECT {Database.COL_TICKER}, {Database.COL_ID} FROM {Database.TAB_LISTING}')}
+        busiest = [ids[i] for i, _ in volumes[:max(1, len(volumes) // 10)]]
+        position = lambda tickers: max((jobs.index(t) + 1 for t in tickers if t in jobs), default=0)
+        return position(watched), position(busiest)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the order and number of scraper requests with and without priorities and back off')
+    parser.add_argument('--tickers', type=int, default=300)
+    parser.add_argument('--delisted-pct', type=float, default=20, help='Percentage of listings that return no data')
+    parser.add_argument('--watched', type=int, default=10, help='Listings on the watchlist')
+    parser.add_argument('--runs', type=int, default=3, help='Downloads in a row')
+    parser.add_argument('--rate', type=float, default=100, help='Most requests per second')
+    args = parser.parse_args()
+    PriorityBenchmark.run(args.tickers, args.delisted_pct, args.watched, args.runs, args.rate)
\ No newline at end of file
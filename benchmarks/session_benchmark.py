@@ -0,0 +1,56 @@
+import argparse
+import requests
+from time import perf_counter
+from asx_tracker.date import Date
+from asx_tracker.scraper import Scraper
+from asx_tracker.utils import Utils
+from benchmarks.synthetic import Synthetic
+from benchmarks.yahoo_server import YahooServer
+
+class SessionBenchmark():
+
+    # Benchmark
+
+    @staticmethod
+    def run(requests_, latency, handshake):
+        """
+        Compares the mean latency of one week 1 minute chart requests sent without a session (a new connection each)
+        against the scraper's shared keep-alive session, served by a local stand-in for Yahoo! Finance
+
+        Parameters
+        ----------
+        requests_ : int
+            Number of requests of each kind
+        latency : float
+            Seconds the server adds to every response
+        handshake : float
+            Seconds the server adds to every new connection (i.e. the TCP and TLS handshakes of a real server)
+        """
+
+        server = YahooServer.start(latency, handshake)
+        try:
+            url = f'{server.url}{YahooServer.PATH_CHART}AAA{Scraper._TICKER_EXT}?{Scraper._PARAM_INTERVAL}={Scraper._INTERVAL_INTRADAY}'
+            url += f'&{Scraper._PARAM_START}={Synthetic.START}&{Scraper._PARAM_END}={Synthetic.START + Date.WEEK}'
+            rows = len(Scraper._get(url).json()['chart']['result'][0]['timestamp'])
+            print(f'{requests_} requests of {rows} bars ({latency * 1000:.0f} ms latency, {handshake * 1000:.0f} ms per new connection)')
+            for name, fn in [
+                ('No session', lambda: requests.get(url, headers={'User-Agent': Utils.USER_AGENT, 'Accept-Encoding': 'identity'})),
+                ('Shared session', lambda: Scraper._get(url, check=False))]:
+                server.stats.update(connections=0, requests=0, bytes=0)
+                start = perf_counter()
+                for _ in range(requests_):
+                    fn().json()
+                mean = (perf_counter() - start) / requests_
+                stats = server.stats
+                print(f'{name}:\t{mean * 1000:.1f} ms mean, {stats["connections"]} new connections, {stats["bytes"] / stats["requests"] / 1024:.1f} KiB per response')
+        finally:
+            YahooServer.stop(server)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark scraper request latency with and without a keep-alive session')
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--latency-ms', type=float, default=20)
+    parser.add_argument('--handshake-ms', type=float, default=60)
+    args = parser.parse_args()
+    SessionBenchmark.run(args.requests, args.latency_ms / 1000, args.handshake_ms / 1000)
\ No newline at end of file
@@ -0,0 +1,170 @@
+import os
+import random
+from asx_tracker.date import Date
+from asx_tracker.database.database import Database
+from asx_tracker.database.connection import Connection
+
+class Synthetic():
+
+    # Static variables
+
+    START           = 1609714800 # 4 JAN 2021 10:00AM (Sydney)
+    MINUTES_PER_DAY = 361
+    _BATCH          = 100000
+
+
+    # Databases
+
+    @staticmethod
+    def use(path):
+        """
+        Points the Database class at a benchmark database and creates its tables
+
+        Parameters
+        ----------
+        path : str
+            Path to the benchmark database
+        """
+
+        Connection.close()
+        Database._PATH_DB = path
+        Database.create_tables()
+
+
+    @staticmethod
+    def build(path, tickers, days, seed=0):
+        """
+        Builds a database filled with synthetic listings, intraday and daily data.
+        Existing databases at the path are reused as is
+
+        Parameters
+        ----------
+        path : str
+            Path to the benchmark database
+        tickers : int
+            Number of listings
+        days : int
+            Number of trading days of intraday and daily data per listing
+        seed : int, optional
+            Random seed, by default 0
+
+        Returns
+        -------
+        list
+            Synthetic tickers
+        """
+
+        names = Synthetic.tickers(tickers)
+        exists = os.path.exists(path)
+        Synthetic.use(path)
+        if exists:
+            return names
+
+        rng = random.Random(seed)
+        with Connection.transaction(path) as conn:
+            conn.executemany(
+                f'INSERT INTO {Database.TAB_LISTING} ({Database.COL_TICKER}, {Database.COL_NAME}, {Database.COL_MGMT_PCT}) VALUES (?,?,?)',
+                [(t, t, 0) for t in names])
+            ids = [Database._ticker_id(t) for t in names]
+            for table, rows in [(Database.TAB_DAILY, Synthetic._daily_rows), (Database.TAB_INTRADAY, Synthetic._intraday_rows)]:
+                query = f"""
+                INSERT INTO {table}
+                ({Database.COL_TICKER_ID}, {Database.COL_DATE}, {Database.COL_OPEN}, {Database.COL_CLOSE}, {Database.COL_LOW}, {Database.COL_HIGH}, {Database.COL_VOL})
+                VALUES (?,?,?,?,?,?,?)
+                """
+                batch = []
+                for ticker_id in ids:
+                    for row in rows(rng, ticker_id, days):
+                        batch.append(row)
+                        if len(batch) == Synthetic._BATCH:
+                            conn.executemany(query, batch)
+                            batch = []
+                conn.executemany(query, batch)
+        return names
+
+
+    @staticmethod
+    def tickers(n):
+        """
+        Returns a list of synthetic tickers
+
+        Parameters
+        ----------
+        n : int
+            Number of tickers
+
+        Returns
+        -------
+        list
+            Synthetic tickers
+        """
+
+        letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+        return [letters[i // 676 % 26] + letters[i // 26 % 26] + letters[i % 26] for i in range(n)]
+
+
+    @staticmethod
+    def trading_days(days):
+        """
+        Returns the market open timestamps of consecutive trading days
+
+        Parameters
+        ----------
+        days : int
+            Number of trading days
+
+        Returns
+        -------
+        list
+            Timestamps of each market open
+        """
+
+        opens = []
+        date = Synthetic.START
+        while len(opens) < days:
+            opens.append(date)
+            date = Date.timestamp_next_open(date)
+        return opens
+
+
+    @staticmethod
+    def random_dates(rng, days, n):
+        """
+        Returns random timestamps during market hours of the synthetic trading days
+
+        Parameters
+        ----------
+        rng : random.Random
+            Random number generator
+        days : int
+            Number of trading days
+        n : int
+            Number of timestamps
+
+        Returns
+        -------
+        list
+            Random timestamps
+        """
+
+        opens = Synthetic.trading_days(days)
+        return [rng.choice(opens) + rng.randrange(Synthetic.MINUTES_PER_DAY) * Date.MINUTE for _ in range(n)]
+
+
+    # Internal
+
+    @staticmethod
+    def _intraday_rows(rng, ticker_id, days):
+        price = rng.randint(100, 10000)
+        for day_open in Synthetic.trading_days(days):
+            for m in range(Synthetic.MINUTES_PER_DAY):
+                price = max(1, price + rng.randint(-2, 2))
+                yield (ticker_id, day_open + m * Date.MINUTE, price, price, price - 1, price + 1, rng.randint(0, 10000))
+
+
+    @staticmethod
+    def _daily_rows(rng, ticker_id, days):
+        price = rng.randint(100, 10000)
+        for day_open in Synthetic.trading_days(days):
+            price = max(1, price + rng.randint(-20, 20))
+            yield (ticker_id, day_open, price, price, price - 10, price + 10, rng.randint(0, 1000000))
\ No newline at end of file
@@ -0,0 +1,117 @@
+import argparse
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from time import perf_counter
+from asx_tracker.date import Date
+from asx_tracker.scraper import Scraper
+from asx_tracker.database.database import Database
+from asx_tracker.database.connection import Connection
+from asx_tracker.database.partition import Partition
+from benchmarks.synthetic import Synthetic
+
+class TransactionBenchmark():
+
+    # Benchmark
+
+    @staticmethod
+    def run(tickers, weeks, months=None):
+        """
+        Compares commits and rows saved per second by an intraday backfill that commits each insert and save date update separately,
+        one transaction per scraped week, and one transaction per Scraper._COMMIT_PERIODS weeks (as Scraper does)
+
+        Parameters
+        ----------
+        tickers : int
+            Number of synthetic listings
+        weeks : int
+            Number of weeks of 1 minute intraday data scraped per listing
+        months : int, optional
+            Months per intraday partition, by default None (i.e. unpartitioned)
+        """
+
+        Partition.MONTHS = months
+        periods = TransactionBenchmark._periods(tickers, weeks)
+        rows = sum(len(df) for _, _, _, df, _ in periods)
+        print(f'Backfilling {len(periods)} weeks ({rows:,} rows) for {tickers} tickers')
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, fn in [
+                ('Separate commits', TransactionBenchmark._separate),
+                ('Commit per week', TransactionBenchmark._per_week),
+                (f'Commit per {Scraper._COMMIT_PERIODS} weeks', TransactionBenchmark._per_batch)]:
+                Synthetic.use(os.path.join(tmp, f'{len(os.listdir(tmp))}.db'))
+                names = Synthetic.tickers(tickers)
+                Database.insert_listings(pd.DataFrame({Database.COL_TICKER: names, Database.COL_NAME: names, Database.COL_MGMT_PCT: 0}))
+                start = perf_counter()
+                commits = fn(periods)
+                elapsed = perf_counter() - start
+                print(f'{name}:\t{commits / elapsed:,.0f} commits/sec, {rows / elapsed:,.0f} rows/sec ({commits} commits, {elapsed:.2f} s)')
+            Connection.close()
+        Partition._registry.clear()
+
+
+    # Internal
+
+    @staticmethod
+    def _periods(tickers, weeks):
+        """
+        Returns one week of synthetic 1 minute intraday data per ticker and week, in the order Scraper saves them
+
+        Returns
+        -------
+        list
+            (job id, ticker, Database.insert_intraday, DataFrame, Database.COL_LAST_INTRADAY) of each week (see Scraper._commit)
+        """
+
+        rng = np.random.default_rng(0)
+        opens = np.array(Synthetic.trading_days(5 * weeks))
+        minutes = np.arange(Synthetic.MINUTES_PER_DAY) * Date.MINUTE
+        periods = []
+        for ticker in Synthetic.tickers(tickers):
+            for week in range(weeks):
+                dates = (opens[5 * week:5 * (week + 1), None] + minutes).ravel()
+                close = rng.integers(100, 10000, len(dates))
+                periods.append((len(periods), ticker, Database.insert_intraday, pd.DataFrame({
+                    Database.COL_TICKER: ticker,
+                    Database.COL_DATE: dates,
+                    Database.COL_OPEN: close,
+                    Database.COL_CLOSE: close,
+                    Database.COL_LOW: close - 1,
+                    Database.COL_HIGH: close + 1,
+                    Database.COL_VOL: rng.integers(0, 10000, len(dates))}), Database.COL_LAST_INTRADAY))
+        return periods
+
+
+    @staticmethod
+    def _separate(periods):
+        for _, ticker, insert_fn, df, date_col in periods:
+            insert_fn(df)
+            Database.update_listings_date(ticker, df[Database.COL_DATE].max(), date_col)
+        return 2 * len(periods)
+
+
+    @staticmethod
+    def _per_week(periods):
+        for period in periods:
+            Scraper._commit([period])
+        return len(periods)
+
+
+    @staticmethod
+    def _per_batch(periods):
+        commits = 0
+        batch = Scraper._COMMIT_PERIODS
+        for i in range(0, len(periods), batch):
+            Scraper._commit(periods[i:i + batch])
+            commits += 1
+        return commits
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark commits per second of an intraday backfill')
+    parser.add_argument('--tickers', type=int, default=100)
+    parser.add_argument('--weeks', type=int, default=4)
+    parser.add_argument('--months', type=int, default=None, help='Months per intraday partition')
+    args = parser.parse_args()
+    TransactionBenchmark.run(args.tickers, args.weeks, args.months)
\ No newline at end of file
@@ -0,0 +1,376 @@
+import argparse
+import gzip
+import json
+import os
+import random
+import threading
+import zlib
+from time import sleep
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from asx_tracker.date import Date
+from asx_tracker.scraper import Scraper
+from benchmarks.synthetic import Synthetic
+
+class YahooServer():
+
+    # Static variables
+
+    PATH_CHART      = '/v8/finance/chart/'
+    PATH_ETP        = '/etps'
+    PATH_COMPANIES  = '/companies.csv'
+    NULL_PCT        = 1 # Percentage of bars returned as nulls, as Yahoo! Finance does for minutes without trades
+    _INTERVALS      = {'1m': 60, '2m': 120, '5m': 300, '15m': 900, '30m': 1800, '60m': 3600, '90m': 5400, '1h': 3600}
+    _MINUTES_OPEN   = (Date.HOUR_CLOSE - Date.HOUR_OPEN) * 60
+    _OUTAGE_PAGE    = b'<html><body><h1>Will be right back...</h1></body></html>'
+    _HISTORY        = 3652 * Date.DAY # Synthetic listings have 10 years of history
+    _FIXTURE_CHART  = 'chart'
+    _FIXTURE_ETP    = 'etps.html'
+    _FIXTURE_COM    = 'companies.csv'
+
+
+    # Server
+
+    @staticmethod
+    def start(latency=0.0, handshake=0.0, port=0, error_pct=0, throttle_pct=0, spike_pct=0, spike_latency=1.0, retry_after=1, delisted=(), companies=(), etfs=(), fixtures=None):
+        """
+        Starts a local stand-in for the Yahoo! Finance chart API and the ASX directories on a background thread.
+        Responses are synthetic unless a recorded one is found in the fixtures directory (see YahooServer.record).
+        Faults can be injected at random, and setting server.outage serves Yahoo! Finance's outage page to every request until it is cleared
+
+        Parameters
+        ----------
+        latency : float, optional
+            Seconds added to every response, by default 0.0
+        handshake : float, optional
+            Seconds added once per new connection (i.e. the TCP and TLS handshakes of a real server), by default 0.0
+        port : int, optional
+            Port to listen on, by default 0 (i.e. any free port)
+        error_pct : float, optional
+            Percentage of requests answered with status code 503, by default 0
+        throttle_pct : float, optional
+            Percentage of requests answered with status code 429, by default 0
+        spike_pct : float, optional
+            Percentage of requests slowed by spike_latency, by default 0
+        spike_latency : float, optional
+            Seconds added to slowed requests, by default 1.0
+        retry_after : int, optional
+            Seconds asked for in the Retry-After header of status code 429 responses, by default 1
+        delisted : iterable, optional
+            Tickers (with .AX extension) answered with status code 400 and no data, as Yahoo! Finance does for delisted tickers, by default ()
+        companies : iterable, optional
+            Tickers of the companies listed at YahooServer.PATH_COMPANIES, by default ()
+        etfs : iterable, optional
+            Tickers of the ETFs listed at YahooServer.PATH_ETP, by default ()
+        fixtures : str, optional
+            Directory of recorded responses, by default None
+
+        Returns
+        -------
+        http.server.ThreadingHTTPServer
+            Running server, with its base URL in server.url and counts of connections, requests, faults and bytes sent in server.stats
+        """
+
+        server = ThreadingHTTPServer(('127.0.0.1', port), YahooServer._Handler)
+        server.daemon_threads = True
+        server.latency = latency
+        server.handshake = handshake
+        server.error_pct = error_pct
+        server.throttle_pct = throttle_pct
+        server.spike_pct = spike_pct
+        server.spike_latency = spike_latency
+        server.retry_after = retry_after
+        server.outage = False
+        server.delisted = set(delisted)
+        server.companies = list(companies)
+        server.etfs = list(etfs)
+        server.fixtures = fixtures
+        server.rng = random.Random(0)
+        server.url = f'http://127.0.0.1:{server.server_port}'
+        server.stats = {'connections': 0, 'requests': 0, 'faults': 0, 'bytes': 0}
+        server.stats_lock = threading.Lock()
+        server.cache = {} # Encoded responses by request, so repeated requests are not slowed by rebuilding them
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+    @staticmethod
+    def stop(server):
+        """
+        Stops a server started by YahooServer.start
+
+        Parameters
+        ----------
+        server : http.server.ThreadingHTTPServer
+            Server to stop
+        """
+
+        server.shutdown()
+        server.server_close()
+
+
+    @staticmethod
+    def record(directory, tickers, companies_url=None):
+        """
+        Records real responses from Yahoo! Finance and the ASX website into a fixtures directory for YahooServer.start.
+        Each ticker's latest request of every intraday interval (see Scraper._INTERVAL_HISTORY) and 10 years of daily data are recorded,
+        and served whatever dates are requested
+
+        Parameters
+        ----------
+        directory : str
+            Fixtures directory
+        tickers : list
+            Listing tickers (without .AX extension)
+        companies_url : str, optional
+            URL of the ASX's CSV of companies (see UpdateMenu.set_comp_url), by default None (i.e. not recorded)
+        """
+
+        os.makedirs(os.path.join(directory, YahooServer._FIXTURE_CHART), exist_ok=True)
+        now = Date.timestamp_now()
+        for ticker in tickers:
+            intraday = [
+                {Scraper._PARAM_INTERVAL: interval, Scraper._PARAM_START: max(earliest_fn(now, Date.HOUR), now - seconds), Scraper._PARAM_END: now}
+                for interval, (earliest_fn, seconds) in Scraper._INTERVAL_HISTORY.items()]
+            for params in intraday + [{Scraper._PARAM_INTERVAL: Scraper._INTERVAL_DAILY, Scraper._PARAM_RANGE: Scraper._RANGE_DAILY}]:
+                response = Scraper._get(Scraper._url_yfinance(f'{ticker}{Scraper._TICKER_EXT}', params))
+                with open(YahooServer._fixture_chart(directory, f'{ticker}{Scraper._TICKER_EXT}', params[Scraper._PARAM_INTERVAL]), 'wb') as f:
+                    f.write(response.content)
+        pages = [(Scraper._URL_ETP, YahooServer._FIXTURE_ETP)] + ([(companies_url, YahooServer._FIXTURE_COM)] if companies_url else [])
+        for url, name in pages:
+            with open(os.path.join(directory, name), 'wb') as f:
+                f.write(Scraper._get(url).content)
+
+
+    # Payloads
+
+    @staticmethod
+    def chart(ticker, start, end, interval):
+        """
+        Returns a synthetic chart API response, with bars at every interval of trading hours between two dates.
+        Prices are a random walk seeded by the ticker, so the same request always returns the same bars
+
+        Parameters
+        ----------
+        ticker : str
+            Listing ticker (with .AX extension)
+        start : int
+            Timestamp of the first bar
+        end : int
+            Timestamp of the last bar
+        interval : str
+            Bar interval, e.g. '1m' or '1d'
+
+        Returns
+        -------
+        dict
+            Response in the chart API's JSON structure
+        """
+
+        step = YahooServer._INTERVALS.get(interval)
+        start = max(start, end - YahooServer._HISTORY)
+        dates = []
+        day = Date.timestamp_next_open(Date.timestamp_to_day_start(start))
+        while day <= end:
+            offsets = [0] if step is None else range(0, YahooServer._MINUTES_OPEN * 60 + 1, step)
+            dates += [day + offset for offset in offsets if start <= day + offset <= end]
+            day = Date.timestamp_next_open(day)
+
+        result = {'meta': {'symbol': ticker, 'dataGranularity': interval}}
+        if dates:
+            rng = random.Random(zlib.crc32(ticker.encode()))
+            price = rng.uniform(1, 100)
+            quote = {'open': [], 'high': [], 'low': [], 'close': [], 'volume': []}
+            for _ in dates:
+                if rng.random() * 100 < YahooServer.NULL_PCT:
+                    for values in quote.values():
+                        values.append(None)
+                    continue
+                open_ = price
+                price = max(0.01, price * (1 + rng.gauss(0, 0.002)))
+                quote['open'].append(round(open_, 4))
+                quote['close'].append(round(price, 4))
+                quote['low'].append(round(min(open_, price) * 0.999, 4))
+                quote['high'].append(round(max(open_, price) * 1.001, 4))
+                quote['volume'].append(rng.randrange(100000))
+            result['timestamp'] = dates
+            result['indicators'] = {'quote': [quote]}
+        return {'chart': {'result': [result], 'error': None}}
+
+
+    @staticmethod
+    def etp_page(etfs):
+        """
+        Returns a synthetic ASX exchange traded product directory, with a table of ETFs and a table of other products that the scraper should skip
+
+        Parameters
+        ----------
+        etfs : list
+            ETF tickers
+
+        Returns
+        -------
+        str
+            HTML page
+        """
+
+        rng = random.Random(0)
+        tables = []
+        for kind, tickers in [('ETF', etfs), ('SP', [f'{t[:2]}Z' for t in etfs[:5]])]:
+            rows = ''.join(f'<tr><td>{t}</td><td>{kind}</td><td>{t} exposure</td><td>{rng.randrange(5, 100) / 100:.2f}</td></tr>' for t in tickers)
+            tables.append(f'<table><thead><tr><th>ASX Code</th><th>Type</th><th>Exposure</th><th>Management Cost %</th></tr></thead><tbody>{rows}</tbody></table>')
+        return f'<html><body>{"".join(tables)}</body></html>'
+
+
+    @staticmethod
+    def companies_csv(companies):
+        """
+        Returns a synthetic ASX CSV of companies, with one company that has not listed yet (i.e. no listing date) that the scraper should skip
+
+        Parameters
+        ----------
+        companies : list
+            Company tickers
+
+        Returns
+        -------
+        str
+            CSV
+        """
+
+        rows = [f'{t} LIMITED,{t},01/01/2015,Materials,{1000000 * (i + 1)}' for i, t in enumerate(companies)]
+        rows.append('UNLISTED LIMITED,ZZZZ,,Materials,')
+        return '\n'.join(['Company name,ASX code,Listing date,GICs industry group,Market Cap'] + rows)
+
+
+    # Internal
+
+    @staticmethod
+    def _fixture_chart(directory, ticker, interval):
+        return os.path.join(directory, YahooServer._FIXTURE_CHART, f'{ticker}_{interval}.json')
+
+
+    class _Handler(BaseHTTPRequestHandler):
+
+        protocol_version = 'HTTP/1.1' # Keeps connections alive between requests
+        disable_nagle_algorithm = True # Headers and body are written separately, which would otherwise wait on delayed acknowledgements
+
+        def setup(self):
+            super().setup()
+            with self.server.stats_lock:
+                self.server.stats['connections'] += 1
+            sleep(self.server.handshake)
+
+
+        def do_GET(self):
+            server = self.server
+            roll = lambda pct: server.rng.random() * 100 < pct
+            sleep(server.latency + (server.spike_latency if roll(server.spike_pct) else 0))
+            gzipped = 'gzip' in self.headers.get('Accept-Encoding', '')
+            headers = {}
+            fault = True
+            if server.outage:
+                status, body, content_type = 200, YahooServer._OUTAGE_PAGE, 'text/html'
+            elif roll(server.throttle_pct):
+                status, body, content_type = 429, b'Too Many Requests', 'text/plain'
+                headers['Retry-After'] = str(server.retry_after)
+            elif roll(server.error_pct):
+                status, body, content_type = 503, b'Service Unavailable', 'text/plain'
+            else:
+                fault = False
+                key = (self.path, gzipped)
+                if key not in server.cache:
+                    status, body, content_type = self._respond()
+                    server.cache[key] = (status, gzip.compress(body, 6) if gzipped else body, content_type)
+                status, body, content_type = server.cache[key]
+            if fault and gzipped:
+                body = gzip.compress(body, 6)
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            if gzipped:
+                self.send_header('Content-Encoding', 'gzip')
+            self.end_headers()
+            self.wfile.write(body)
+            with server.stats_lock:
+                server.stats['requests'] += 1
+                server.stats['faults'] += fault
+                server.stats['bytes'] += len(body)
+
+
+        def _respond(self):
+            """
+            Returns the status, body and content type of the response to the request
+            """
+
+            server = self.server
+            url = urlparse(self.path)
+            if url.path == YahooServer.PATH_ETP:
+                return 200, self._fixture(YahooServer._FIXTURE_ETP) or YahooServer.etp_page(server.etfs).encode(), 'text/html'
+            if url.path == YahooServer.PATH_COMPANIES:
+                return 200, self._fixture(YahooServer._FIXTURE_COM) or YahooServer.companies_csv(server.companies).encode(), 'text/csv'
+            if not url.path.startswith(YahooServer.PATH_CHART):
+                return 404, b'Not found', 'text/plain'
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            ticker = url.path[len(YahooServer.PATH_CHART):]
+            interval = query.get('interval', '1d')
+            recorded = self._fixture(YahooServer._fixture_chart('', ticker, interval))
+            if recorded:
+                return 200, recorded, 'application/json'
+            try:
+                if ticker in server.delisted:
+                    raise ValueError('Data doesn\'t exist for startDate = 0, endDate = 0')
+                end = int(query.get('period2', Date.timestamp_now()))
+                start = int(query.get('period1', end - (YahooServer._HISTORY if 'range' in query else Date.DAY)))
+                payload = YahooServer.chart(ticker, start, end, interval)
+            except ValueError as e:
+                return 400, json.dumps({'chart': {'result': None, 'error': {'code': 'Bad Request', 'description': str(e)}}}).encode(), 'application/json'
+            return 200, json.dumps(payload, separators=(',', ':')).encode(), 'application/json'
+
+
+        def _fixture(self, name):
+            """
+            Returns the recorded response at a path in the fixtures directory, None if there is none
+            """
+
+            if self.server.fixtures is None:
+                return None
+            path = os.path.join(self.server.fixtures, name)
+            if not os.path.isfile(path):
+                return None
+            with open(path, 'rb') as f:
+                return f.read()
+
+
+        def log_message(self, *args):
+            pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Serve a local stand-in for the Yahoo! Finance chart API and the ASX directories, or record fixtures for it')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--handshake-ms', type=float, default=0)
+    parser.add_argument('--error-pct', type=float, default=0, help='Percentage of requests answered with status code 503')
+    parser.add_argument('--throttle-pct', type=float, default=0, help='Percentage of requests answered with status code 429')
+    parser.add_argument('--spike-pct', type=float, default=0, help='Percentage of requests slowed by --spike-ms')
+    parser.add_argument('--spike-ms', type=float, default=1000)
+    parser.add_argument('--companies', type=int, default=100, help='Synthetic companies listed')
+    parser.add_argument('--etfs', type=int, default=20, help='Synthetic ETFs listed')
+    parser.add_argument('--fixtures', help='Directory of recorded responses to serve')
+    parser.add_argument('--record', metavar='TICKER', nargs='+', help='Record the responses for these tickers from Yahoo! Finance and the ASX website into --fixtures instead of serving')
+    parser.add_argument('--companies-url', help='URL of the ASX CSV of companies to record')
+    args = parser.parse_args()
+    if args.record:
+        YahooServer.record(args.fixtures or 'fixtures', args.record, args.companies_url)
+        exit()
+    tickers = Synthetic.tickers(args.companies + args.etfs)
+    server = YahooServer.start(args.latency_ms / 1000, args.handshake_ms / 1000, args.port, args.error_pct, args.throttle_pct, args.spike_pct, args.spike_ms / 1000,
+        companies=tickers[:args.companies], etfs=tickers[args.companies:], fixtures=args.fixtures)
+    print(f'Serving {server.url}{YahooServer.PATH_CHART}<ticker>, {server.url}{YahooServer.PATH_ETP} and {server.url}{YahooServer.PATH_COMPANIES} (Ctrl+C to stop)')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        YahooServer.stop(server)
\ No newline at end of file
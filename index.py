@@ -8,4 +8,6 @@ if __name__ == "__main__":
         controller = Controller()
         controller.push(HomeMenu)
     except KeyboardInterrupt:
-        exit()
\ No newline at end of file
+        exit()
+    finally:
+        Database.replace_watchlist([], Database.WATCH_SIMULATOR) # Quitting from inside the simulator skips its End option
\ No newline at end of file
@@ -0,0 +1,67 @@
+import contextlib
+import io
+import numpy as np
+import pandas as pd
+import pytest
+from asx_tracker.database.database import Database
+from asx_tracker.database.connection import Connection
+from asx_tracker.database.partition import Partition
+from asx_tracker.rate_controller import RateController
+from asx_tracker.scraper import Scraper
+from benchmarks.yahoo_server import YahooServer
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """
+    Points the Database class at a new database in a temporary directory
+    """
+
+    monkeypatch.setattr(Database, '_PATH_DB', str(tmp_path / 'database.db'))
+    monkeypatch.setattr(Partition, 'MONTHS', None)
+    monkeypatch.setattr(Partition, '_registry', {})
+    Connection.close()
+    with contextlib.redirect_stdout(io.StringIO()):
+        Database.create_tables()
+    yield Database._PATH_DB
+    Connection.close()
+
+
+@pytest.fixture
+def listings(db):
+    """
+    Lists the given tickers in the temporary database
+    """
+
+    def insert(tickers=('AAA',)):
+        Database.insert_listings(pd.DataFrame({
+            Database.COL_TICKER: list(tickers), Database.COL_NAME: [ticker.lower() for ticker in tickers], Database.COL_MGMT_PCT: 0}))
+    return insert
+
+
+@pytest.fixture
+def bars():
+    """
+    Builds bars at the given dates, cycling through the given tickers, each opening at 1, closing at 2 and trading 10 shares
+    """
+
+    def build(dates, tickers=('AAA',)):
+        return pd.DataFrame({
+            Database.COL_TICKER: np.resize(tickers, len(dates)), Database.COL_DATE: dates,
+            Database.COL_OPEN: 1, Database.COL_HIGH: 2, Database.COL_LOW: 1, Database.COL_CLOSE: 2, Database.COL_VOL: 10})
+    return build
+
+
+@pytest.fixture
+def yahoo(monkeypatch):
+    """
+    Starts a local stand-in for Yahoo! Finance and points the scraper at it, with a new session and an unthrottled rate limit
+    """
+
+    server = YahooServer.start()
+    monkeypatch.setattr(Scraper, '_URL_YFINANCE', server.url)
+    monkeypatch.setattr(Scraper, '_session', None)
+    monkeypatch.setattr(Scraper, '_rate', RateController(1000))
+    yield server
+    if Scraper._session is not None:
+        Scraper._session.close()
+    YahooServer.stop(server)
\ No newline at end of file
@@ -0,0 +1,14 @@
+from asx_tracker.date import Date
+from asx_tracker.database.database import Database
+
+def test_weekly_bars_start_on_monday(listings, bars):
+    listings()
+    days = ['7 JAN 2021', '8 JAN 2021', '11 JAN 2021', '13 JAN 2021', '14 JAN 2021'] # Thursday to the next Thursday
+    Database.insert_intraday(bars([Date.date_str_to_timestamp(f'{day} 10:00AM') for day in days]))
+
+    weekly = Database.fetch_bars('AAA', None, None, Date.WEEK)
+    mondays = [Database._bucket(Date.date_str_to_timestamp(f'{day} 10:00AM'), Date.DAY) for day in ['4 JAN 2021', '11 JAN 2021']]
+    assert weekly[Database.COL_DATE].tolist() == mondays
+    assert weekly[Database.COL_VOL].tolist() == [20, 30]
+    assert Database._bucket(mondays[1] - 1, Date.WEEK) == mondays[0]
+    assert Database._bucket(mondays[1], 4 * Date.WEEK) % Date.WEEK == mondays[1] % Date.WEEK
\ No newline at end of file
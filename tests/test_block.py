@@ -0,0 +1,42 @@
+import zlib
+import numpy as np
+from asx_tracker.date import Date
+from asx_tracker.database.block import Block
+from asx_tracker.database.database import Database
+
+def _day(rows):
+    data = np.zeros(rows, dtype=Database.BAR_DTYPE)
+    data[Database.COL_DATE] = Date.date_str_to_timestamp('4 JAN 2021 10:00AM') + 60 * np.arange(rows)
+    for col in [Database.COL_OPEN, Database.COL_HIGH, Database.COL_LOW, Database.COL_CLOSE]:
+        data[col] = 150000 + np.arange(rows) % 7
+    data[Database.COL_VOL] = 1000 + np.arange(rows)
+    return data
+
+
+def _widths(blob):
+    raw = zlib.decompress(blob)
+    offset, widths = Block._HEADER.size, []
+    rows = Block._HEADER.unpack_from(raw)[1]
+    for _ in Database.BAR_DTYPE.names:
+        width, _ = Block._COLUMN.unpack_from(raw, offset)
+        widths.append(Block._WIDTHS[width])
+        offset += Block._COLUMN.size + (rows - 1) * np.dtype(Block._WIDTHS[width]).itemsize
+    return widths
+
+
+def test_round_trip():
+    for rows in [0, 1, 2, 360]:
+        data = _day(rows)
+        assert np.array_equal(Block.decode(Block.encode(data), Database.BAR_DTYPE), data)
+
+
+def test_first_value_does_not_widen_deltas():
+    assert _widths(Block.encode(_day(360))) == [np.int8] * len(Database.BAR_DTYPE.names)
+
+
+def test_decodes_version_1():
+    data = _day(10)
+    parts = [Block._HEADER.pack(1, len(data))]
+    for name in data.dtype.names:
+        parts += [bytes([3]), np.diff(data[name].astype(np.int64), prepend=np.int64(0)).tobytes()]
+    assert np.array_equal(Block.decode(zlib.compress(b''.join(parts)), Database.BAR_DTYPE), data)
\ No newline at end of file
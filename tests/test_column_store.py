@@ -0,0 +1,59 @@
+import json
+import os
+import pytest
+from asx_tracker.date import Date
+from asx_tracker.database.connection import Connection
+from asx_tracker.database.column_store import ColumnStore
+from asx_tracker.database.database import Database
+
+@pytest.fixture
+def store(db, monkeypatch):
+    for name in ['_indexes', '_mtimes', '_maps']:
+        monkeypatch.setattr(ColumnStore, name, {})
+    monkeypatch.setattr(ColumnStore, '_dirty', set())
+    monkeypatch.setattr(ColumnStore, 'ENABLED', True)
+    return db
+
+
+def _dates(ticker):
+    return Database.fetch_single_intraday_series(ticker)[Database.COL_DATE].tolist()
+
+
+def test_syncs_only_committed_rows(store, listings, bars):
+    listings(['AAA', 'AAB'])
+    jan = Date.date_str_to_timestamp('4 JAN 2021 10:00AM')
+    with pytest.raises(RuntimeError):
+        with Connection.transaction(store):
+            Database.insert_intraday(bars([jan]))
+            raise RuntimeError
+    with Connection.transaction(store):
+        Database.insert_intraday(bars([jan + Date.MINUTE], ['AAB']))
+        assert not ColumnStore.stored(store, Database.TAB_INTRADAY, Database._ticker_id('AAB'))
+
+    assert not ColumnStore.stored(store, Database.TAB_INTRADAY, Database._ticker_id('AAA'))
+    assert ColumnStore.stored(store, Database.TAB_INTRADAY, Database._ticker_id('AAB'))
+    assert _dates('AAB') == [jan + Date.MINUTE]
+
+
+def test_falls_back_to_the_database_until_built(store, listings, bars, monkeypatch):
+    listings()
+    jan = Date.date_str_to_timestamp('4 JAN 2021 10:00AM')
+    monkeypatch.setattr(ColumnStore, 'ENABLED', False)
+    Database.insert_intraday(bars([jan]))
+    monkeypatch.setattr(ColumnStore, 'ENABLED', True)
+    assert _dates('AAA') == [jan]
+
+
+def test_reloads_index_written_by_another_process(store, listings, bars):
+    listings()
+    jan = Date.date_str_to_timestamp('4 JAN 2021 10:00AM')
+    Database.insert_intraday(bars([jan, jan + Date.MINUTE]))
+    assert _dates('AAA') == [jan, jan + Date.MINUTE]
+
+    # Another process rebuilds the store after the second row is removed
+    file = os.path.join(ColumnStore._root(store), Database.TAB_INTRADAY, ColumnStore._FILE_INDEX)
+    with open(file, 'w') as f:
+        json.dump({str(Database._ticker_id('AAA')): [1, jan, jan]}, f)
+    mtime = os.stat(file).st_mtime_ns + 1
+    os.utime(file, ns=(mtime, mtime))
+    assert _dates('AAA') == [jan]
\ No newline at end of file
@@ -0,0 +1,76 @@
+import sqlite3
+import threading
+import pytest
+from asx_tracker.date import Date
+from asx_tracker.database.database import Database
+from asx_tracker.database.connection import Connection
+from asx_tracker.database.partition import Partition
+
+def test_failed_commit_rolls_back(tmp_path):
+    path = str(tmp_path / 'fk.db')
+    with Connection.writer(path) as conn:
+        conn.execute('PRAGMA foreign_keys = ON')
+        conn.execute('CREATE TABLE parent (id INTEGER PRIMARY KEY)')
+        conn.execute('CREATE TABLE child (parent_id INTEGER REFERENCES parent (id) DEFERRABLE INITIALLY DEFERRED)')
+    with pytest.raises(sqlite3.IntegrityError):
+        with Connection.transaction(path) as conn:
+            conn.execute('INSERT INTO child VALUES (1)') # Only fails on COMMIT
+    with Connection.transaction(path) as conn:
+        conn.execute('INSERT INTO parent VALUES (1)')
+    assert Connection.get(path).execute('SELECT COUNT(*) FROM child').fetchone()[0] == 0
+    Connection.close()
+
+
+def test_snapshot_ignores_later_commits(listings, bars, monkeypatch):
+    monkeypatch.setattr(Partition, 'MONTHS', 1)
+    listings()
+    jan, feb = Date.date_str_to_timestamp('4 JAN 2021 10:00AM'), Date.date_str_to_timestamp('1 FEB 2021 10:00AM')
+    Database.insert_intraday(bars([jan, jan + Date.MINUTE]))
+
+    with Database.snapshot(['AAA']):
+        before = Database.fetch_bars('AAA', None, None, Date.HOUR)
+        Database.insert_intraday(bars([jan + 2 * Date.MINUTE, feb])) # Creates and writes a new partition
+        assert Database.fetch_single_date_range('AAA', Database.TAB_INTRADAY, None, None) == (jan, jan + Date.MINUTE)
+        assert Database.fetch_bars('AAA', None, None, Date.HOUR).tolist() == before.tolist()
+    assert Database.fetch_single_date_range('AAA', Database.TAB_INTRADAY, None, None) == (jan, feb)
+
+
+def test_each_thread_reuses_its_own_connection(tmp_path):
+    path = str(tmp_path / 'pool.db')
+    conn = Connection.get(path)
+    other = []
+    thread = threading.Thread(target=lambda: other.append(Connection.get(path)) or Connection.close(path))
+    thread.start()
+    thread.join()
+    assert Connection.get(path) is conn
+    assert other[0] is not conn
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    Connection.close()
+
+
+def test_transaction_commits_inserts_and_watermarks_together(listings, bars, monkeypatch):
+    monkeypatch.setattr(Partition, 'MONTHS', 1)
+    listings()
+    jan = Date.date_str_to_timestamp('4 JAN 2021 10:00AM')
+    dates = [jan, jan + 40 * Date.DAY] # Two partitions
+
+    def saved(results):
+        results.append((len(Database.fetch_single_intraday('AAA', Database.COL_DATE)), Database.fetch_all_listings(Database.COL_LAST_INTRADAY)[0][0]))
+
+    with pytest.raises(RuntimeError):
+        with Database.transaction(min(dates), max(dates)):
+            Database.insert_intraday(bars(dates))
+            Database.update_listings_date('AAA', max(dates), Database.COL_LAST_INTRADAY)
+            raise RuntimeError
+    assert Database.fetch_single_intraday('AAA', Database.COL_DATE) == []
+
+    results = []
+    with Database.transaction(min(dates), max(dates)):
+        Database.insert_intraday(bars(dates))
+        Database.update_listings_date('AAA', max(dates), Database.COL_LAST_INTRADAY)
+        thread = threading.Thread(target=saved, args=(results,)) # Another thread only sees committed writes
+        thread.start()
+        thread.join()
+    saved(results)
+    assert results[0] == (0, results[0][1]) and results[0][1] != max(dates)
+    assert results[1] == (2, max(dates))
\ No newline at end of file
@@ -0,0 +1,18 @@
+from asx_tracker.date import Date
+from asx_tracker.database.database import Database
+
+def test_columnar_fetches_match_rows(listings, bars):
+    listings()
+    jan = Date.date_str_to_timestamp('4 JAN 2021 10:00AM')
+    dates = [jan + minute * Date.MINUTE for minute in range(5)]
+    Database.insert_intraday(bars(dates).assign(**{Database.COL_VOL: range(5)}))
+    start, end = dates[1], dates[3]
+
+    rows = Database.fetch_single_intraday('AAA', *Database.BAR_DTYPE.names, start=start, end=end)
+    array = Database.fetch_single_intraday_array('AAA', start=start, end=end)
+    assert array.tolist() == [tuple(row) for row in rows]
+    series = Database.fetch_single_intraday_series('AAA', start=start, end=end)
+    assert {name: col.tolist() for name, col in series.items()} == {name: array[name].tolist() for name in Database.BAR_DTYPE.names}
+    frame = Database.fetch_single_intraday_frame('AAA', start=start, end=end)
+    assert frame[Database.COL_VOL].tolist() == [1, 2, 3]
+    assert frame.index[0] == Date.timestamp_to_datetime(start)
\ No newline at end of file
@@ -0,0 +1,26 @@
+import pandas as pd
+import pytest
+from asx_tracker.date import Date
+from asx_tracker.database.database import Database
+
+def test_inserts_frames_in_chunks(listings, bars, monkeypatch):
+    monkeypatch.setattr(Database, '_INSERT_CHUNK', 2)
+    listings(['AAA', 'AAB'])
+    jan = Date.date_str_to_timestamp('4 JAN 2021 10:00AM')
+    df = bars([jan, jan, jan + Date.MINUTE, jan + Date.MINUTE, jan], ['AAA', 'AAB']).assign(**{Database.COL_OPEN: range(5)})
+
+    assert Database.insert_intraday(df) == 4 # The last row repeats the first
+    rows = Database.fetch_single_intraday('AAA', Database.COL_DATE, Database.COL_OPEN, Database.COL_CLOSE, Database.COL_VOL)
+    assert [tuple(row) for row in rows] == [(jan, 0, 2, 10), (jan + Date.MINUTE, 2, 2, 10)]
+    with pytest.raises(ValueError):
+        Database.insert_intraday(bars([jan], ['ZZZ']))
+
+
+def test_listing_saves_only_move_forward(listings):
+    listings()
+    update = lambda intraday, daily: Database.insert_listings(pd.DataFrame({
+        Database.COL_TICKER: ['AAA'], Database.COL_NAME: ['a'], Database.COL_MGMT_PCT: [0],
+        Database.COL_LAST_INTRADAY: [intraday], Database.COL_LAST_DAILY: [daily]}))
+    assert update(20, 10) == 0
+    update(10, 30)
+    assert Database.fetch_single_listing('AAA', Database.COL_LAST_INTRADAY, Database.COL_LAST_DAILY) == [(20, 30)]
\ No newline at end of file
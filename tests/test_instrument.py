@@ -0,0 +1,23 @@
+import os
+from asx_tracker.date import Date
+from asx_tracker.database.database import Database
+from asx_tracker.database.instrument import Instrument
+
+def test_queries_on_the_connection_are_timed(db, listings, bars, monkeypatch):
+    listings()
+    jan = Date.date_str_to_timestamp('4 JAN 2021 10:00AM')
+    monkeypatch.setattr(Instrument, 'ENABLED', True)
+    monkeypatch.setattr(Instrument, 'SLOW_SECONDS', 0)
+    monkeypatch.setattr(Instrument, '_stats', {})
+    monkeypatch.setattr(Instrument, '_plans', {})
+    Database.insert_rollup(bars([jan, jan + Date.HOUR]), Database.ROLLUP_1H)
+    Database.fetch_bars('AAA', None, None, 2 * Date.DAY)
+    Database.plan_scrape_jobs('1m', [('AAA', jan, jan + Date.DAY, '1m')])
+    Database.claim_scrape_job('1m')
+
+    shapes = [r['shape'] for r in Instrument.report()]
+    assert any(shape.startswith(f'INSERT OR REPLACE INTO {Database._rollup_table(Database.ROLLUP_1D)}') for shape in shapes)
+    assert any(shape.startswith('SELECT bucket') for shape in shapes)
+    assert any(shape.startswith(f'UPDATE {Database._TAB_SCRAPE_JOB}') for shape in shapes)
+    with open(os.path.join(os.path.dirname(db), Instrument._FILE_LOG)) as f:
+        assert 'SELECT bucket' in f.read()
\ No newline at end of file
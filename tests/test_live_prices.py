@@ -0,0 +1,17 @@
+import pytest
+from asx_tracker.date import Date
+from asx_tracker.database.database import Database
+from asx_tracker.database.price_index import PriceIndex
+
+@pytest.mark.parametrize('indexed', [False, True])
+def test_live_prices_of_many_tickers(listings, bars, monkeypatch, indexed):
+    monkeypatch.setattr(PriceIndex, 'ENABLED', indexed)
+    monkeypatch.setattr(Database, '_LIVE_CHUNK', 2)
+    listings(['AAA', 'AAB', 'AAC'])
+    day, later = Date.date_str_to_timestamp('4 JAN 2021 12:00AM'), Date.date_str_to_timestamp('5 JAN 2021 10:00AM')
+    Database.insert_daily(bars([day, day], ['AAA', 'AAB']).assign(**{Database.COL_CLOSE: 5}))
+    Database.insert_intraday(bars([later], ['AAA']))
+
+    assert Database.fetch_multiple_live_prices(later, 'AAA', 'AAB', 'AAC') == {'AAA': 2, 'AAB': 5, 'AAC': None}
+    assert Database.fetch_multiple_live_prices(later - 1, 'AAA', 'AAB') == {'AAA': 5, 'AAB': 5}
+    assert Database.fetch_single_live_price('AAA', day - 1) is None
\ No newline at end of file
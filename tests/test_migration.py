@@ -0,0 +1,52 @@
+import contextlib
+import io
+import sqlite3
+import pytest
+from asx_tracker.database.connection import Connection
+from asx_tracker.database.database import Database
+from asx_tracker.database.migration import Migration
+from asx_tracker.database.partition import Partition
+from asx_tracker.database.sql import Sql
+
+_JAN = 1609714800 # 4 JAN 2021 10:00AM
+
+@pytest.fixture
+def legacy(tmp_path, monkeypatch):
+    path = str(tmp_path / 'legacy.db')
+    monkeypatch.setattr(Database, '_PATH_DB', path)
+    monkeypatch.setattr(Partition, 'MONTHS', None)
+    monkeypatch.setattr(Partition, '_registry', {})
+    Connection.close()
+    with contextlib.closing(sqlite3.connect(path)) as conn, conn:
+        for query in [Sql.CREATE_TAB_LISTING, Sql.CREATE_TAB_INTRADAY, Sql.CREATE_TAB_DAILY]:
+            conn.execute(query)
+        conn.execute(f"INSERT INTO {Database.TAB_LISTING} (ticker, name, mgmt_pct) VALUES ('AAA', 'a', 0)")
+        conn.executemany(f'INSERT INTO {Database.TAB_INTRADAY} VALUES (?,?,?,?,?,?,?)', [
+            ('AAA', _JAN, 1, 2, 1, 2, 10),
+            ('AAB', _JAN, 3, 4, 3, 4, 10)]) # Only in the bar table
+    with contextlib.redirect_stdout(io.StringIO()):
+        Database.create_tables()
+    yield path
+    Connection.close()
+
+
+def test_migrates_to_clustered_bar_tables_once(legacy):
+    version = len(Migration._migrations())
+    assert Migration.version(legacy) == version
+    conn = Connection.get(legacy)
+    tables = dict(conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table'"))
+    assert all('WITHOUT ROWID' in tables[table] for table in [Database.TAB_INTRADAY, Database.TAB_DAILY])
+    assert Database.fetch_single_intraday('AAA', Database.COL_DATE, Database.COL_CLOSE) == [(_JAN, 2)]
+
+    assert Migration.migrate(legacy, verbose=False) == version
+    assert conn.execute(f'SELECT COUNT(*) FROM {Migration._TAB_SCHEMA_VERSION}').fetchone()[0] == version
+
+
+def test_keys_bars_by_listing_id(legacy):
+    ids = Database._ticker_id_map()
+    assert sorted(ids) == ['AAA', 'AAB'] # Tickers only found in the bar tables are listed
+    assert len(set(ids.values())) == 2
+    conn = Connection.get(legacy)
+    columns = [row[1] for row in conn.execute(f'PRAGMA table_info({Database.TAB_INTRADAY})')]
+    assert Database.COL_TICKER_ID in columns and Database.COL_TICKER not in columns
+    assert Database.fetch_single_intraday('AAB', Database.COL_DATE, Database.COL_OPEN) == [(_JAN, 3)]
\ No newline at end of file
@@ -0,0 +1,31 @@
+import contextlib
+import io
+import pytest
+from asx_tracker.date import Date
+from asx_tracker.database.connection import Connection
+from asx_tracker.database.database import Database
+from asx_tracker.parquet import Parquet
+
+pytest.importorskip('pyarrow')
+
+@pytest.mark.parametrize('by', Parquet.BY_OPTIONS)
+def test_export_import_round_trip(db, listings, bars, tmp_path, monkeypatch, by):
+    listings(['AAA', 'AAB'])
+    jan = Date.date_str_to_timestamp('29 JAN 2021 10:00AM')
+    intraday = [jan + i * Date.DAY + j * Date.MINUTE for i in range(5) for j in range(3)] # Spans two months
+    Database.insert_intraday(bars(intraday, ['AAA', 'AAB']))
+    Database.insert_daily(bars([jan, jan + Date.DAY]))
+    expected = {ticker: Database.fetch_single_intraday(ticker, Database.COL_DATE, Database.COL_VOL) for ticker in ['AAA', 'AAB']}
+
+    directory = str(tmp_path / 'export')
+    assert Parquet.export(directory, by=by, verbose=False) == len(intraday) + 2
+
+    # Into a new database
+    monkeypatch.setattr(Database, '_PATH_DB', str(tmp_path / 'copy.db'))
+    Connection.close()
+    with contextlib.redirect_stdout(io.StringIO()):
+        Database.create_tables()
+    assert Parquet.import_(directory, verbose=False) == len(intraday) + 2
+    assert [row[0] for row in Database.fetch_all_listings(Database.COL_TICKER)] == ['AAA', 'AAB']
+    assert {ticker: Database.fetch_single_intraday(ticker, Database.COL_DATE, Database.COL_VOL) for ticker in expected} == expected
+    assert Database.fetch_single_daily('AAA', Database.COL_DATE) == [(jan,), (jan + Date.DAY,)]
\ No newline at end of file
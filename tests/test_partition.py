@@ -0,0 +1,39 @@
+from asx_tracker.date import Date
+from asx_tracker.database.connection import Connection
+from asx_tracker.database.database import Database
+from asx_tracker.database.partition import Partition
+
+def test_partitions_keep_their_span_when_months_change(db, listings, bars, monkeypatch):
+    listings()
+    jan = Date.date_str_to_timestamp('4 JAN 2021 10:00AM')
+    monkeypatch.setattr(Partition, 'MONTHS', 1)
+    Database.insert_intraday(bars([jan + day * Date.DAY for day in range(20)]))
+    monkeypatch.setattr(Partition, 'MONTHS', 3)
+    Database.insert_intraday(bars([jan + day * Date.DAY for day in range(20, 170)]))
+
+    partitions = Partition.overlapping(db)
+    assert [p[0] for p in partitions] == ['intraday_202101', 'intraday_202102_202103', 'intraday_202104_202106']
+    assert all(a[2] == b[1] for a, b in zip(partitions, partitions[1:]))
+    assert len(Database.fetch_all_intraday(Database.COL_DATE)) == 170
+
+
+def test_partition_gaps():
+    partitions = [('a', 10, 20), ('b', 30, 40)]
+    assert Partition._gaps(partitions, 0, 50) == [(0, 10), (20, 30), (40, 50)]
+    assert Partition._gaps(partitions, 12, 35) == [(20, 30)]
+    assert Partition._gaps(partitions, 10, 20) == []
+
+def test_main_table_rows_are_not_duplicated_in_partitions(db, listings, bars, monkeypatch):
+    listings()
+    jan = Date.date_str_to_timestamp('4 JAN 2021 10:00AM')
+    dates = [jan + minute * Date.MINUTE for minute in range(3)]
+    Database.insert_intraday(bars(dates[:2]))
+    monkeypatch.setattr(Partition, 'MONTHS', 1)
+    assert Database.insert_intraday(bars(dates)) == 1
+
+    # Saved in both by an earlier version
+    with Connection.transaction(db) as conn:
+        conn.execute(f'INSERT INTO intraday_202101.{Database.TAB_INTRADAY} SELECT * FROM {Database.TAB_INTRADAY}')
+    assert Database.fetch_single_intraday_array('AAA')[Database.COL_DATE].tolist() == dates
+    assert [row[0] for row in Database.fetch_single_intraday('AAA', Database.COL_DATE)] == dates
+    assert len(Database.fetch_all_intraday(Database.COL_TICKER, Database.COL_DATE)) == 3
\ No newline at end of file
@@ -0,0 +1,24 @@
+from asx_tracker.date import Date
+from asx_tracker.database.database import Database
+from asx_tracker.scraper import Scraper
+
+def test_fallback_windows_refetch_the_day_of_a_mid_day_save(listings, bars):
+    listings()
+    now = Date.date_str_to_timestamp('15 OCT 2026 12:00PM')
+    day_open = Date.date_str_to_timestamp('7 JUL 2026 10:00AM') # Only kept in 1 hour bars by now
+    saved = [day_open + hour * Date.HOUR for hour in range(4)]
+    Database.insert_rollup(bars(saved), Database.ROLLUP_1H)
+
+    start, _, interval = Scraper._plan_intraday(saved[-1], now)[0]
+    assert (start, interval) == (day_open, '1h')
+
+    # The whole day is requested again, so its daily bar is not replaced by one of the rest of the day
+    Database.insert_rollup(bars([start + hour * Date.HOUR for hour in range(6)]), Database.ROLLUP_1H)
+    daily = Database.fetch_single_rollup_array('AAA', Database.ROLLUP_1D)
+    assert daily[Database.COL_VOL].tolist() == [60]
+
+
+def test_intraday_windows_resume_after_the_last_save():
+    now = Date.date_str_to_timestamp('15 OCT 2026 12:00PM')
+    last_save = Date.date_str_to_timestamp('14 OCT 2026 1:00PM')
+    assert Scraper._plan_intraday(last_save, now) == [(last_save + 1, now, '1m')]
\ No newline at end of file
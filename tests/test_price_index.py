@@ -0,0 +1,43 @@
+import sqlite3
+from asx_tracker.date import Date
+from asx_tracker.database.connection import Connection
+from asx_tracker.database.database import Database
+from asx_tracker.database.partition import Partition
+from asx_tracker.database.price_index import PriceIndex
+
+def test_partition_commits_invalidate_prices(db, listings, bars, monkeypatch):
+    monkeypatch.setattr(Partition, 'MONTHS', 1)
+    monkeypatch.setattr(PriceIndex, '_CHECK_INTERVAL', 0)
+    listings()
+    first, later = Date.date_str_to_timestamp('4 JAN 2021 10:00AM'), Date.date_str_to_timestamp('5 JAN 2021 10:00AM')
+    Database.insert_intraday(bars([first]))
+    assert Database.fetch_single_live_intraday('AAA', later) == (first, 2)
+
+    # Another process writes straight to the partition, leaving the main database untouched
+    with sqlite3.connect(Partition._file(db, 'intraday_202101')) as conn:
+        conn.execute(
+            f'INSERT INTO {Database.TAB_INTRADAY} ({Database.COL_TICKER_ID}, {Database.COL_DATE}, {Database.COL_OPEN}, {Database.COL_CLOSE}, '
+            f'{Database.COL_LOW}, {Database.COL_HIGH}, {Database.COL_VOL}) VALUES (?,?,?,?,?,?,?)', (Database._ticker_id('AAA'), later, 3, 4, 3, 4, 10))
+    assert Database.fetch_single_live_intraday('AAA', later) == (later, 4)
+
+def test_own_commits_only_invalidate_their_tickers(db, listings, bars, monkeypatch):
+    monkeypatch.setattr(PriceIndex, '_CHECK_INTERVAL', 0)
+    listings(['AAA', 'AAB'])
+    first, later = Date.date_str_to_timestamp('4 JAN 2021 10:00AM'), Date.date_str_to_timestamp('5 JAN 2021 10:00AM')
+    Database.insert_intraday(bars([first, first], ['AAA', 'AAB']))
+    for ticker in ['AAA', 'AAB']:
+        assert Database.fetch_single_live_intraday(ticker, later) == (first, 2)
+
+    Database.insert_intraday(bars([later], ['AAB']))
+    assert PriceIndex.get(db, Database.TAB_INTRADAY, 'AAA') is not None
+    assert PriceIndex.get(db, Database.TAB_INTRADAY, 'AAB') is None
+    assert Database.fetch_single_live_intraday('AAB', later) == (later, 2)
+
+
+def test_prices_read_inside_a_write_transaction_are_not_cached(db, listings, bars):
+    listings()
+    first = Date.date_str_to_timestamp('4 JAN 2021 10:00AM')
+    with Connection.transaction(db):
+        Database.insert_intraday(bars([first]))
+        assert Database.fetch_single_live_intraday('AAA', first) == (first, 2)
+    assert PriceIndex.get(db, Database.TAB_INTRADAY, 'AAA') is None
\ No newline at end of file
@@ -0,0 +1,23 @@
+from asx_tracker.date import Date
+from asx_tracker.database.database import Database
+
+def _dates():
+    return Database.fetch_single_intraday_series('AAA')[Database.COL_DATE].tolist()
+
+
+def test_retention_keeps_rollups(db, listings, bars):
+    listings()
+    old = Date.date_str_to_timestamp('4 JAN 2021 10:00AM')
+    recent = old + Date.DAY
+    Database.insert_intraday(bars([old + i * Date.MINUTE for i in range(30)] + [recent + i * Date.MINUTE for i in range(30)]))
+
+    assert Database.apply_retention(recent) == (30, [])
+    assert _dates() == [recent + i * Date.MINUTE for i in range(30)]
+    assert Database.fetch_bars('AAA', None, None, Date.DAY)[Database.COL_VOL].tolist() == [300, 300]
+
+    # Rows inserted later before the date are ignored
+    Database.insert_intraday(bars([old + Date.HOUR]))
+    assert _dates()[0] == recent
+
+    _, free = Database.vacuum()
+    assert free == 0
\ No newline at end of file
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+from asx_tracker.date import Date
+from asx_tracker.database.connection import Connection
+from asx_tracker.database.database import Database
+
+def _count(resolution):
+    query = f'SELECT COUNT(*) FROM {Database._rollup_table(resolution)}'
+    return Connection.get(Database._PATH_DB).execute(query).fetchone()[0]
+
+
+def test_refresh_keeps_fallback_rollups(db, listings, bars):
+    listings()
+    old = Date.date_str_to_timestamp('4 JAN 2021 10:00AM')
+    recent = Date.date_str_to_timestamp('1 MAR 2021 10:00AM')
+
+    # Every listing pending over all dates, as after migrating to rollups
+    with Connection.transaction(db) as conn:
+        conn.execute(f'INSERT INTO {Database._TAB_ROLLUP_PENDING} VALUES (?,?,?)', (Database._ticker_id('AAA'), Date.MIN, Date.MAX))
+    Database.insert_rollup(bars([old + day * Date.DAY + hour * Date.HOUR for day in range(3) for hour in range(2)]), Database.ROLLUP_1H)
+    Database.insert_intraday(bars([recent + minute * Date.MINUTE for minute in range(90)]))
+    Database.refresh_rollups()
+
+    assert _count(Database.ROLLUP_1H) == 6 + 2
+    assert _count(Database.ROLLUP_1D) == 3 + 1
+    daily = Database.fetch_bars('AAA', None, None, Date.DAY)
+    assert daily[Database.COL_VOL].tolist() == [20, 20, 20, 900]
+
+
+def test_bars_from_rollups_match_intraday(db, listings):
+    listings()
+    start = Date.date_str_to_timestamp('4 JAN 2021 10:00AM')
+    i = np.arange(180)
+    Database.insert_intraday(pd.DataFrame({
+        Database.COL_TICKER: 'AAA', Database.COL_DATE: start + i * Date.MINUTE,
+        Database.COL_OPEN: i % 7, Database.COL_HIGH: i % 7 + 10, Database.COL_LOW: i % 5, Database.COL_CLOSE: i % 11, Database.COL_VOL: i}))
+
+    bars = Database.fetch_bars('AAA', None, None, 2 * Date.HOUR)
+    assert _count(Database.ROLLUP_1H) == 3
+    raw = Database._fetch_single_intraday_or_daily_array('AAA', Database.TAB_INTRADAY)
+    expected = Database._aggregate_array(raw, 2 * Date.HOUR)
+    assert bars.tolist() == expected.tolist()
\ No newline at end of file
@@ -0,0 +1,48 @@
+from asx_tracker.date import Date
+from asx_tracker.database.database import Database
+
+_ATTEMPTS = 3
+
+def _claim_and_finish(failing):
+    """
+    Claims every job that can be claimed, failing those of the failing ticker and finishing the rest
+    """
+
+    while (job := Database.claim_scrape_job('1m')) is not None:
+        job_id, ticker = job[:2]
+        Database.update_scrape_job(job_id, Database.JOB_FAILED if ticker == failing else Database.JOB_DONE, 0)
+
+
+def test_given_up_window_gives_up_later_windows(listings):
+    listings(['AAA', 'AAB'])
+    start = Date.timestamp_now(-3 * Date.WEEK)
+    windows = [(start + i * Date.WEEK, start + (i + 1) * Date.WEEK - 1, '1m') for i in range(3)]
+    Database.plan_scrape_jobs('1m', [(ticker, *window) for ticker in ['AAA', 'AAB'] for window in windows])
+    created_after = Date.timestamp_now(-Date.DAY)
+
+    _claim_and_finish('AAA')
+    for _ in range(_ATTEMPTS - 1):
+        assert Database.resume_scrape_jobs('1m', _ATTEMPTS, created_after) == 3 # AAA's first window is retried, then the rest
+        _claim_and_finish('AAA')
+
+    assert Database.resume_scrape_jobs('1m', _ATTEMPTS, created_after) == 0
+    progress = Database.fetch_scrape_progress('1m')
+    assert (progress[Database.JOB_DONE], progress[Database.JOB_FAILED], progress[Database.JOB_PENDING]) == (3, 3, 0)
+
+
+def test_schedule_puts_watched_and_traded_first_and_backs_off_dead_tickers(listings, bars):
+    listings(['AAA', 'AAB', 'AAC'])
+    now = Date.timestamp_now()
+    Database.insert_daily(bars([now - 2 * Date.DAY, now - Date.DAY], ['AAB']))
+    Database.add_watchlist('AAC', Database.WATCH_SIMULATOR)
+    schedule = lambda at: [row[0] for row in Database.fetch_scrape_schedule('1m', Database.COL_LAST_INTRADAY, at, now - Date.WEEK)]
+    assert schedule(now) == ['AAC', 'AAB', 'AAA']
+
+    # AAA and AAC return nothing twice in a row, but AAC is watched
+    for misses in [1, 2]:
+        Database.plan_scrape_jobs('1m', [(ticker, now - Date.WEEK, now, '1m') for ticker in ['AAA', 'AAB', 'AAC']])
+        while (job := Database.claim_scrape_job('1m')) is not None:
+            Database.update_scrape_job(job[0], Database.JOB_DONE, 5 if job[1] == 'AAB' else 0)
+        assert Database.update_scrape_backoff('1m', now, Date.DAY, 32 * Date.DAY, Date.WEEK) == 2
+        assert schedule(now + misses * Date.DAY - 1) == ['AAC', 'AAB']
+        assert schedule(now + misses * Date.DAY) == ['AAC', 'AAB', 'AAA']
\ No newline at end of file
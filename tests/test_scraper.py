@@ -0,0 +1,87 @@
+import contextlib
+import io
+import json
+import numpy as np
+import pytest
+from asx_tracker import scraper
+from asx_tracker.database.database import Database
+from asx_tracker.rate_controller import CircuitOpenError, RateController
+from asx_tracker.scraper import Scraper
+from benchmarks.yahoo_server import YahooServer
+
+def test_requests_reuse_one_compressed_connection(yahoo):
+    url = f'{yahoo.url}{YahooServer.PATH_CHART}AAA.AX?interval=1d&range=10y'
+    responses = [Scraper._get(url) for _ in range(3)]
+    assert yahoo.stats['connections'] == 1
+    assert yahoo.stats['requests'] == 3
+    assert all(response.headers['Content-Encoding'] == 'gzip' for response in responses)
+    assert responses[0].json()['chart']['result'][0]['timestamp']
+
+
+@pytest.mark.parametrize('loads', [scraper.json_loads, json.loads])
+def test_parses_chart_into_columns(loads, monkeypatch):
+    monkeypatch.setattr(scraper, 'json_loads', loads)
+    quote = {'open': [1.005, None, 2.5], 'high': [1.1, 1.2, 2.6], 'low': [0.99, 1.0, 2.4], 'close': [1.05, 1.1, 2.55], 'volume': [100, 200, None]}
+    content = json.dumps({'chart': {'result': [{'timestamp': [60, 120, 180], 'indicators': {'quote': [quote]}}], 'error': None}}).encode()
+    columns = Scraper._parse_chart(content, 'AAA')
+    assert {col: values.tolist() for col, values in columns.items()} == {
+        Database.COL_TICKER: ['AAA'], Database.COL_DATE: [60],
+        Database.COL_OPEN: [100], Database.COL_HIGH: [110], Database.COL_LOW: [99], Database.COL_CLOSE: [105], Database.COL_VOL: [100]}
+    assert all(values.dtype == np.int64 for col, values in columns.items() if col != Database.COL_TICKER)
+
+    assert Scraper._parse_chart(b'{"chart": {"result": [{}], "error": null}}', 'AAA') is None
+    with pytest.raises(ValueError, match='delisted'):
+        Scraper._parse_chart(b'{"chart": {"result": null, "error": {"description": "delisted"}}}', 'AAA')
+    with pytest.raises(RuntimeError):
+        Scraper._parse_chart(b'{"quote": []}', 'AAA')
+
+
+def test_slows_down_when_throttled(yahoo):
+    params = {Scraper._PARAM_RANGE: '1mo', Scraper._PARAM_INTERVAL: '1d'}
+    yahoo.throttle_pct = 100
+    yahoo.retry_after = 0
+    with pytest.raises(RuntimeError, match='429'):
+        Scraper._scrape_period('AAA', params)
+    assert Scraper._rate.bucket.rate == 500
+
+    yahoo.throttle_pct = 0
+    assert Scraper._scrape_period('AAA', params) is not None
+    assert Scraper._rate.bucket.rate == 550
+
+
+
+def test_circuit_opens_on_repeated_outages(yahoo, monkeypatch):
+    monkeypatch.setattr(Scraper, '_rate', RateController(1000, failures=2, cooldown=0.01, max_opens=1))
+    params = {Scraper._PARAM_RANGE: '1mo', Scraper._PARAM_INTERVAL: '1d'}
+    yahoo.outage = True
+    with pytest.raises(RuntimeError, match='down'):
+        Scraper._repeat_scrape_period('AAA', params)
+    assert Scraper._rate.state == RateController.OPEN
+    with pytest.raises(CircuitOpenError):
+        Scraper._repeat_scrape_period('AAA', params)
+    assert yahoo.stats['requests'] == Scraper._SCRAPE_ATTEMPTS # Nothing sent once the circuit gave up
+
+    yahoo.outage = False
+    Scraper._rate.reset()
+    assert Scraper._repeat_scrape_period('AAA', params) is not None
+
+
+def test_downloads_from_stand_in(db, yahoo):
+    yahoo.companies = ['AAA', 'AAB']
+    yahoo.delisted = {'AAB.AX'}
+    with contextlib.redirect_stdout(io.StringIO()):
+        Scraper.download_companies(f'{yahoo.url}{YahooServer.PATH_COMPANIES}')
+        rows = Scraper.download_daily()
+    assert [row[0] for row in Database.fetch_all_listings(Database.COL_TICKER)] == ['AAA', 'AAB']
+    counts = {ticker: len(Database.fetch_single_daily(ticker, Database.COL_DATE)) for ticker in ['AAA', 'AAB']}
+    assert counts['AAA'] > 2000 and counts['AAB'] == 0
+    assert rows == counts['AAA']
+    assert yahoo.stats['faults'] == 0
+
+
+def test_downloads_etfs_from_stand_in(db, yahoo, monkeypatch):
+    pytest.importorskip('lxml') # Used by pandas.read_html
+    yahoo.etfs = ['ETF', 'ETG']
+    monkeypatch.setattr(Scraper, '_URL_ETP', f'{yahoo.url}{YahooServer.PATH_ETP}')
+    Scraper.download_etfs()
+    assert [row[0] for row in Database.fetch_all_listings(Database.COL_TICKER)] == ['ETF', 'ETG'] # Other products are skipped
\ No newline at end of file
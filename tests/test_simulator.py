@@ -0,0 +1,27 @@
+from unittest import mock
+from asx_tracker.date import Date
+from asx_tracker.database.database import Database
+from asx_tracker.menu.menu import Menu
+from asx_tracker.menu.simulator_run_menu import SimulatorRunMenu
+from asx_tracker.utils import Utils
+
+def test_watchlist_follows_positions_until_the_simulator_ends(listings, monkeypatch):
+    listings()
+    writes = []
+    replace_watchlist = Database.replace_watchlist
+    monkeypatch.setattr(Database, 'replace_watchlist', lambda tickers, source: writes.append(tickers) or replace_watchlist(tickers, source))
+    monkeypatch.setattr(Utils, 'confirm', lambda message: True)
+    menu = SimulatorRunMenu(start=Date.date_str_to_timestamp('4 JAN 2021 10:00AM'), broke=0, balance=100000, delay=0, step_min=5, cgt=0)
+
+    menu._market_buy('AAA', 1)
+    for _ in range(3):
+        menu.set_subtitle()
+    assert writes == [[], ['AAA']]
+    assert Database.fetch_watchlist(Database.WATCH_SIMULATOR) == ['AAA']
+
+    # Ending clears the watchlist before the controller redraws the previous menu
+    controller = mock.Mock()
+    controller.pop.side_effect = lambda: writes.append(Database.fetch_watchlist(Database.WATCH_SIMULATOR))
+    monkeypatch.setattr(Menu, 'select_option', staticmethod(lambda options: 9))
+    menu.handle_option(controller)
+    assert writes[-2:] == [[], []]
\ No newline at end of file
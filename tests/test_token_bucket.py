@@ -0,0 +1,30 @@
+import pytest
+from asx_tracker import token_bucket
+from asx_tracker.token_bucket import TokenBucket
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [0.0]
+    def sleep(seconds):
+        now[0] += seconds
+    monkeypatch.setattr(token_bucket, 'monotonic', lambda: now[0])
+    monkeypatch.setattr(token_bucket, 'sleep', sleep)
+    return now
+
+
+def test_bursts_then_paces(clock):
+    bucket = TokenBucket(10, capacity=2)
+    assert [bucket.acquire() for _ in range(4)] == pytest.approx([0, 0, 0.1, 0.1])
+
+    # Saved tokens are kept when the rate changes
+    clock[0] += 1
+    bucket.set_rate(1)
+    assert [bucket.acquire() for _ in range(3)] == pytest.approx([0, 0, 1])
+    with pytest.raises(ValueError):
+        bucket.set_rate(0)
+
+
+def test_waiting_threads_reserve_in_order(clock, monkeypatch):
+    monkeypatch.setattr(token_bucket, 'sleep', lambda seconds: None) # Threads still waiting
+    bucket = TokenBucket(2)
+    assert [bucket.acquire() for _ in range(3)] == pytest.approx([0, 0.5, 1])
\ No newline at end of file